@@ -20,6 +20,7 @@ class VetDataConnector:
                 
                 record = {
                     'id': vet.get('id', ''),
+                    'canonical_id': vet.get('canonical_id', ''),
                     'name': vet.get('name', ''),
                     'rating': float(vet.get('rating', 0)),
                     'review_count': int(vet.get('review_count', 0)),
@@ -39,6 +40,12 @@ class VetDataConnector:
                 record['distance'] = float(vet.get('distance', 0))
                 record['reviews'] = vet.get('reviews', [])
                 record['sources'] = vet.get('sources', [vet.get('source', 'unknown')])
+                review_summary = vet.get('review_summary') or {}
+                record['review_summary'] = review_summary
+                record['yelp_business_id'] = vet.get('yelp_business_id', '')
+                record['foursquare_id'] = vet.get('foursquare_id', '')
+                record['weighted_rating'] = float(review_summary.get('weighted_rating', 0))
+                record['sentiment_score'] = float(review_summary.get('sentiment_mean', 0))
                 standardized_records.append(record)
                 
             except Exception as e:
@@ -58,7 +65,10 @@ class VetDataConnector:
             return df
         
         scored_df = df.copy()
-        scored_df['rating_norm'] = (scored_df['rating'] - 1) / 4
+        rating = scored_df['rating']
+        if 'weighted_rating' in scored_df.columns:
+            rating = scored_df['weighted_rating'].where(scored_df['weighted_rating'] > 0, rating)
+        scored_df['rating_norm'] = (rating - 1) / 4
         scored_df.loc[scored_df['review_count'] < 3, 'rating_norm'] = scored_df.loc[scored_df['review_count'] < 3, 'rating_norm'] * 0.5
 
         if scored_df['review_count'].max() > 0:
@@ -52,6 +52,7 @@ class VetRecommender:
         for _, row in recommendations.iterrows():
             detail = {
                 'id': row.get('id', ''),
+                'canonical_id': row.get('canonical_id', ''),
                 'name': row.get('name', ''),
                 'rating': row.get('rating', 0),
                 'review_count': row.get('review_count', 0),
@@ -68,7 +69,10 @@ class VetRecommender:
                 'composite_score': row.get('composite_score', 0),
                 'handles_exotic': row.get('handles_exotic', False),
                 'source': row.get('source', 'unknown'),
-                'recommendation_reasons': row.get('recommendation_reasons', [])
+                'recommendation_reasons': row.get('recommendation_reasons', []),
+                'review_summary': row.get('review_summary') or {},
+                'yelp_business_id': row.get('yelp_business_id', ''),
+                'foursquare_id': row.get('foursquare_id', '')
             }
             
             
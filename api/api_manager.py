@@ -1,28 +1,98 @@
 import os
+import copy
+import json
 import logging
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import time
-from utils.geocoding import geocode_location
+from functools import partial
+from .entity_resolution import EntityResolver
+from utils.api_utils import APIRequestError, get_pool_stats, session_registry
+from utils.deadline import Deadline
+from utils.hedging import HedgingPolicy
+from utils.rate_limit import create_rate_limiter
+from utils.single_flight import SingleFlight, SingleFlightTimeout
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .provider_cache import ProviderCache
+from .search_context import SearchContext
+from .vet_identity_store import VetIdentityStore, canonical_id_for
 import random
 from datetime import datetime, timedelta
         
 
 class APIManager:
     
+    CACHED_SOURCES = ("foursquare_api", "tomtom_api", "here_api")
+    SEARCH_DEPENDENT_FIELDS = ("distance",)
+    
     def __init__(self, 
                  foursquare_api_key: Optional[str] = None,
                  tomtom_api_key: Optional[str] = None,
                  here_api_key: Optional[str] = None,
                  yelp_dataset_path: Optional[str] = None,
-                 enable_yelp_dataset: bool = True):
+                 enable_yelp_dataset: bool = True,
+                 yelp_ingest_workers: int = 1,
+                 yelp_review_sentiment: bool = True,
+                 max_workers: int = 8,
+                 source_timeouts: Optional[Dict[str, float]] = None,
+                 default_source_timeout: float = 8.0,
+                 search_budget: float = 12.0,
+                 identity_store_path: Optional[str] = None,
+                 provider_cache_ttl: float = 900.0,
+                 provider_cache_stale: float = 3600.0,
+                 provider_cache_max_entries: int = 1024,
+                 provider_cache_precision: int = 6,
+                 foursquare_tips_concurrency: int = 4,
+                 foursquare_rate_per_second: float = 10.0,
+                 foursquare_tips_for_displayed_only: bool = False,
+                 provider_rate_limits: Optional[Dict[str, float]] = None,
+                 rate_limit_dir: Optional[str] = None,
+                 rate_limit_wait: float = 1.0,
+                 circuit_window: int = 20,
+                 circuit_failure_threshold: float = 0.5,
+                 circuit_slow_call_seconds: float = 5.0,
+                 circuit_cooldown: float = 30.0,
+                 http_pool_connections: int = 4,
+                 http_pool_maxsize: int = 10,
+                 hedged_sources: Optional[List[str]] = None,
+                 hedge_budget: float = 0.1):
 
         self.logger = logging.getLogger(__name__)
         self.enabled_apis = []
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vet-source")
+        self.source_timeouts = source_timeouts or {}
+        self.default_source_timeout = default_source_timeout
+        self.search_budget = search_budget
+        self.entity_resolver = EntityResolver()
+        self.search_radius_miles = 10
+        self.hedging_policies = {source: HedgingPolicy(source, budget_ratio=hedge_budget)
+                                 for source in (hedged_sources or [])}
+        self.single_flight = SingleFlight()
+        session_registry.configure(pool_connections=http_pool_connections, pool_maxsize=http_pool_maxsize)
+        rate_limits = {"foursquare_api": foursquare_rate_per_second}
+        rate_limits.update(provider_rate_limits or {})
+        self.rate_limiters = {source: create_rate_limiter(source, rate, state_dir=rate_limit_dir)
+                              for source, rate in rate_limits.items() if rate > 0}
+        self.provider_cache = None
+        if provider_cache_ttl > 0:
+            self.provider_cache = ProviderCache(ttl_seconds=provider_cache_ttl,
+                                                stale_seconds=provider_cache_stale,
+                                                max_entries=provider_cache_max_entries,
+                                                geohash_precision=provider_cache_precision,
+                                                executor=self.executor)
+        self.identity_store = None
+        if identity_store_path:
+            try:
+                self.identity_store = VetIdentityStore(identity_store_path)
+            except Exception as e:
+                self.logger.warning(f"Vet identity store initialization failed: {e}")
         
         if yelp_dataset_path and enable_yelp_dataset:
             try:
                 from .yelp_dataset import YelpDatasetProcessor
-                self.yelp_dataset = YelpDatasetProcessor(dataset_path=yelp_dataset_path)
+                self.yelp_dataset = YelpDatasetProcessor(dataset_path=yelp_dataset_path,
+                                                         ingest_workers=yelp_ingest_workers,
+                                                         analyze_review_text=yelp_review_sentiment)
                 self.enabled_apis.append("yelp_dataset")
                 self.logger.info(f"Yelp Dataset enabled with path: {yelp_dataset_path}")
             except Exception as e:
@@ -31,7 +101,13 @@ class APIManager:
         if foursquare_api_key:
             try:
                 from .foursquare_api import FoursquareAPI
-                self.foursquare_api = FoursquareAPI(api_key=foursquare_api_key)
+                self.foursquare_api = FoursquareAPI(api_key=foursquare_api_key,
+                                                    tips_concurrency=foursquare_tips_concurrency,
+                                                    rate_per_second=foursquare_rate_per_second,
+                                                    tips_for_displayed_only=foursquare_tips_for_displayed_only,
+                                                    rate_limiter=self.rate_limiters.get("foursquare_api"),
+                                                    rate_limit_wait=rate_limit_wait,
+                                                    hedging=self.hedging_policies.get("foursquare_api"))
                 self.enabled_apis.append("foursquare_api")
                 self.logger.info("Foursquare API enabled")
             except Exception as e:
@@ -40,7 +116,10 @@ class APIManager:
         if tomtom_api_key:
             try:
                 from .tomtom_api import TomTomAPI
-                self.tomtom_api = TomTomAPI(api_key=tomtom_api_key)
+                self.tomtom_api = TomTomAPI(api_key=tomtom_api_key,
+                                            rate_limiter=self.rate_limiters.get("tomtom_api"),
+                                            rate_limit_wait=rate_limit_wait,
+                                            hedging=self.hedging_policies.get("tomtom_api"))
                 self.enabled_apis.append("tomtom_api")
                 self.logger.info("TomTom API enabled")
             except Exception as e:
@@ -49,105 +128,345 @@ class APIManager:
         if here_api_key:
             try:
                 from .here_api import HereAPI
-                self.here_api = HereAPI(api_key=here_api_key)
+                self.here_api = HereAPI(api_key=here_api_key,
+                                        rate_limiter=self.rate_limiters.get("here_api"),
+                                        rate_limit_wait=rate_limit_wait,
+                                        hedging=self.hedging_policies.get("here_api"))
                 self.enabled_apis.append("here_api")
                 self.logger.info("HERE API enabled")
             except Exception as e:
                 self.logger.warning(f"HERE API initialization failed: {e}")
         
+        self.circuit_breakers = {
+            source: CircuitBreaker(source, window_size=circuit_window,
+                                   failure_threshold=circuit_failure_threshold,
+                                   slow_call_seconds=circuit_slow_call_seconds,
+                                   cooldown_seconds=circuit_cooldown)
+            for source in self.enabled_apis
+        }
+        
         if not self.enabled_apis:
             self.logger.warning("No APIs configured. Application will have limited functionality.")
     
     def get_combined_data(self, location: str, max_results_per_source: int = 10,
                          pet_type: Optional[str] = None,
                          specialties: Optional[List[str]] = None) -> List[Dict]:
-
-        self.logger.info(f"Searching for vets near {location}")        
+        data, _ = self.get_combined_data_with_status(location, max_results_per_source=max_results_per_source,
+                                                     pet_type=pet_type, specialties=specialties)
+        return data
+    
+    def get_combined_data_with_status(self, location: str, max_results_per_source: int = 10,
+                                      pet_type: Optional[str] = None,
+                                      specialties: Optional[List[str]] = None,
+                                      deadline: Optional[Deadline] = None) -> Tuple[List[Dict], Dict]:
+        deadline = deadline or Deadline(self.search_budget)
+        key = (" ".join((location or "").lower().split()), self.search_radius_miles, max_results_per_source)
         try:
-            lat, lng = geocode_location(location)
-            location_coords = f"{lat},{lng}"
-            self.logger.info(f"Geocoded {location} to coordinates: {location_coords}")
-        except Exception as e:
-            self.logger.warning(f"Could not geocode location: {e}")
-            location_coords = None
+            (data, source_status), shared = self.single_flight.do(
+                key, lambda: self._fetch_combined_data(location, max_results_per_source, deadline),
+                timeout=deadline.seconds())
+        except SingleFlightTimeout as e:
+            self.logger.warning(f"Gave up waiting for an in-flight search for {location}: {e}")
+            deadline.mark_cut("coalesced_search", "in-flight search did not finish before the deadline")
+            source_status = self._new_source_status()
+            source_status["cut_short"] = deadline.cut_short
+            return [], dict(source_status, coalesced=True)
+        if shared:
+            self.logger.info(f"Joined an in-flight search for {location}")
+        source_status = dict(source_status, coalesced=shared)
+        return copy.deepcopy(data), source_status
+    
+    def _fetch_combined_data(self, location: str, max_results_per_source: int,
+                             deadline: Deadline) -> Tuple[List[Dict], Dict]:
+        context = self.resolve_search_context(location, deadline=deadline)
+        fetchers = self._source_fetchers(context, max_results_per_source, deadline)
+        source_status = self._new_source_status()
         
         all_data = []
-        successful_sources = []
-         
-        if "yelp_dataset" in self.enabled_apis:
-            try:
-                yelp_results = self.yelp_dataset.get_vets_near_location(
-                    location, radius_miles=10)[:max_results_per_source]
-                
-                if yelp_results:
-                    self.logger.info(f"Found {len(yelp_results)} results from Yelp dataset")
-                    
-                    for item in yelp_results:
-                        item["source"] = "yelp_dataset"
-                    all_data.extend(yelp_results)
-                    successful_sources.append("yelp_dataset")
-            except Exception as e:
-                self.logger.error(f"Error getting Yelp dataset data: {e}")
-        
-        if "foursquare_api" in self.enabled_apis:
-            try:
-                foursquare_results = self.foursquare_api.get_all_vets_with_details(
-                    location, max_results=max_results_per_source)
-                
-                if foursquare_results:
-                    self.logger.info(f"Found {len(foursquare_results)} results from Foursquare API")
-                    
-                    for item in foursquare_results:
-                        item["source"] = "foursquare_api"
-                    all_data.extend(foursquare_results)
-                    successful_sources.append("foursquare_api")
-            except Exception as e:
-                self.logger.error(f"Error getting Foursquare data: {e}")
-        
-        if "tomtom_api" in self.enabled_apis:
-            try:
-                tomtom_results = self.tomtom_api.get_all_vets_with_details(
-                    location_coords or location, max_results=max_results_per_source)
-                
-                if tomtom_results:
-                    self.logger.info(f"Found {len(tomtom_results)} results from TomTom API")
-                    
-                    for item in tomtom_results:
-                        item["source"] = "tomtom_api"
-                    all_data.extend(tomtom_results)
-                    successful_sources.append("tomtom_api")
-            except Exception as e:
-                self.logger.error(f"Error getting TomTom data: {e}")
-        
-        if "here_api" in self.enabled_apis:
-            try:
-                here_results = self.here_api.get_all_vets_with_details(
-                    location_coords or location, max_results=max_results_per_source)
-                
-                if here_results:
-                    self.logger.info(f"Found {len(here_results)} results from HERE API")
-                    
-                    for item in here_results:
-                        item["source"] = "here_api"
-                    all_data.extend(here_results)
-                    successful_sources.append("here_api")
-            except Exception as e:
-                self.logger.error(f"Error getting HERE data: {e}")
-         
-        self.logger.info(f"Retrieved data from {len(successful_sources)} sources: {', '.join(successful_sources)}")
-        self.logger.info(f"Total raw results: {len(all_data)}")
+        for source, results in self._iter_source_results(fetchers, deadline, source_status):
+            all_data.extend(results)
         
+        self._log_source_status(source_status, len(all_data))
         if not all_data:
             self.logger.warning(f"No data found from any source for {location}. Using mock data.")
-            mock_data = self._get_mock_data(location, max_results=max_results_per_source)
+            mock_data = self._get_mock_data(location, max_results=max_results_per_source, context=context)
             all_data.extend(mock_data)
         
+        deduplicated_data = self._combine_results(all_data)
+        source_status["cut_short"] = deadline.cut_short
+        return deduplicated_data, source_status
+    
+    def iter_combined_data(self, location: str, max_results_per_source: int = 10,
+                           pet_type: Optional[str] = None,
+                           specialties: Optional[List[str]] = None,
+                           deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, List[Dict], Dict]]:
+        deadline = deadline or Deadline(self.search_budget)
+        context = self.resolve_search_context(location, deadline=deadline)
+        fetchers = self._source_fetchers(context, max_results_per_source, deadline)
+        source_status = self._new_source_status()
+        
+        normalized_data = []
+        pending_identities = None
+        stream_ids = {}
+        try:
+            for source, results in self._iter_source_results(fetchers, deadline, source_status):
+                normalized_data.extend(self._normalize_data_fields(results))
+                source_status["cut_short"] = deadline.cut_short
+                deduplicated_data, pending_identities = self._resolve_vet_identities(
+                    copy.deepcopy(normalized_data), stream_ids=stream_ids)
+                yield source, deduplicated_data, source_status
+        finally:
+            if pending_identities is not None:
+                self._save_identities(*pending_identities)
+        
+        source_status["cut_short"] = deadline.cut_short
+        self._log_source_status(source_status, len(normalized_data))
+        if not normalized_data:
+            self.logger.warning(f"No data found from any source for {location}. Using mock data.")
+            mock_data = self._get_mock_data(location, max_results=max_results_per_source, context=context)
+            yield "mock", self._combine_results(mock_data), source_status
+    
+    def resolve_search_context(self, location: str, deadline: Optional[Deadline] = None) -> SearchContext:
+        self.logger.info(f"Searching for vets near {location}")        
+        return SearchContext.resolve(location, radius_miles=self.search_radius_miles, deadline=deadline)
+    
+    def _combine_results(self, all_data: List[Dict]) -> List[Dict]:
         normalized_data = self._normalize_data_fields(all_data)   
         deduplicated_data = self._deduplicate_vet_data(normalized_data)
         self.logger.info(f"Combined and deduplicated to {len(deduplicated_data)} unique vets")
-        
         return deduplicated_data
     
+    def _log_source_status(self, source_status: Dict, total_results: int):
+        successful_sources = source_status["succeeded"]
+        self.logger.info(f"Retrieved data from {len(successful_sources)} sources: {', '.join(successful_sources)}")
+        if source_status["timed_out"]:
+            self.logger.warning(f"Sources timed out: {', '.join(source_status['timed_out'])}")
+        self.logger.info(f"Total raw results: {total_results}")
+    
+    def _source_fetchers(self, context: SearchContext, max_results: int,
+                         deadline: Deadline) -> Dict[str, Callable[[], List[Dict]]]:
+        loaders = {}
+        if "yelp_dataset" in self.enabled_apis:
+            loaders["yelp_dataset"] = lambda source_deadline: self.yelp_dataset.get_vets_near_location(
+                context.query, radius_miles=context.radius_miles, coordinates=context.coordinates,
+                limit=max_results, include_reviews=False)
+        if "foursquare_api" in self.enabled_apis:
+            loaders["foursquare_api"] = lambda source_deadline: self.foursquare_api.get_all_vets_with_details(
+                context.query, max_results=max_results, context=context, deadline=source_deadline)
+        if "tomtom_api" in self.enabled_apis:
+            loaders["tomtom_api"] = lambda source_deadline: self.tomtom_api.get_all_vets_with_details(
+                context.query, max_results=max_results, context=context, deadline=source_deadline)
+        if "here_api" in self.enabled_apis:
+            loaders["here_api"] = lambda source_deadline: self.here_api.get_all_vets_with_details(
+                context.query, max_results=max_results, context=context, deadline=source_deadline)
+        
+        fetchers = {}
+        for source, load in loaders.items():
+            source_deadline = deadline.child(self._source_timeout(source), scoped=True)
+            if self.provider_cache is not None and source in self.CACHED_SOURCES:
+                fetch = partial(self._load_for_cache, source, load, source_deadline)
+                refresh = partial(self._refresh_source, source, load)
+                fetch = self._cached_fetcher(source, context, max_results, fetch, refresh)
+            else:
+                fetch = partial(self._call_source, source, load, source_deadline)
+            fetchers[source] = fetch
+        return fetchers
+    
+    def _load_for_cache(self, source: str, load: Callable[[Deadline], List[Dict]],
+                        source_deadline: Deadline) -> Tuple[List[Dict], bool]:
+        results = self._call_source(source, load, source_deadline)
+        return results, not source_deadline.scope_cut_short
+    
+    def _refresh_source(self, source: str, load: Callable[[Deadline], List[Dict]]) -> Tuple[List[Dict], bool]:
+        return self._load_for_cache(source, load, Deadline().child(self._source_timeout(source), scoped=True))
+    
+    def _call_source(self, source: str, load: Callable[[Deadline], List[Dict]],
+                     source_deadline: Deadline) -> List[Dict]:
+        breaker = self.circuit_breakers.get(source)
+        if breaker is not None and not breaker.allow_request():
+            raise CircuitOpenError(f"circuit for {source} is open")
+        started = time.monotonic()
+        try:
+            results = load(source_deadline)
+        except APIRequestError as e:
+            if e.budget_exhausted:
+                self._release_source_probe(source)
+            else:
+                self._record_source_outcome(source, False, time.monotonic() - started, str(e))
+            raise
+        except Exception as e:
+            self._record_source_outcome(source, False, time.monotonic() - started, str(e))
+            raise
+        if source_deadline.expired():
+            self._record_source_outcome(source, False, time.monotonic() - started, "deadline exceeded")
+        else:
+            self._record_source_outcome(source, True, time.monotonic() - started)
+        return results
+    
+    def _cached_fetcher(self, source: str, context: SearchContext, max_results: int,
+                        fetch: Callable[[], Tuple[List[Dict], bool]],
+                        refresh: Callable[[], Tuple[List[Dict], bool]]) -> Callable[[], List[Dict]]:
+        return lambda: self.provider_cache.fetch(source, context, max_results, fetch, refresh=refresh)
+    
+    def get_cache_stats(self) -> Dict:
+        if self.provider_cache is None:
+            return {}
+        return self.provider_cache.stats()
+    
+    def clear_provider_cache(self):
+        if self.provider_cache is not None:
+            self.provider_cache.clear()
+    
+    def _source_timeout(self, source: str) -> float:
+        return self.source_timeouts.get(source, self.default_source_timeout)
+    
+    def _new_source_status(self) -> Dict:
+        return {
+            "enabled": list(self.enabled_apis),
+            "succeeded": [],
+            "empty": [],
+            "failed": [],
+            "timed_out": [],
+            "circuit_open": [],
+            "elapsed_ms": {}
+        }
+    
+    def _iter_source_results(self, fetchers: Dict[str, Callable[[], List[Dict]]], deadline: Deadline,
+                             status: Dict) -> Iterator[Tuple[str, List[Dict]]]:
+        submitted_at = time.monotonic()
+        budget_deadline = submitted_at + deadline.remaining()
+        futures = {}
+        deadlines = {}
+        for source, fetch in fetchers.items():
+            future = self.executor.submit(fetch)
+            futures[future] = source
+            deadlines[future] = min(submitted_at + self._source_timeout(source), budget_deadline)
+        
+        pending = set(futures)
+        try:
+            while pending:
+                next_deadline = min(deadlines[future] for future in pending)
+                done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                for future in done:
+                    pending.discard(future)
+                    source = futures[future]
+                    elapsed = now - submitted_at
+                    status["elapsed_ms"][source] = round(elapsed * 1000)
+                    try:
+                        results = future.result()
+                    except CircuitOpenError:
+                        status["circuit_open"].append(source)
+                        self.logger.info(f"Skipping {source}, its circuit is open")
+                        continue
+                    except Exception as e:
+                        self.logger.error(f"Error getting {source} data: {e}")
+                        status["failed"].append(source)
+                        continue
+                    if not results:
+                        status["empty"].append(source)
+                        continue
+                    
+                    self.logger.info(f"Found {len(results)} results from {source}")
+                    for item in results:
+                        item["source"] = source
+                    status["succeeded"].append(source)
+                    yield source, results
+                
+                now = time.monotonic()
+                for future in [future for future in pending if deadlines[future] <= now]:
+                    pending.discard(future)
+                    future.cancel()
+                    source = futures[future]
+                    status["timed_out"].append(source)
+                    status["elapsed_ms"][source] = round((now - submitted_at) * 1000)
+                    deadline.mark_cut(source, "provider fetch abandoned at its deadline")
+                    self.logger.warning(f"{source} missed its deadline of "
+                                        f"{deadlines[future] - submitted_at:.1f}s, continuing without it")
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def _record_source_outcome(self, source: str, ok: bool, elapsed: float, error: str = ""):
+        breaker = self.circuit_breakers.get(source)
+        if breaker is None:
+            return
+        if ok:
+            breaker.record_success(elapsed)
+        else:
+            breaker.record_failure(elapsed, error)
+    
+    def _release_source_probe(self, source: str):
+        breaker = self.circuit_breakers.get(source)
+        if breaker is not None:
+            breaker.release_probe()
+    
+    def get_hedging_stats(self) -> Dict[str, Dict]:
+        return {source: policy.stats() for source, policy in self.hedging_policies.items()}
+    
+    def get_single_flight_stats(self) -> Dict[str, int]:
+        return self.single_flight.stats()
+    
+    def get_pool_stats(self) -> Dict[str, Dict]:
+        return get_pool_stats()
+    
+    def get_source_health(self) -> Dict[str, Dict]:
+        return {source: breaker.status() for source, breaker in self.circuit_breakers.items()}
+    
+    def hydrate_reviews(self, records: List[Dict], limit: int = 3) -> List[Dict]:
+        if "yelp_dataset" not in self.enabled_apis:
+            return records
+        
+        business_ids = [record["yelp_business_id"] for record in records if record.get("yelp_business_id")]
+        if not business_ids:
+            return records
+        
+        try:
+            reviews_by_business = self.yelp_dataset.get_formatted_reviews(business_ids, limit=limit)
+        except Exception as e:
+            self.logger.error(f"Error hydrating Yelp reviews: {e}")
+            return records
+        
+        for record in records:
+            reviews = reviews_by_business.get(record.get("yelp_business_id"))
+            if not reviews:
+                continue
+            for review in reviews:
+                review["source"] = "yelp_dataset"
+            other_reviews = [review for review in record.get("reviews", []) if review.get("source") != "yelp_dataset"]
+            record["reviews"] = (reviews + other_reviews)[:limit]
+        
+        self.logger.info(f"Hydrated Yelp reviews for {len(reviews_by_business)} displayed vets")
+        return records
+    
+    def hydrate_tips(self, records: List[Dict], limit: int = 3) -> List[Dict]:
+        if "foursquare_api" not in self.enabled_apis or not self.foursquare_api.tips_for_displayed_only:
+            return records
+        
+        place_ids = [record["foursquare_id"] for record in records
+                     if record.get("foursquare_id") and len(record.get("reviews", [])) < limit]
+        if not place_ids:
+            return records
+        
+        try:
+            tips_by_place = self.foursquare_api.get_tips_for_places(place_ids, limit=limit)
+        except Exception as e:
+            self.logger.error(f"Error hydrating Foursquare tips: {e}")
+            return records
+        
+        for record in records:
+            tips_data = tips_by_place.get(record.get("foursquare_id"))
+            if not tips_data or "error" in tips_data:
+                continue
+            tips = self.foursquare_api.format_tips(tips_data, record.get("rating", 0))
+            for tip in tips:
+                tip["source"] = "foursquare_api"
+            record["reviews"] = (record.get("reviews", []) + tips)[:limit]
+        
+        self.logger.info(f"Hydrated Foursquare tips for {len(place_ids)} displayed vets")
+        return records
+    
     def _normalize_data_fields(self, vet_data: List[Dict]) -> List[Dict]:
         normalized_results = []
         
@@ -229,6 +548,13 @@ class APIManager:
             else:
                 normalized_vet["reviews"] = []
             
+            if vet.get("review_summary"):
+                normalized_vet["review_summary"] = vet["review_summary"]
+            if vet.get("yelp_business_id"):
+                normalized_vet["yelp_business_id"] = vet["yelp_business_id"]
+            if vet.get("foursquare_id"):
+                normalized_vet["foursquare_id"] = vet["foursquare_id"]
+            
             exotic_keywords = ["exotic", "bird", "reptile", "avian", "amphibian", "zoo"]
             categories_text = " ".join(categories).lower()
             has_exotic = any(keyword in categories_text for keyword in exotic_keywords)
@@ -245,73 +571,133 @@ class APIManager:
         return normalized_results
     
     def _deduplicate_vet_data(self, vet_data: List[Dict]) -> List[Dict]:
+        deduplicated_vets, pending_identities = self._resolve_vet_identities(vet_data)
+        self._save_identities(*pending_identities)
+        return deduplicated_vets
+    
+    def _resolve_vet_identities(self, vet_data: List[Dict], stream_ids: Optional[Dict[Tuple[str, str], str]] = None
+                                ) -> Tuple[List[Dict], Tuple[Dict, Dict, Dict]]:
         if not vet_data:
-            return []
+            return [], ({}, {}, {})
         
-        vet_groups = {}
-        for vet in vet_data:
-            name = vet.get("name", "").lower()
-            coordinates = vet.get("coordinates", {})
-            latitude = coordinates.get("latitude")
-            longitude = coordinates.get("longitude")
-            
-            if not name or not latitude or not longitude:
-                continue
+        keys = [self._source_key(vet) for vet in vet_data]
+        stored = self._lookup_identities([key for key in keys if key])
+        known = dict(stored)
+        if stream_ids:
+            known.update((key, stream_ids[key]) for key in keys if key in stream_ids)
+        groups: Dict[str, List[int]] = {}
+        unknown = []
+        for index, key in enumerate(keys):
+            canonical_id = known.get(key) if key else None
+            if canonical_id:
+                groups.setdefault(canonical_id, []).append(index)
+            else:
+                unknown.append(index)
         
-            rounded_lat = round(latitude, 4) 
-            rounded_lng = round(longitude, 4)
-            location_key = f"{rounded_lat},{rounded_lng}"
-            name_parts = name.split()
-            name_key = name
-            
-            if any(term in name for term in ["animal hospital", "vet", "veterinary"]):    
-                simplified_name = name
-                for term in ["animal", "hospital", "vet", "veterinary", "clinic", "care"]:
-                    simplified_name = simplified_name.replace(term, "")
-                
-                simplified_name = " ".join(simplified_name.split())
-                if simplified_name:  
-                    name_key = simplified_name
-            
-            match_found = False
-            for existing_key in list(vet_groups.keys()):
-                existing_name, existing_location = existing_key.split("|||")
-                if existing_location == location_key:    
-                    if (existing_name in name_key or name_key in existing_name or
-                        self._get_name_similarity(existing_name, name_key) > 0.7):
-                        vet_groups[existing_key].append(vet)
-                        match_found = True
-                        break
-            
-            if not match_found:
-                group_key = f"{name_key}|||{location_key}"
-                vet_groups[group_key] = [vet]
+        cached_records = self._cached_identity_records(list(groups))
+        merged_ids = {}
+        merge_targets = set()
+        if unknown:
+            representative_ids = sorted(groups)
+            pool = [vet_data[index] for index in unknown]
+            pool.extend(cached_records.get(canonical_id) or vet_data[groups[canonical_id][0]]
+                        for canonical_id in representative_ids)
+            for cluster in self.entity_resolver.resolve(pool):
+                members = [unknown[position] for position in cluster if position < len(unknown)]
+                canonical_ids = sorted(representative_ids[position - len(unknown)]
+                                       for position in cluster if position >= len(unknown))
+                if canonical_ids:
+                    target = canonical_ids[0]
+                    for other in canonical_ids[1:]:
+                        merged_ids[other] = target
+                        merge_targets.add(target)
+                        groups[target].extend(groups.pop(other))
+                        cached_records.pop(other, None)
+                else:
+                    member_keys = [keys[index] for index in members if keys[index]]
+                    target = canonical_id_for(min(member_keys) if member_keys else self._anonymous_key(vet_data[members[0]]))
+                groups.setdefault(target, []).extend(members)
         
         deduplicated_vets = []
-        for group_key, vets in vet_groups.items():
+        assignments = {}
+        records_to_save = {}
+        for canonical_id, indices in sorted(groups.items(), key=lambda item: min(item[1])):
+            vets = [vet_data[index] for index in sorted(indices)]
             if len(vets) == 1:
-                deduplicated_vets.append(vets[0])
+                merged_vet = vets[0]
             else:
                 merged_vet = self._merge_vet_entries(vets)
-                deduplicated_vets.append(merged_vet)
+            self._fill_from_cached_record(merged_vet, cached_records.get(canonical_id))
+            merged_vet["canonical_id"] = canonical_id
+            deduplicated_vets.append(merged_vet)
+            
+            for index in indices:
+                if keys[index] and stored.get(keys[index]) != canonical_id:
+                    assignments[keys[index]] = canonical_id
+                if keys[index] and stream_ids is not None:
+                    stream_ids[keys[index]] = canonical_id
+            if not any(keys[index] for index in indices):
+                continue
+            if canonical_id in merge_targets or self._record_changed(merged_vet, cached_records.get(canonical_id)):
+                records_to_save[canonical_id] = merged_vet
         
-        return deduplicated_vets
+        return deduplicated_vets, (assignments, records_to_save, merged_ids)
     
-    def _get_name_similarity(self, name1: str, name2: str) -> float:
-        words1 = set(name1.lower().split())
-        words2 = set(name2.lower().split())
-        
-        common_words = {"the", "and", "of", "for", "a", "&"}
-        words1 = words1 - common_words
-        words2 = words2 - common_words
-        
-        if not words1 or not words2:
-            return 0
-        
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
-        
-        return intersection / union if union > 0 else 0
+    def _record_changed(self, vet: Dict, cached_record: Optional[Dict]) -> bool:
+        if not cached_record:
+            return True
+        stored_record = json.loads(json.dumps(vet, default=str))
+        fields = set(stored_record) | set(cached_record)
+        return any(stored_record.get(field) != cached_record.get(field)
+                   for field in fields if field not in self.SEARCH_DEPENDENT_FIELDS)
+    
+    def _source_key(self, vet: Dict) -> Optional[Tuple[str, str]]:
+        source = vet.get("source", "")
+        source_id = vet.get("id", "")
+        if not source_id or source in ("", "unknown", "mock_data"):
+            return None
+        return source, str(source_id)
+    
+    def _anonymous_key(self, vet: Dict) -> Tuple[str, str]:
+        coordinates = vet.get("coordinates") or {}
+        return ("anonymous", f"{vet.get('name', '').lower()}|{coordinates.get('latitude')}|{coordinates.get('longitude')}")
+    
+    def _lookup_identities(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        if self.identity_store is None or not keys:
+            return {}
+        try:
+            return self.identity_store.lookup_many(keys)
+        except Exception as e:
+            self.logger.error(f"Error looking up vet identities: {e}")
+            return {}
+    
+    def _cached_identity_records(self, canonical_ids: List[str]) -> Dict[str, Dict]:
+        if self.identity_store is None or not canonical_ids:
+            return {}
+        try:
+            return self.identity_store.get_records(canonical_ids)
+        except Exception as e:
+            self.logger.error(f"Error reading canonical vet records: {e}")
+            return {}
+    
+    def _save_identities(self, assignments: Dict[Tuple[str, str], str], records: Dict[str, Dict],
+                         merged_ids: Dict[str, str]):
+        if self.identity_store is None or not (assignments or records or merged_ids):
+            return
+        try:
+            self.identity_store.save(assignments, records, merged_ids)
+            if assignments or merged_ids:
+                self.logger.info(f"Stored {len(assignments)} new source identities, "
+                                 f"merged {len(merged_ids)} canonical vets")
+        except Exception as e:
+            self.logger.error(f"Error saving vet identities: {e}")
+    
+    def _fill_from_cached_record(self, vet: Dict, cached_record: Optional[Dict]):
+        if not cached_record:
+            return
+        for field in ["phone", "image_url", "url", "review_summary", "yelp_business_id", "foursquare_id"]:
+            if not vet.get(field) and cached_record.get(field):
+                vet[field] = cached_record[field]
     
     def _merge_vet_entries(self, entries: List[Dict]) -> Dict:
         def score_entry(entry):
@@ -351,7 +737,8 @@ class APIManager:
             if source and source not in all_sources:
                 all_sources.append(source)    
             
-            for field in ["rating", "review_count", "price", "phone", "image_url", "url"]:
+            for field in ["rating", "review_count", "price", "phone", "image_url", "url",
+                          "review_summary", "yelp_business_id", "foursquare_id"]:
                 if not base_entry.get(field) and entry.get(field):
                     base_entry[field] = entry.get(field)
             
@@ -371,17 +758,16 @@ class APIManager:
         
         return base_entry
     
-    def _get_mock_data(self, location: str, max_results: int = 10) -> List[Dict]:
+    def _get_mock_data(self, location: str, max_results: int = 10,
+                       context: Optional[SearchContext] = None) -> List[Dict]:
         self.logger.info(f"Generating mock data for location: {location}")
         lat, lng = 40.7128, -74.0060  
         
-        try:
-            actual_lat, actual_lng = geocode_location(location)
-            if actual_lat and actual_lng:
-                lat, lng = actual_lat, actual_lng
-                self.logger.info(f"Using actual coordinates for mock data: {lat}, {lng}")
-        except Exception:
-            pass
+        if context is None:
+            context = SearchContext.resolve(location)
+        if context.has_coordinates:
+            lat, lng = context.coordinates
+            self.logger.info(f"Using actual coordinates for mock data: {lat}, {lng}")
         
         location_parts = location.split(',')
         city = location_parts[0].strip() if location_parts else "Unknown City"
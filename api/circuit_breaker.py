@@ -0,0 +1,133 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 failure_threshold: float = 0.5, slow_call_seconds: float = 5.0,
+                 slow_call_threshold: float = 0.8, cooldown_seconds: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_threshold = slow_call_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.last_error = ""
+        self.skipped = 0
+        self.times_opened = 0
+        self._calls = deque(maxlen=window_size)
+        self._probe_in_flight = False
+        self._probe_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+                self.logger.info(f"Circuit for {self.name} is half-open, probing")
+            if self.state == HALF_OPEN and self._probe_in_flight:
+                if time.monotonic() - self._probe_started_at >= self.cooldown_seconds:
+                    self.logger.warning(f"Probe for {self.name} never reported back, allowing a new one")
+                    self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started_at = time.monotonic()
+                return True
+            self.skipped += 1
+            return False
+
+    def release_probe(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self, elapsed_seconds: float):
+        self._record(True, elapsed_seconds)
+
+    def record_failure(self, elapsed_seconds: float, error: str = ""):
+        self._record(False, elapsed_seconds, error)
+
+    def _record(self, ok: bool, elapsed_seconds: float, error: str = ""):
+        with self._lock:
+            slow = elapsed_seconds >= self.slow_call_seconds
+            if not ok:
+                self.last_error = error
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and not slow:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    self._calls.append((ok, elapsed_seconds))
+                    self.logger.info(f"Circuit for {self.name} closed after a successful probe")
+                else:
+                    self._open()
+                return
+
+            self._calls.append((ok, elapsed_seconds))
+            if self.state == CLOSED and len(self._calls) >= self.min_calls:
+                if self._error_rate() >= self.failure_threshold or self._slow_rate() >= self.slow_call_threshold:
+                    self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self.logger.warning(f"Circuit for {self.name} opened (error rate {self._error_rate():.0%}, "
+                            f"slow rate {self._slow_rate():.0%}), skipping it for {self.cooldown_seconds:.0f}s")
+
+    def _error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+
+    def _slow_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for _, elapsed in self._calls if elapsed >= self.slow_call_seconds) / len(self._calls)
+
+    def _latency_percentile(self, percentile: float) -> Optional[float]:
+        latencies = sorted(elapsed for _, elapsed in self._calls)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(percentile * (len(latencies) - 1))))
+        return latencies[index]
+
+    def status(self) -> Dict:
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at))
+            p50 = self._latency_percentile(0.5)
+            p90 = self._latency_percentile(0.9)
+            return {
+                "state": self.state,
+                "calls": len(self._calls),
+                "error_rate": round(self._error_rate(), 3),
+                "slow_rate": round(self._slow_rate(), 3),
+                "latency_p50_ms": round(p50 * 1000) if p50 is not None else None,
+                "latency_p90_ms": round(p90 * 1000) if p90 is not None else None,
+                "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+                "times_opened": self.times_opened,
+                "skipped": self.skipped,
+                "last_error": self.last_error
+            }
@@ -0,0 +1,232 @@
+import re
+import math
+import time
+import logging
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from utils.spatial import MILES_PER_DEGREE_LAT, haversine_miles
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = {"the", "and", "of", "for", "a", "at", "inc", "llc", "pc", "dvm"}
+GENERIC_NAME_TOKENS = {
+    "animal", "animals", "hospital", "hospitals", "vet", "vets", "veterinary", "veterinarian",
+    "veterinarians", "clinic", "clinics", "care", "center", "centre", "pet", "pets"
+}
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits if len(digits) >= 7 else ''
+
+
+def name_tokens(name: Optional[str]) -> Set[str]:
+    return set(TOKEN_PATTERN.findall((name or '').lower())) - STOP_WORDS
+
+
+def core_name_tokens(name: Optional[str]) -> Set[str]:
+    return name_tokens(name) - GENERIC_NAME_TOKENS
+
+
+def name_similarity(tokens1: Set[str], tokens2: Set[str]) -> float:
+    if not tokens1 or not tokens2:
+        return 0.0
+    return len(tokens1 & tokens2) / len(tokens1 | tokens2)
+
+
+@dataclass
+class ResolutionStats:
+    records: int = 0
+    skipped: int = 0
+    blocks: int = 0
+    oversized_blocks: int = 0
+    candidate_pairs: int = 0
+    phone_matches: int = 0
+    name_matches: int = 0
+    clusters: int = 0
+    stage_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def matches(self) -> int:
+        return self.phone_matches + self.name_matches
+
+    def as_dict(self) -> Dict:
+        return {
+            "records": self.records,
+            "skipped": self.skipped,
+            "blocks": self.blocks,
+            "oversized_blocks": self.oversized_blocks,
+            "candidate_pairs": self.candidate_pairs,
+            "phone_matches": self.phone_matches,
+            "name_matches": self.name_matches,
+            "clusters": self.clusters,
+            "stage_ms": {stage: round(ms, 2) for stage, ms in self.stage_ms.items()}
+        }
+
+    def __str__(self) -> str:
+        stages = ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in self.stage_ms.items())
+        return (f"{self.records} records ({self.skipped} skipped) -> {self.clusters} clusters; "
+                f"{self.blocks} blocks, {self.candidate_pairs} candidate pairs, "
+                f"{self.phone_matches} phone matches, {self.name_matches} name matches; {stages}")
+
+
+@dataclass
+class _Candidate:
+    index: int
+    latitude: float
+    longitude: float
+    phone: str
+    tokens: Set[str]
+
+
+class _UnionFind:
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a: int, b: int) -> bool:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if root_a > root_b:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        return True
+
+
+class EntityResolver:
+
+    def __init__(self, max_distance_miles: float = 0.1, phone_distance_miles: float = 1.0,
+                 name_threshold: float = 0.7, max_block_size: int = 200):
+        self.logger = logging.getLogger(__name__)
+        self.max_distance_miles = max_distance_miles
+        self.phone_distance_miles = phone_distance_miles
+        self.name_threshold = name_threshold
+        self.max_block_size = max_block_size
+        self.last_stats: Optional[ResolutionStats] = None
+
+    def resolve(self, records: List[Dict]) -> List[List[int]]:
+        stats = ResolutionStats(records=len(records))
+
+        started = time.perf_counter()
+        candidates = self._prepare(records)
+        stats.skipped = len(records) - len(candidates)
+        stats.stage_ms["prepare"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        blocks = self._build_blocks(candidates, stats)
+        stats.stage_ms["blocking"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        union_find = _UnionFind(len(candidates))
+        for a, b in self._candidate_pairs(blocks, stats):
+            match = self._match(candidates[a], candidates[b])
+            if match and union_find.union(a, b):
+                if match == "phone":
+                    stats.phone_matches += 1
+                else:
+                    stats.name_matches += 1
+        stats.stage_ms["scoring"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        clusters: Dict[int, List[int]] = {}
+        for position, candidate in enumerate(candidates):
+            clusters.setdefault(union_find.find(position), []).append(candidate.index)
+        result = list(clusters.values())
+        clustered = {candidate.index for candidate in candidates}
+        result.extend([index] for index in range(len(records)) if index not in clustered)
+        stats.clusters = len(result)
+        stats.stage_ms["clustering"] = (time.perf_counter() - started) * 1000
+
+        self.last_stats = stats
+        self.logger.info(f"Entity resolution: {stats}")
+        return result
+
+    def _prepare(self, records: List[Dict]) -> List[_Candidate]:
+        candidates = []
+        for index, record in enumerate(records):
+            name = record.get("name", "")
+            coordinates = record.get("coordinates") or {}
+            latitude = coordinates.get("latitude")
+            longitude = coordinates.get("longitude")
+            if not name or not latitude or not longitude:
+                continue
+
+            tokens = core_name_tokens(name)
+            if not tokens:
+                tokens = {' '.join(sorted(name_tokens(name)))}
+            candidates.append(_Candidate(
+                index=index,
+                latitude=float(latitude),
+                longitude=float(longitude),
+                phone=normalize_phone(record.get("phone")),
+                tokens=tokens
+            ))
+        return candidates
+
+    def _cell_size(self, candidates: Iterable[_Candidate]) -> Tuple[float, float]:
+        max_latitude = max((abs(candidate.latitude) for candidate in candidates), default=0.0)
+        lat_size = self.max_distance_miles / MILES_PER_DEGREE_LAT
+        lng_size = lat_size / max(math.cos(math.radians(max_latitude)), 0.01)
+        return lat_size, lng_size
+
+    def _build_blocks(self, candidates: List[_Candidate], stats: ResolutionStats) -> List[List[int]]:
+        phone_blocks: Dict[str, List[int]] = {}
+        token_cells: Dict[Tuple[str, int, int], List[int]] = {}
+        lat_size, lng_size = self._cell_size(candidates)
+
+        for position, candidate in enumerate(candidates):
+            if candidate.phone:
+                phone_blocks.setdefault(candidate.phone, []).append(position)
+            cell_lat = int(math.floor(candidate.latitude / lat_size))
+            cell_lng = int(math.floor(candidate.longitude / lng_size))
+            for token in candidate.tokens:
+                token_cells.setdefault((token, cell_lat, cell_lng), []).append(position)
+
+        blocks = [members for members in phone_blocks.values() if len(members) > 1]
+        for (token, cell_lat, cell_lng), members in token_cells.items():
+            neighbours = list(members)
+            for d_lat in (-1, 0, 1):
+                for d_lng in (-1, 0, 1):
+                    if (d_lat or d_lng) and (d_lat, d_lng) > (0, 0):
+                        neighbours.extend(token_cells.get((token, cell_lat + d_lat, cell_lng + d_lng), []))
+            if len(neighbours) > 1:
+                blocks.append(neighbours)
+
+        stats.blocks = len(blocks)
+        return blocks
+
+    def _candidate_pairs(self, blocks: List[List[int]], stats: ResolutionStats) -> Iterable[Tuple[int, int]]:
+        seen: Set[Tuple[int, int]] = set()
+        for members in blocks:
+            if len(members) > self.max_block_size:
+                stats.oversized_blocks += 1
+                continue
+            for a, b in combinations(sorted(set(members)), 2):
+                if (a, b) in seen:
+                    continue
+                seen.add((a, b))
+                stats.candidate_pairs += 1
+                yield a, b
+
+    def _match(self, a: _Candidate, b: _Candidate) -> Optional[str]:
+        distance = haversine_miles(a.latitude, a.longitude, b.latitude, b.longitude)
+        if a.phone and a.phone == b.phone and distance <= self.phone_distance_miles:
+            return "phone"
+        if distance > self.max_distance_miles:
+            return None
+        if (a.tokens <= b.tokens or b.tokens <= a.tokens or
+                name_similarity(a.tokens, b.tokens) >= self.name_threshold):
+            return "name"
+        return None
@@ -2,8 +2,14 @@ import os
 import requests
 import logging
 import time
-from typing import Dict, List, Optional, Union
-from utils.api_utils import make_api_request
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from utils.api_utils import APIRequestError, batch_api_requests, make_api_request
+from utils.deadline import Deadline
+from utils.hedging import HedgingPolicy
+from utils.rate_limit import RateLimiter, TokenBucket
+from .search_context import SearchContext
 
 class FoursquareAPI:
 
@@ -12,8 +18,13 @@ class FoursquareAPI:
     DETAILS_ENDPOINT = "/places/{}"
     PHOTOS_ENDPOINT = "/places/{}/photos"
     TIPS_ENDPOINT = "/places/{}/tips"  
+    DETAILS_FIELDS = "fsq_id,name,location,geocodes,photos,hours,rating,stats,price,website,tel,categories,description"
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, tips_concurrency: int = 4,
+                 rate_per_second: float = 10.0, rate_burst: Optional[float] = None,
+                 tips_for_displayed_only: bool = False, tips_cache_ttl: float = 900.0,
+                 tips_cache_size: int = 512, rate_limiter: Optional[RateLimiter] = None,
+                 rate_limit_wait: float = 1.0, hedging: Optional[HedgingPolicy] = None):
         self.api_key = api_key or os.getenv("FOURSQUARE_API_KEY")
         if not self.api_key:
             raise ValueError("Foursquare API key is required. Set FOURSQUARE_API_KEY environment variable or pass as parameter.")
@@ -25,9 +36,30 @@ class FoursquareAPI:
         }
         
         self.logger = logging.getLogger(__name__)
+        self.tips_concurrency = max(1, tips_concurrency)
+        self.tips_for_displayed_only = tips_for_displayed_only
+        self.rate_limiter = rate_limiter or TokenBucket(rate_per_second, rate_burst)
+        self.rate_limit_wait = rate_limit_wait
+        self.hedging = hedging
+        self.tips_cache_ttl = tips_cache_ttl
+        self.tips_cache_size = tips_cache_size
+        self._tips_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._tips_cache_lock = threading.Lock()
     
-    def search_vets(self, location: str, radius: int = 10000, limit: int = 50) -> Dict:
-        if "," in location and len(location.split(",")) == 2:
+    def search_vets(self, location: str, radius: int = 10000, limit: int = 50,
+                    coordinates: Optional[Tuple[float, float]] = None,
+                    deadline: Optional[Deadline] = None) -> Dict:
+        if coordinates is not None:
+            params = {
+                "ll": f"{coordinates[0]},{coordinates[1]}",
+                "radius": radius,
+                "query": "veterinarian",
+                "limit": min(limit, 50),
+                "categories": "19032",
+                "sort": "RELEVANCE",
+                "fields": "fsq_id,name,location,geocodes,photos,hours,rating,stats,price,website,tel,categories"
+            }
+        elif "," in location and len(location.split(",")) == 2:
             try:
                 lat, lng = map(float, location.split(","))
                 
@@ -67,18 +99,23 @@ class FoursquareAPI:
             method="get",
             params=params,
             headers=self.headers,
-            logger=self.logger
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait,
+            hedging=self.hedging,
+            deadline=deadline
         )
         
         if "error" in result:
             self.logger.error(f"Error searching Foursquare API: {result['error']}")
-            return {"error": result["error"]}
+            return {"error": result["error"], "request_failed": True,
+                    "budget_exhausted": result.get("budget_exhausted", False)}
         
         return result
 
     def get_place_details(self, place_id: str) -> Dict:
         params = {
-            "fields": "fsq_id,name,location,geocodes,photos,hours,rating,stats,price,website,tel,categories,description"
+            "fields": self.DETAILS_FIELDS
         }
         
         result = make_api_request(
@@ -86,7 +123,10 @@ class FoursquareAPI:
             method="get",
             params=params,
             headers=self.headers,
-            logger=self.logger
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait,
+            hedging=self.hedging
         )
         
         if "error" in result:
@@ -107,7 +147,10 @@ class FoursquareAPI:
             method="get",
             params=params,
             headers=self.headers,
-            logger=self.logger
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait,
+            hedging=self.hedging
         )
         
         if "error" in result:
@@ -116,29 +159,97 @@ class FoursquareAPI:
         
         return result
     
-    def get_all_vets_with_details(self, location: str, max_results: int = 20) -> List[Dict]:
-        all_vets = []
-        search_results = self.search_vets(location=location, limit=max_results)
+    def get_tips_for_places(self, place_ids: Iterable[str], limit: int = 20,
+                            deadline: Optional[Deadline] = None) -> Dict[str, Dict]:
+        place_ids = [place_id for place_id in dict.fromkeys(place_ids) if place_id]
+        tips_by_place = {}
+        missing = []
+        now = time.monotonic()
+        with self._tips_cache_lock:
+            for place_id in place_ids:
+                cached = self._tips_cache.get(place_id)
+                if cached and now - cached[0] < self.tips_cache_ttl:
+                    tips_by_place[place_id] = cached[1]
+                else:
+                    missing.append(place_id)
+        
+        if not missing:
+            return tips_by_place
+        
+        started_at = time.monotonic()
+        results = batch_api_requests(
+            urls=[f"{self.BASE_URL}{self.TIPS_ENDPOINT.format(place_id)}" for place_id in missing],
+            method="get",
+            params_list=[{"limit": min(limit, 50), "sort": "POPULAR"}] * len(missing),
+            headers=self.headers,
+            max_concurrent=self.tips_concurrency,
+            logger=self.logger,
+            deadline=deadline,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait
+        )
+        for place_id, tips_data in zip(missing, results):
+            tips_by_place[place_id] = tips_data
+            if "error" not in tips_data:
+                self._remember_tips(place_id, tips_data)
+        
+        self.logger.info(f"Fetched Foursquare tips for {len(missing)} places in "
+                         f"{(time.monotonic() - started_at) * 1000:.0f} ms "
+                         f"({len(place_ids) - len(missing)} cached)")
+        return tips_by_place
+    
+    def _remember_tips(self, place_id: str, tips_data: Dict):
+        with self._tips_cache_lock:
+            self._tips_cache[place_id] = (time.monotonic(), tips_data)
+            self._tips_cache.move_to_end(place_id)
+            while len(self._tips_cache) > self.tips_cache_size:
+                self._tips_cache.popitem(last=False)
+    
+    def get_all_vets_with_details(self, location: str, max_results: int = 20,
+                                  context: Optional[SearchContext] = None,
+                                  include_tips: Optional[bool] = None,
+                                  deadline: Optional[Deadline] = None) -> List[Dict]:
+        if include_tips is None:
+            include_tips = not self.tips_for_displayed_only
+        coordinates = context.coordinates if context is not None and context.has_coordinates else None
+        search_results = self.search_vets(location=location, limit=max_results, coordinates=coordinates,
+                                          deadline=deadline)
         
         if "error" in search_results:
             self.logger.error(f"Error in Foursquare search: {search_results['error']}")
+            if search_results.get("request_failed"):
+                raise APIRequestError(search_results["error"], search_results.get("budget_exhausted", False))
             return []
             
-        places = search_results.get("results", [])
-        for place in places:
-            place_id = place.get("fsq_id")
-            if not place_id:
-                continue
-            
-            time.sleep(0.2)
-            tips_data = self.get_place_tips(place_id)
-            formatted_place = self._format_place_data(place, tips_data)
-            all_vets.append(formatted_place)
-            
-            if len(all_vets) >= max_results:
-                break
-                
-        return all_vets
+        places = [place for place in search_results.get("results", []) if place.get("fsq_id")][:max_results]
+        tips_by_place = {}
+        if include_tips:
+            if deadline is not None and deadline.expired():
+                deadline.mark_cut("foursquare_tips", f"tips skipped for {len(places)} places")
+            else:
+                tips_by_place = self.get_tips_for_places((place["fsq_id"] for place in places),
+                                                         deadline=deadline)
+                missed = [place_id for place_id, tips_data in tips_by_place.items()
+                          if isinstance(tips_data, dict) and tips_data.get("deadline_exceeded")]
+                if missed and deadline is not None:
+                    deadline.mark_cut("foursquare_tips", f"tips missing for {len(missed)} places")
+        
+        return [self._format_place_data(place, tips_by_place.get(place["fsq_id"], {})) for place in places]
+    
+    def format_tips(self, tips_data: Dict, rating: float = 0) -> List[Dict]:
+        reviews = []
+        tips = tips_data if isinstance(tips_data, list) else tips_data.get("results", [])
+        for tip in tips:
+            reviews.append({
+                "id": tip.get("id", ""),
+                "rating": rating,
+                "text": tip.get("text", ""),
+                "time_created": tip.get("created_at", ""),
+                "user": {
+                    "name": tip.get("user", {}).get("name", "Anonymous")
+                }
+            })
+        return reviews
     
     def _format_place_data(self, place: Dict, tips_data: Dict) -> Dict:
         
@@ -169,23 +280,14 @@ class FoursquareAPI:
             if prefix and suffix:
                 photo_url = f"{prefix}original{suffix}"
         
-        reviews = []
-        for tip in tips_data.get("results", []):
-            reviews.append({
-                "id": tip.get("id", ""),
-                "rating": place.get("rating", 0) / 2,  
-                "text": tip.get("text", ""),
-                "time_created": tip.get("created_at", ""),
-                "user": {
-                    "name": tip.get("user", {}).get("name", "Anonymous")
-                }
-            })
+        reviews = self.format_tips(tips_data, place.get("rating", 0) / 2)
         
         price_tier = place.get("price", 0)
         price = "$" * price_tier if price_tier else "$$"
         
         return {
             "id": place.get("fsq_id", ""),
+            "foursquare_id": place.get("fsq_id", ""),
             "name": place.get("name", ""),
             "rating": place.get("rating", 0) / 2 if place.get("rating") else 0,  
             "review_count": place.get("stats", {}).get("total_tips", 0),
@@ -3,9 +3,13 @@ import os
 import requests
 import logging
 import time
-from typing import Dict, List, Optional, Union
-from utils.api_utils import make_api_request
+from typing import Dict, List, Optional, Tuple, Union
+from utils.api_utils import APIRequestError, get_session, make_api_request
+from utils.deadline import Deadline
+from utils.hedging import HedgingPolicy
+from utils.rate_limit import RateLimiter
 from utils.geocoding import geocode_location as geocode
+from .search_context import SearchContext
 
 class HereAPI:
     
@@ -14,12 +18,16 @@ class HereAPI:
     LOOKUP_ENDPOINT = "/lookup"
     GEOCODE_ENDPOINT = "https://geocode.search.hereapi.com/v1/geocode"
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None,
+                 rate_limit_wait: float = 1.0, hedging: Optional[HedgingPolicy] = None):
         self.api_key = api_key or os.getenv("HERE_API_KEY")
         if not self.api_key:
             raise ValueError("HERE API key is required. Set HERE_API_KEY environment variable or pass as parameter.")
         
         self.logger = logging.getLogger(__name__)
+        self.rate_limiter = rate_limiter
+        self.rate_limit_wait = rate_limit_wait
+        self.hedging = hedging
     
     def geocode_location(self, location: str) -> Dict:
         params = {
@@ -29,7 +37,7 @@ class HereAPI:
         
         try:
             self.logger.info(f"Geocoding location: {location}")
-            response = requests.get(self.GEOCODE_ENDPOINT, params=params, timeout=10)
+            response = get_session(self.GEOCODE_ENDPOINT).get(self.GEOCODE_ENDPOINT, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -47,10 +55,12 @@ class HereAPI:
             self.logger.error(f"Error geocoding location: {e}")
             return None
 
-    def search_vets(self, location: str, radius: int = 10000, limit: int = 20) -> Dict:        
-        position = None
+    def search_vets(self, location: str, radius: int = 10000, limit: int = 20,
+                    coordinates: Optional[Tuple[float, float]] = None,
+                    deadline: Optional[Deadline] = None) -> Dict:        
+        position = coordinates
         
-        if "," in location and len(location.split(",")) == 2:
+        if position is None and "," in location and len(location.split(",")) == 2:
             try:
                 lat, lng = map(float, location.split(","))
                 position = (lat, lng)
@@ -61,7 +71,7 @@ class HereAPI:
                 position = None
         
         if position is None:
-            lat, lng = geocode(location)
+            lat, lng = geocode(location, deadline=deadline)
             if lat is not None and lng is not None:
                 position = (lat, lng)
                 self.logger.info(f"Geocoded {location} to coordinates: {lat}, {lng}")
@@ -84,12 +94,17 @@ class HereAPI:
             url=f"{self.BASE_URL}{self.PLACES_ENDPOINT}",
             method="get",
             params=params,
-            logger=self.logger
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait,
+            hedging=self.hedging,
+            deadline=deadline
         )
         
         if "error" in result:
             self.logger.error(f"Error searching HERE API: {result['error']}")
-            return {"error": result['error']}
+            return {"error": result["error"], "request_failed": True,
+                    "budget_exhausted": result.get("budget_exhausted", False)}
         
         return result
 
@@ -104,7 +119,10 @@ class HereAPI:
             url=f"{self.BASE_URL}{self.LOOKUP_ENDPOINT}",
             method="get",
             params=params,
-            logger=self.logger
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait,
+            hedging=self.hedging
         )
         
         if "error" in result:
@@ -113,12 +131,21 @@ class HereAPI:
         
         return result
     
-    def get_all_vets_with_details(self, location: str, max_results: int = 20) -> List[Dict]:
+    def get_all_vets_with_details(self, location: str, max_results: int = 20,
+                                  context: Optional[SearchContext] = None,
+                                  deadline: Optional[Deadline] = None) -> List[Dict]:
         all_vets = []
-        search_results = self.search_vets(location=location, limit=max_results)
+        if context is not None and context.geocode_failed:
+            self.logger.warning(f"Skipping HERE search, {location} could not be geocoded")
+            return []
+        coordinates = context.coordinates if context is not None and context.has_coordinates else None
+        search_results = self.search_vets(location=location, limit=max_results, coordinates=coordinates,
+                                          deadline=deadline)
         
         if "error" in search_results:
             self.logger.error(f"Error in HERE search: {search_results['error']}")
+            if search_results.get("request_failed"):
+                raise APIRequestError(search_results["error"], search_results.get("budget_exhausted", False))
             return []
         
         items = search_results.get("items", [])
@@ -0,0 +1,162 @@
+import re
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.spatial import geohash_encode, haversine_miles
+from .search_context import SearchContext
+
+
+CacheKey = Tuple[str, str, float, int]
+Loader = Callable[[], Tuple[List[Dict], bool]]
+
+DISTANCE_REASON = re.compile(r"^[\d.]+ miles from search location$")
+
+
+@dataclass
+class _CacheEntry:
+    results: List[Dict]
+    fresh_until: float
+    stale_until: float
+
+
+class ProviderCache:
+
+    COUNTERS = ("hits", "misses", "stale", "refreshes", "refresh_failures", "partial")
+
+    def __init__(self, ttl_seconds: float = 900.0, stale_seconds: float = 3600.0,
+                 max_entries: int = 1024, geohash_precision: int = 6,
+                 executor: Optional[Executor] = None):
+        self.logger = logging.getLogger(__name__)
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.geohash_precision = geohash_precision
+        self.executor = executor
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._refreshing = set()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def tile_for(self, context: SearchContext) -> str:
+        if context.has_coordinates:
+            return geohash_encode(context.latitude, context.longitude, self.geohash_precision)
+        return f"q:{' '.join(context.query.lower().split())}"
+
+    def key_for(self, source: str, context: SearchContext, max_results: int) -> CacheKey:
+        return source, self.tile_for(context), float(context.radius_miles), max_results
+
+    def fetch(self, source: str, context: SearchContext, max_results: int,
+              loader: Loader, refresh: Optional[Loader] = None) -> List[Dict]:
+        key = self.key_for(source, context, max_results)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now >= entry.stale_until:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now < entry.fresh_until:
+                    self._count(source, "hits")
+                    return self._localize(copy.deepcopy(entry.results), context)
+                self._count(source, "stale")
+                results = copy.deepcopy(entry.results)
+                schedule_refresh = key not in self._refreshing and self.executor is not None
+                if schedule_refresh:
+                    self._refreshing.add(key)
+            else:
+                self._count(source, "misses")
+                results = None
+                schedule_refresh = False
+
+        if results is not None:
+            if schedule_refresh:
+                self.logger.info(f"Serving stale {source} results for tile {key[1]}, refreshing in background")
+                try:
+                    self.executor.submit(self._refresh, key, refresh or loader)
+                except RuntimeError as e:
+                    self.logger.warning(f"Could not schedule {source} cache refresh: {e}")
+                    with self._lock:
+                        self._refreshing.discard(key)
+            return self._localize(results, context)
+
+        results, complete = loader()
+        self._store_if_complete(key, results, complete)
+        return copy.deepcopy(results)
+
+    def _refresh(self, key: CacheKey, loader: Loader):
+        source = key[0]
+        try:
+            results, complete = loader()
+            self._store_if_complete(key, results, complete)
+            with self._lock:
+                self._count(source, "refreshes")
+        except Exception as e:
+            self.logger.warning(f"Background refresh of {source} for tile {key[1]} failed: {e}")
+            with self._lock:
+                self._count(source, "refresh_failures")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _localize(self, results: List[Dict], context: SearchContext) -> List[Dict]:
+        if not context.has_coordinates:
+            return results
+        for item in results:
+            coordinates = item.get("coordinates") or {}
+            if "distance" not in item or coordinates.get("latitude") is None or coordinates.get("longitude") is None:
+                continue
+            distance = round(haversine_miles(context.latitude, context.longitude,
+                                             coordinates["latitude"], coordinates["longitude"]), 1)
+            item["distance"] = distance
+            reasons = item.get("recommendation_reasons")
+            if reasons:
+                item["recommendation_reasons"] = [f"{distance:.1f} miles from search location"
+                                                  if DISTANCE_REASON.match(reason) else reason
+                                                  for reason in reasons]
+        return results
+
+    def _store_if_complete(self, key: CacheKey, results: List[Dict], complete: bool):
+        if complete:
+            self._store(key, results)
+            return
+        self.logger.info(f"Not caching {key[0]} results for tile {key[1]}, the fetch was cut short")
+        with self._lock:
+            self._count(key[0], "partial")
+
+    def _store(self, key: CacheKey, results: List[Dict]):
+        now = time.monotonic()
+        entry = _CacheEntry(results=copy.deepcopy(results or []),
+                            fresh_until=now + self.ttl_seconds,
+                            stale_until=now + self.ttl_seconds + self.stale_seconds)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, source: str, counter: str):
+        counters = self._counters.setdefault(source, {name: 0 for name in self.COUNTERS})
+        counters[counter] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            stats = {source: dict(counters) for source, counters in self._counters.items()}
+            for key in self._entries:
+                source_stats = stats.setdefault(key[0], {name: 0 for name in self.COUNTERS})
+                source_stats["entries"] = source_stats.get("entries", 0) + 1
+            for source_stats in stats.values():
+                source_stats.setdefault("entries", 0)
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
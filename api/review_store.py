@@ -0,0 +1,155 @@
+import os
+import glob
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ReviewStore:
+
+    SQLITE_MAX_VARIABLES = 500
+    LEGACY_FILE_PATTERN = "reviews_*.json"
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ensure_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_schema(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS business_reviews (
+                    business_id TEXT PRIMARY KEY,
+                    reviews TEXT NOT NULL,
+                    review_limit INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get(self, business_id: str, limit: int = 20) -> Optional[List[Dict]]:
+        return self.get_many([business_id], limit=limit).get(business_id)
+
+    def get_many(self, business_ids: Iterable[str], limit: int = 20) -> Dict[str, List[Dict]]:
+        business_ids = list(dict.fromkeys(business_ids))
+        found: Dict[str, List[Dict]] = {}
+        conn = self._connection()
+
+        for i in range(0, len(business_ids), self.SQLITE_MAX_VARIABLES):
+            chunk = business_ids[i:i + self.SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT business_id, reviews, review_limit FROM business_reviews "
+                f"WHERE business_id IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for business_id, reviews_json, review_limit in rows:
+                try:
+                    reviews = json.loads(reviews_json)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Invalid stored reviews for {business_id}")
+                    continue
+                if limit > review_limit and len(reviews) >= review_limit:
+                    continue
+                found[business_id] = reviews[:limit]
+
+        return found
+
+    def put(self, business_id: str, reviews: List[Dict], limit: int = 20):
+        self.put_many([(business_id, reviews)], limit=limit)
+
+    def put_many(self, items: Iterable[Tuple[str, List[Dict]]], limit: int = 20):
+        now = time.time()
+        rows = [(business_id, json.dumps(reviews), limit, now) for business_id, reviews in items]
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO business_reviews (business_id, reviews, review_limit, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def delete_many(self, business_ids: Iterable[str]):
+        business_ids = list(business_ids)
+        conn = self._connection()
+        with conn:
+            for i in range(0, len(business_ids), self.SQLITE_MAX_VARIABLES):
+                chunk = business_ids[i:i + self.SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                conn.execute(f"DELETE FROM business_reviews WHERE business_id IN ({placeholders})", chunk)
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM business_reviews")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM business_reviews").fetchone()[0]
+
+    def migrate_legacy_files(self, directory: str, remove: bool = True, batch_size: int = 1000) -> int:
+        legacy_files = glob.glob(os.path.join(directory, self.LEGACY_FILE_PATTERN))
+        if not legacy_files:
+            return 0
+
+        self.logger.info(f"Migrating {len(legacy_files)} per-business review files into {self.db_path}")
+        migrated = 0
+        for i in range(0, len(legacy_files), batch_size):
+            batch = []
+            batch_files = []
+            for path in legacy_files[i:i + batch_size]:
+                business_id = os.path.basename(path)[len("reviews_"):-len(".json")]
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        reviews = json.load(f)
+                except Exception as e:
+                    self.logger.warning(f"Skipping unreadable review cache {path}: {e}")
+                    continue
+                if isinstance(reviews, list):
+                    batch.append((business_id, reviews, len(reviews)))
+                    batch_files.append(path)
+
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO business_reviews (business_id, reviews, review_limit, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [(business_id, json.dumps(reviews), review_limit, time.time())
+                     for business_id, reviews, review_limit in batch]
+                )
+            migrated += len(batch)
+
+            if remove:
+                for path in batch_files:
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        self.logger.warning(f"Could not remove migrated review cache {path}: {e}")
+
+        self.logger.info(f"Migrated {migrated} per-business review files")
+        return migrated
@@ -0,0 +1,62 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from utils.deadline import Deadline
+from utils.geocoding import geocode_location
+
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_coordinates(location: str) -> Optional[Tuple[float, float]]:
+    parts = location.split(',')
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lng = float(parts[0].strip()), float(parts[1].strip())
+    except ValueError:
+        return None
+    if -90 <= lat <= 90 and -180 <= lng <= 180:
+        return lat, lng
+    return None
+
+
+@dataclass
+class SearchContext:
+    query: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius_miles: float = 10.0
+    geocode_failed: bool = False
+
+    @classmethod
+    def resolve(cls, location: str, radius_miles: float = 10.0,
+                coordinates: Optional[Tuple[Optional[float], Optional[float]]] = None,
+                deadline: Optional[Deadline] = None) -> 'SearchContext':
+        location = (location or '').strip()
+        parsed = _parse_coordinates(location)
+        if coordinates is None or None in coordinates:
+            coordinates = parsed
+        if coordinates is None and location:
+            try:
+                coordinates = geocode_location(location, deadline=deadline)
+            except Exception as e:
+                logger.warning(f"Could not geocode location: {e}")
+        lat, lng = coordinates if coordinates else (None, None)
+
+        context = cls(query=location, latitude=lat, longitude=lng, radius_miles=radius_miles,
+                      geocode_failed=bool(location) and (lat is None or lng is None))
+        logger.info(f"Resolved search context for {location}: {context.coordinate_string or 'not geocoded'}")
+        return context
+
+    @property
+    def has_coordinates(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+    @property
+    def coordinates(self) -> Tuple[Optional[float], Optional[float]]:
+        return self.latitude, self.longitude
+
+    @property
+    def coordinate_string(self) -> Optional[str]:
+        return f"{self.latitude},{self.longitude}" if self.has_coordinates else None
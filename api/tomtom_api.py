@@ -3,10 +3,14 @@ import os
 import requests
 import logging
 import time
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 import random
-from utils.api_utils import make_api_request
+from utils.api_utils import APIRequestError, make_api_request
+from utils.deadline import Deadline
+from utils.hedging import HedgingPolicy
+from utils.rate_limit import RateLimiter
 from utils.geocoding import geocode_location
+from .search_context import SearchContext
 
 class TomTomAPI:
     
@@ -14,19 +18,26 @@ class TomTomAPI:
     SEARCH_ENDPOINT = "/search/2/poiSearch/veterinarian.json"
     GEOCODE_ENDPOINT = "/search/2/geocode/{}.json"
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None,
+                 rate_limit_wait: float = 1.0, hedging: Optional[HedgingPolicy] = None):
         self.api_key = api_key or os.getenv("TOMTOM_API_KEY")
         if not self.api_key:
             raise ValueError("TomTom API key is required. Set TOMTOM_API_KEY environment variable or pass as parameter.")
         
         self.logger = logging.getLogger(__name__)
+        self.rate_limiter = rate_limiter
+        self.rate_limit_wait = rate_limit_wait
+        self.hedging = hedging
     
     def geocode_location(self, location: str) -> Dict:
         result = make_api_request(
             url=f"{self.BASE_URL}{self.GEOCODE_ENDPOINT.format(location)}",
             method="get",
             params={"key": self.api_key},
-            logger=self.logger
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait,
+            hedging=self.hedging
         )
         
         if "error" in result:
@@ -35,18 +46,21 @@ class TomTomAPI:
         
         return result
 
-    def search_vets(self, location: str, radius: int = 10000, limit: int = 50) -> Dict:        
-        from utils.geocoding import geocode_location
+    def search_vets(self, location: str, radius: int = 10000, limit: int = 50,
+                    coordinates: Optional[Tuple[float, float]] = None,
+                    deadline: Optional[Deadline] = None) -> Dict:        
         lat, lng = None, None
         
-        if "," in location and len(location.split(",")) == 2:
+        if coordinates is not None:
+            lat, lng = coordinates
+        elif "," in location and len(location.split(",")) == 2:
             try:
                 lat, lng = map(float, location.split(","))
                 self.logger.info(f"Using provided coordinates for TomTom: {lat}, {lng}")
             except ValueError:   
-                lat, lng = geocode_location(location)
+                lat, lng = geocode_location(location, deadline=deadline)
         else:    
-            lat, lng = geocode_location(location)
+            lat, lng = geocode_location(location, deadline=deadline)
             
         if lat is None or lng is None:
             self.logger.error(f"Failed to geocode location: {location}")
@@ -66,21 +80,35 @@ class TomTomAPI:
             url=f"{self.BASE_URL}{self.SEARCH_ENDPOINT}",
             method="get",
             params=params,
-            logger=self.logger
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            rate_limit_wait=self.rate_limit_wait,
+            hedging=self.hedging,
+            deadline=deadline
         )
         
         if "error" in result:
             self.logger.error(f"Error searching TomTom API: {result['error']}")
-            return {"error": result["error"]}
+            return {"error": result["error"], "request_failed": True,
+                    "budget_exhausted": result.get("budget_exhausted", False)}
         
         return result
     
-    def get_all_vets_with_details(self, location: str, max_results: int = 20) -> List[Dict]:
+    def get_all_vets_with_details(self, location: str, max_results: int = 20,
+                                  context: Optional[SearchContext] = None,
+                                  deadline: Optional[Deadline] = None) -> List[Dict]:
         all_vets = []
-        search_results = self.search_vets(location=location, limit=max_results)
+        if context is not None and context.geocode_failed:
+            self.logger.warning(f"Skipping TomTom search, {location} could not be geocoded")
+            return []
+        coordinates = context.coordinates if context is not None and context.has_coordinates else None
+        search_results = self.search_vets(location=location, limit=max_results, coordinates=coordinates,
+                                          deadline=deadline)
         
         if "error" in search_results:
             self.logger.error(f"Error in TomTom search: {search_results['error']}")
+            if search_results.get("request_failed"):
+                raise APIRequestError(search_results["error"], search_results.get("budget_exhausted", False))
             return []
         
         pois = search_results.get("results", [])
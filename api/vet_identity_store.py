@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+SourceKey = Tuple[str, str]
+
+
+def canonical_id_for(key: SourceKey) -> str:
+    return "vet_" + hashlib.sha1(f"{key[0]}:{key[1]}".encode('utf-8')).hexdigest()[:16]
+
+
+class VetIdentityStore:
+
+    SQLITE_MAX_VARIABLES = 999
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._ensure_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_schema(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS source_identities (
+                    source TEXT NOT NULL,
+                    source_id TEXT NOT NULL,
+                    canonical_id TEXT NOT NULL,
+                    PRIMARY KEY (source, source_id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_source_identities_canonical "
+                         "ON source_identities (canonical_id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS canonical_vets (
+                    canonical_id TEXT PRIMARY KEY,
+                    record TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _chunks(self, items: List, params_per_item: int = 1) -> Iterable[List]:
+        size = self.SQLITE_MAX_VARIABLES // params_per_item
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    def lookup_many(self, keys: Iterable[SourceKey]) -> Dict[SourceKey, str]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[SourceKey, str] = {}
+        conn = self._connection()
+        for chunk in self._chunks(keys, params_per_item=2):
+            clause = " OR ".join("(source = ? AND source_id = ?)" for _ in chunk)
+            params = [value for key in chunk for value in key]
+            rows = conn.execute(
+                f"SELECT source, source_id, canonical_id FROM source_identities WHERE {clause}",
+                params
+            ).fetchall()
+            for source, source_id, canonical_id in rows:
+                found[(source, source_id)] = canonical_id
+        return found
+
+    def get_records(self, canonical_ids: Iterable[str]) -> Dict[str, Dict]:
+        canonical_ids = list(dict.fromkeys(canonical_ids))
+        records: Dict[str, Dict] = {}
+        conn = self._connection()
+        for chunk in self._chunks(canonical_ids):
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT canonical_id, record FROM canonical_vets WHERE canonical_id IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for canonical_id, record_json in rows:
+                try:
+                    records[canonical_id] = json.loads(record_json)
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Invalid stored record for {canonical_id}")
+        return records
+
+    def save(self, assignments: Dict[SourceKey, str], records: Dict[str, Dict],
+             merged_ids: Optional[Dict[str, str]] = None):
+        now = time.time()
+        merged_ids = merged_ids or {}
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                for old_id, new_id in merged_ids.items():
+                    conn.execute("UPDATE source_identities SET canonical_id = ? WHERE canonical_id = ?",
+                                 (new_id, old_id))
+                    conn.execute("DELETE FROM canonical_vets WHERE canonical_id = ?", (old_id,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO source_identities (source, source_id, canonical_id) VALUES (?, ?, ?)",
+                    [(source, source_id, canonical_id) for (source, source_id), canonical_id in assignments.items()]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO canonical_vets (canonical_id, record, updated_at) VALUES (?, ?, ?)",
+                    [(canonical_id, json.dumps(record, default=str), now) for canonical_id, record in records.items()]
+                )
+
+    def clear(self):
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM source_identities")
+                conn.execute("DELETE FROM canonical_vets")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM canonical_vets").fetchone()[0]
@@ -0,0 +1,138 @@
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+
+PET_TYPES = ['dog', 'cat', 'bird', 'exotic']
+SPECIALTIES = ['emergency', 'surgery', 'dental', 'dermatology', 'oncology',
+               'cardiology', 'neurology', 'orthopedic', 'behavior', 'holistic']
+RECENCY_HALF_LIFE_DAYS = 365.0
+RECENCY_EPOCH = datetime(2000, 1, 1)
+
+SUMMARY_NUMERIC_COLUMNS = {
+    'review_stars_1': 'int32',
+    'review_stars_2': 'int32',
+    'review_stars_3': 'int32',
+    'review_stars_4': 'int32',
+    'review_stars_5': 'int32',
+    'indexed_review_count': 'int32',
+    'weighted_rating': 'float32',
+    'sentiment_mean': 'float32',
+    **{f'pet_{pet_type}': 'int32' for pet_type in PET_TYPES},
+    **{f'specialty_{specialty}': 'int32' for specialty in SPECIALTIES}
+}
+SUMMARY_STRING_COLUMNS = ['last_review_date']
+
+
+def _recency_weight(date: str) -> float:
+    try:
+        review_date = datetime.strptime(date[:10], '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return 1.0
+    age_from_epoch = (review_date - RECENCY_EPOCH).days
+    return 2.0 ** (age_from_epoch / RECENCY_HALF_LIFE_DAYS)
+
+
+def _new_state() -> Dict:
+    return {
+        'review_count': 0,
+        'star_counts': [0, 0, 0, 0, 0],
+        'last_review_date': '',
+        'weighted_stars': 0.0,
+        'weight_total': 0.0,
+        'sentiment_total': 0.0,
+        'sentiment_count': 0,
+        'pet_hits': {},
+        'specialty_hits': {}
+    }
+
+
+class ReviewAggregator:
+
+    def __init__(self, sentiment_analyzer=None):
+        self.logger = logging.getLogger(__name__)
+        self.sentiment_analyzer = sentiment_analyzer
+        self.states: Dict[str, Dict] = {}
+
+    def add(self, business_id: str, stars: float, date: str, text: Optional[str] = None):
+        state = self.states.get(business_id)
+        if state is None:
+            state = _new_state()
+            self.states[business_id] = state
+
+        state['review_count'] += 1
+        if stars:
+            state['star_counts'][min(5, max(1, int(round(float(stars))))) - 1] += 1
+            weight = _recency_weight(date)
+            state['weighted_stars'] += weight * float(stars)
+            state['weight_total'] += weight
+        if date > state['last_review_date']:
+            state['last_review_date'] = date
+
+        if text and self.sentiment_analyzer is not None:
+            state['sentiment_total'] += self.sentiment_analyzer.analyze_text(text)['compound']
+            state['sentiment_count'] += 1
+            for pet_type in self.sentiment_analyzer.extract_pet_keywords(text):
+                state['pet_hits'][pet_type] = state['pet_hits'].get(pet_type, 0) + 1
+            for specialty in self.sentiment_analyzer.extract_specialty_keywords(text):
+                state['specialty_hits'][specialty] = state['specialty_hits'].get(specialty, 0) + 1
+
+    @staticmethod
+    def merge_states(target: Dict[str, Dict], source: Dict[str, Dict]):
+        for business_id, state in source.items():
+            existing = target.get(business_id)
+            if existing is None:
+                target[business_id] = state
+                continue
+            existing['review_count'] += state['review_count']
+            existing['star_counts'] = [a + b for a, b in zip(existing['star_counts'], state['star_counts'])]
+            existing['last_review_date'] = max(existing['last_review_date'], state['last_review_date'])
+            for field in ('weighted_stars', 'weight_total', 'sentiment_total', 'sentiment_count'):
+                existing[field] += state[field]
+            for field in ('pet_hits', 'specialty_hits'):
+                for key, count in state[field].items():
+                    existing[field][key] = existing[field].get(key, 0) + count
+
+    @staticmethod
+    def summarize(state: Optional[Dict]) -> Dict:
+        state = state or _new_state()
+        weighted_rating = state['weighted_stars'] / state['weight_total'] if state['weight_total'] else 0.0
+        sentiment_mean = state['sentiment_total'] / state['sentiment_count'] if state['sentiment_count'] else 0.0
+        summary = {
+            'indexed_review_count': state['review_count'],
+            'weighted_rating': weighted_rating,
+            'sentiment_mean': sentiment_mean,
+            'last_review_date': state['last_review_date']
+        }
+        for star in range(1, 6):
+            summary[f'review_stars_{star}'] = state['star_counts'][star - 1]
+        for pet_type in PET_TYPES:
+            summary[f'pet_{pet_type}'] = state['pet_hits'].get(pet_type, 0)
+        for specialty in SPECIALTIES:
+            summary[f'specialty_{specialty}'] = state['specialty_hits'].get(specialty, 0)
+        return summary
+
+    @classmethod
+    def to_columns(cls, states: Dict[str, Dict], business_ids: Iterable[str]) -> Dict[str, object]:
+        summaries = [cls.summarize(states.get(business_id)) for business_id in business_ids]
+        columns: Dict[str, object] = {}
+        for column, dtype in SUMMARY_NUMERIC_COLUMNS.items():
+            columns[column] = np.array([summary[column] for summary in summaries], dtype=dtype)
+        for column in SUMMARY_STRING_COLUMNS:
+            columns[column] = [summary[column] for summary in summaries]
+        return columns
+
+
+def summary_from_row(values: Dict) -> Dict:
+    return {
+        'review_count_by_star': {str(star): int(values.get(f'review_stars_{star}', 0)) for star in range(1, 6)},
+        'indexed_review_count': int(values.get('indexed_review_count', 0)),
+        'weighted_rating': round(float(values.get('weighted_rating', 0.0)), 2),
+        'sentiment_mean': round(float(values.get('sentiment_mean', 0.0)), 3),
+        'last_review_date': values.get('last_review_date', ''),
+        'pet_keywords': {pet: int(values.get(f'pet_{pet}', 0)) for pet in PET_TYPES
+                         if values.get(f'pet_{pet}', 0)},
+        'specialty_keywords': {spec: int(values.get(f'specialty_{spec}', 0)) for spec in SPECIALTIES
+                               if values.get(f'specialty_{spec}', 0)}
+    }
@@ -0,0 +1,291 @@
+import os
+import json
+import mmap
+import shutil
+import tempfile
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+import numpy as np
+
+
+NUMERIC_COLUMNS = {
+    'latitude': 'float64',
+    'longitude': 'float64',
+    'stars': 'float32',
+    'review_count': 'int32',
+    'is_open': 'int8'
+}
+
+STRING_COLUMNS = [
+    'business_id',
+    'name',
+    'address',
+    'city',
+    'state',
+    'postal_code',
+    'phone',
+    'categories',
+    'price_range'
+]
+
+EXTRA_FIELDS = ['attributes', 'hours']
+
+
+class StringColumn:
+
+    def __init__(self, offsets: np.ndarray, data: Optional[mmap.mmap]):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        start = int(self.offsets[index])
+        end = int(self.offsets[index + 1])
+        if start == end or self.data is None:
+            return ''
+        return self.data[start:end].decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_list(self) -> List[str]:
+        return list(self)
+
+
+class ColumnarVetStore:
+
+    VERSION = 1
+    META_FILE = 'meta.json'
+    EXTRAS_FILE = 'extras.jsonl'
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.meta: Dict = {}
+        self._columns: Dict[str, object] = {}
+        self._mmaps: List[mmap.mmap] = []
+        self._extras_offsets = None
+        self._extras_fd = None
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return os.path.exists(os.path.join(path, cls.META_FILE))
+
+    @classmethod
+    def write(cls, path: str, businesses: Iterable[Dict], include_extras: bool = True,
+              meta: Optional[Dict] = None) -> 'ColumnarVetStore':
+        businesses = list(businesses)
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=f"{os.path.basename(path)}.tmp.", dir=parent)
+
+        for column, dtype in NUMERIC_COLUMNS.items():
+            values = np.array([cls._numeric_value(b, column) for b in businesses], dtype=dtype)
+            np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+
+        for column in STRING_COLUMNS:
+            cls._write_string_column(tmp_path, column, [cls._string_value(b, column) for b in businesses])
+
+        if include_extras:
+            extras_offsets = np.zeros(len(businesses) + 1, dtype='int64')
+            with open(os.path.join(tmp_path, cls.EXTRAS_FILE), 'wb') as f:
+                for i, business in enumerate(businesses):
+                    extras = {field: business.get(field) for field in EXTRA_FIELDS if business.get(field)}
+                    f.write(json.dumps(extras, separators=(',', ':')).encode('utf-8') + b'\n')
+                    extras_offsets[i + 1] = f.tell()
+            np.save(os.path.join(tmp_path, "extras.offsets.npy"), extras_offsets)
+
+        store_meta = dict(meta or {})
+        store_meta.update({
+            'version': cls.VERSION,
+            'rows': len(businesses),
+            'numeric_columns': dict(NUMERIC_COLUMNS),
+            'string_columns': list(STRING_COLUMNS),
+            'has_extras': include_extras
+        })
+        with open(os.path.join(tmp_path, cls.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(store_meta, f)
+
+        old_path = tempfile.mkdtemp(prefix=f"{os.path.basename(path)}.old.", dir=parent)
+        if os.path.exists(path):
+            os.replace(path, os.path.join(old_path, 'store'))
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+        store = cls(path)
+        store.open()
+        return store
+
+    @staticmethod
+    def _write_string_column(path: str, column: str, values: List[str]):
+        encoded = [value.encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype='int64')
+        if encoded:
+            offsets[1:] = np.cumsum([len(value) for value in encoded])
+        np.save(os.path.join(path, f"{column}.offsets.npy"), offsets)
+        with open(os.path.join(path, f"{column}.data"), 'wb') as f:
+            f.write(b''.join(encoded))
+
+    def add_columns(self, numeric: Optional[Dict[str, np.ndarray]] = None,
+                    strings: Optional[Dict[str, List[str]]] = None):
+        numeric = numeric or {}
+        strings = strings or {}
+        rows = len(self)
+        tmp_path = tempfile.mkdtemp(prefix="tmp.", dir=self.path)
+        try:
+            for name, values in numeric.items():
+                if len(values) != rows:
+                    raise ValueError(f"Column {name} has {len(values)} values, expected {rows}")
+                np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(values))
+            for name, values in strings.items():
+                if len(values) != rows:
+                    raise ValueError(f"Column {name} has {len(values)} values, expected {rows}")
+                self._write_string_column(tmp_path, name, [value or '' for value in values])
+            for filename in os.listdir(tmp_path):
+                os.replace(os.path.join(tmp_path, filename), os.path.join(self.path, filename))
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        for name in list(numeric) + list(strings):
+            self._columns.pop(name, None)
+        self.meta['numeric_columns'].update({name: str(np.asarray(values).dtype) for name, values in numeric.items()})
+        self.meta['string_columns'] = self.meta['string_columns'] + [name for name in strings
+                                                                     if name not in self.meta['string_columns']]
+        self._save_meta()
+
+    def update_meta(self, values: Dict):
+        self.meta.update(values)
+        self._save_meta()
+
+    def _save_meta(self):
+        fd, meta_tmp = tempfile.mkstemp(prefix=f"{self.META_FILE}.", suffix=".tmp", dir=self.path)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        os.replace(meta_tmp, os.path.join(self.path, self.META_FILE))
+
+    def has_column(self, name: str) -> bool:
+        return name in self.meta.get('numeric_columns', {}) or name in self.meta.get('string_columns', [])
+
+    def values(self, index: int, columns: Iterable[str]) -> Dict:
+        values = {}
+        for name in columns:
+            if not self.has_column(name):
+                continue
+            value = self.column(name)[index]
+            values[name] = value.item() if hasattr(value, 'item') else value
+        return values
+
+    @staticmethod
+    def _numeric_value(business: Dict, column: str):
+        value = business.get(column)
+        if column == 'is_open':
+            return 1 if value is None else int(bool(value))
+        if value is None or value == '':
+            return np.nan if column in ('latitude', 'longitude') else 0
+        try:
+            return float(value) if NUMERIC_COLUMNS[column].startswith('float') else int(value)
+        except (TypeError, ValueError):
+            return np.nan if column in ('latitude', 'longitude') else 0
+
+    @staticmethod
+    def _string_value(business: Dict, column: str) -> str:
+        if column == 'price_range':
+            attributes = business.get('attributes') or {}
+            value = attributes.get('RestaurantsPriceRange2') if isinstance(attributes, dict) else None
+        elif column == 'categories':
+            value = business.get('categories')
+            if isinstance(value, list):
+                value = ', '.join(str(c) for c in value)
+        else:
+            value = business.get(column)
+        return str(value) if value is not None else ''
+
+    def open(self) -> 'ColumnarVetStore':
+        with open(os.path.join(self.path, self.META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != self.VERSION:
+            raise ValueError(f"Unsupported columnar cache version: {self.meta.get('version')}")
+        if self.meta.get('has_extras') and self._extras_fd is None:
+            self._extras_offsets = np.load(os.path.join(self.path, "extras.offsets.npy"), mmap_mode='r')
+            self._extras_fd = os.open(os.path.join(self.path, self.EXTRAS_FILE), os.O_RDONLY)
+        for name in list(self.meta.get('numeric_columns', {})) + list(self.meta.get('string_columns', [])):
+            self.column(name)
+        return self
+
+    def close(self):
+        self._columns = {}
+        self._extras_offsets = None
+        for mapped in self._mmaps:
+            try:
+                mapped.close()
+            except (BufferError, ValueError):
+                pass
+        self._mmaps = []
+        if self._extras_fd is not None:
+            os.close(self._extras_fd)
+            self._extras_fd = None
+
+    def __del__(self):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.meta.get('rows', 0)
+
+    def column(self, name: str):
+        if name in self._columns:
+            return self._columns[name]
+
+        if name in self.meta.get('numeric_columns', {}):
+            column = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+        elif name in self.meta.get('string_columns', []):
+            offsets = np.load(os.path.join(self.path, f"{name}.offsets.npy"), mmap_mode='r')
+            data = None
+            data_file = os.path.join(self.path, f"{name}.data")
+            if os.path.getsize(data_file) > 0:
+                with open(data_file, 'rb') as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mmaps.append(data)
+            column = StringColumn(offsets, data)
+        else:
+            raise KeyError(f"Unknown column: {name}")
+
+        self._columns[name] = column
+        return column
+
+    def extras(self, index: int) -> Dict:
+        if self._extras_fd is None:
+            return {}
+        start = int(self._extras_offsets[index])
+        line = os.pread(self._extras_fd, int(self._extras_offsets[index + 1]) - start, start)
+        try:
+            return json.loads(line) if line.strip() else {}
+        except json.JSONDecodeError:
+            self.logger.warning(f"Invalid extras record at row {index}")
+            return {}
+
+    def record(self, index: int, with_extras: bool = True) -> Dict:
+        business = {}
+        for name in NUMERIC_COLUMNS:
+            value = self.column(name)[index].item()
+            if isinstance(value, float) and np.isnan(value):
+                value = None
+            business[name] = value
+        business['is_open'] = int(business['is_open'])
+        for name in STRING_COLUMNS:
+            if name == 'price_range':
+                continue
+            business[name] = self.column(name)[index]
+        if with_extras:
+            business.update(self.extras(index))
+        price_range = self.column('price_range')[index]
+        if price_range and not business.get('attributes'):
+            business['attributes'] = {'RestaurantsPriceRange2': price_range}
+        business['source'] = 'yelp_dataset'
+        return business
+
+    def records(self, with_extras: bool = True) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self.record(index, with_extras=with_extras)
@@ -1,14 +1,104 @@
 import os
 import json
+import argparse
 import pandas as pd
+import numpy as np
 import logging
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import gzip
+import time
+import threading
+import tracemalloc
+from dataclasses import dataclass
 from datetime import datetime
+from .review_store import ReviewStore
+from .yelp_aggregates import ReviewAggregator, SUMMARY_NUMERIC_COLUMNS, SUMMARY_STRING_COLUMNS, summary_from_row
+from .yelp_columnar import ColumnarVetStore
+from .yelp_location_index import LocationTextIndex
+from .yelp_review_index import ReviewIndex
+from utils.geocoding import geocode_location
+from utils.spatial import GridIndex
+from utils.block_storage import BLOCK_SUFFIX, is_block_compressed, open_block_compressed
+from utils.fingerprint import APPENDED, CHANGED, UNCHANGED, compare_fingerprint, file_fingerprint, stat_matches
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+VET_KEYWORDS = ['veterinar', 'animal hospital', 'pet clinic', 'animal clinic', 'pet hospital']
+VET_CATEGORIES = ['veterinarians', 'pet services', 'animal hospitals', 'pet health']
+VET_LINE_MARKERS = tuple(VET_KEYWORDS + VET_CATEGORIES)
+
+
+def _may_be_vet_line(line: str) -> bool:
+    line_lower = line.lower()
+    return any(marker in line_lower for marker in VET_LINE_MARKERS)
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.uname().sysname == 'Darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+@dataclass
+class IngestReport:
+    source: str
+    records_read: int = 0
+    records_kept: int = 0
+    elapsed_seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    peak_traced_mb: Optional[float] = None
+    _started_at: float = 0.0
+    _tracing: bool = False
+    
+    def start(self, trace_memory: bool = False):
+        self._tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        self._started_at = time.perf_counter()
+    
+    def finish(self):
+        self.elapsed_seconds = time.perf_counter() - self._started_at
+        if self._tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.peak_traced_mb = peak / (1024 * 1024)
+        self.peak_rss_mb = _peak_rss_mb()
+    
+    @property
+    def records_per_second(self) -> float:
+        return self.records_read / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+    
+    def as_dict(self) -> Dict:
+        return {
+            "source": self.source,
+            "records_read": self.records_read,
+            "records_kept": self.records_kept,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "records_per_second": round(self.records_per_second, 1),
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            "peak_traced_mb": round(self.peak_traced_mb, 1) if self.peak_traced_mb is not None else None
+        }
+    
+    def __str__(self) -> str:
+        text = (f"read {self.records_read} records, kept {self.records_kept} "
+                f"in {self.elapsed_seconds:.2f}s ({self.records_per_second:.0f} records/s)")
+        if self.peak_traced_mb is not None:
+            text += f", peak traced memory {self.peak_traced_mb:.1f} MB"
+        if self.peak_rss_mb is not None:
+            text += f", peak RSS {self.peak_rss_mb:.1f} MB"
+        return text
 
 class YelpDatasetProcessor:
     
-    def __init__(self, dataset_path: Optional[str] = None):
+    def __init__(self, dataset_path: Optional[str] = None, ingest_workers: Optional[int] = None,
+                 analyze_review_text: Optional[bool] = None):
         self.logger = logging.getLogger(__name__)
         self.dataset_path = dataset_path or os.getenv("YELP_DATASET_PATH")
         
@@ -40,7 +130,8 @@ class YelpDatasetProcessor:
             alt_paths = [
                 os.path.join(self.dataset_path, "business.json"),
                 os.path.join(self.dataset_path, "yelp_business.json"),
-                os.path.join(self.dataset_path, "raw", "yelp_academic_dataset_business.json")
+                os.path.join(self.dataset_path, "raw", "yelp_academic_dataset_business.json"),
+                self.business_file + BLOCK_SUFFIX
             ]
             for path in alt_paths:
                 if os.path.exists(path):
@@ -53,7 +144,8 @@ class YelpDatasetProcessor:
             alt_paths = [
                 os.path.join(self.dataset_path, "review.json"),
                 os.path.join(self.dataset_path, "yelp_review.json"),
-                os.path.join(self.dataset_path, "raw", "yelp_academic_dataset_review.json")
+                os.path.join(self.dataset_path, "raw", "yelp_academic_dataset_review.json"),
+                self.review_file + BLOCK_SUFFIX
             ]
             for path in alt_paths:
                 if os.path.exists(path):
@@ -73,226 +165,487 @@ class YelpDatasetProcessor:
         self.processed_data_path = os.path.join(os.path.dirname(self.dataset_path), "processed")
         os.makedirs(self.processed_data_path, exist_ok=True)
         self.vet_cache_file = os.path.join(self.processed_data_path, "vet_businesses.json")
+        self.vet_columns_path = os.path.join(self.processed_data_path, "vet_columns")
+        self.vet_store = None
+        self.spatial_index = None
+        self.location_index = None
         self.reviews_cache_file = os.path.join(self.processed_data_path, "vet_reviews.json")
+        self.review_index_file = os.path.join(self.processed_data_path, "vet_review_index.json")
+        self.review_index = None
+        self.review_store_file = os.path.join(self.processed_data_path, "vet_reviews.sqlite")
+        self.review_store = ReviewStore(self.review_store_file)
+        self.review_store.migrate_legacy_files(self.processed_data_path)
+        self.last_ingest_report = None
+        self._missing_summaries_logged = False
+        self._missing_review_index_logged = False
+        self._review_index_lock = threading.Lock()
+        self._review_index_check = None
+        self._build_lock = threading.RLock()
+        if ingest_workers is None:
+            ingest_workers = int(os.getenv("YELP_INGEST_WORKERS", "1"))
+        if analyze_review_text is None:
+            analyze_review_text = os.getenv("YELP_REVIEW_SENTIMENT", "True").lower() in ('true', '1', 't')
+        self.ingest_workers = max(1, ingest_workers)
+        self.analyze_review_text = analyze_review_text
     
     def _read_json_file(self, file_path: str, limit: Optional[int] = None) -> List[Dict]:
-        results = []
+        return list(self._iter_json_file(file_path, limit=limit))
+    
+    def _iter_json_file(self, file_path: str, limit: Optional[int] = None,
+                        line_filter: Optional[Callable[[str], bool]] = None,
+                        report: Optional['IngestReport'] = None,
+                        start: int = 0) -> Iterator[Dict]:
         try:
             is_gzipped = file_path.endswith('.gz')
             if is_gzipped:
                 open_func = gzip.open
                 mode = 'rt'  
+            elif is_block_compressed(file_path):
+                open_func = open_block_compressed
+                mode = 'rt'
             else:
                 open_func = open
                 mode = 'r'
             
             with open_func(file_path, mode, encoding='utf-8') as f:
+                if start:
+                    f.seek(start)
                 count = 0
                 for line in f:
-                    if line.strip():
-                        try:
-                            data = json.loads(line.strip())
-                            results.append(data)
-                            count += 1
-                            if limit and count >= limit:
-                                break
-                        except json.JSONDecodeError as e:
-                            self.logger.warning(f"Error decoding JSON line in {file_path}: {e}")
-                            continue
+                    if report is not None:
+                        report.records_read += 1
+                    if not line.strip():
+                        continue
+                    if line_filter is not None and not line_filter(line):
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        self.logger.warning(f"Error decoding JSON line in {file_path}: {e}")
+                        continue
+                    count += 1
+                    yield data
+                    if limit and count >= limit:
+                        break
             
             self.logger.info(f"Read {count} records from {file_path}")
-            return results
         except Exception as e:
             self.logger.error(f"Error reading file {file_path}: {e}")
-            return []
     
-    def extract_vet_businesses(self, force_refresh: bool = False) -> List[Dict]:
-        if os.path.exists(self.vet_cache_file) and not force_refresh:
+    def _is_vet_business(self, business: Dict) -> bool:
+        categories = business.get('categories', '')
+        if not categories:
+            return False
+                
+        if isinstance(categories, str):
+            categories = [cat.strip() for cat in categories.split(',')]
+        
+        category_names = [c.lower() for c in categories]
+        if any(vc in category_names for vc in VET_CATEGORIES):
+            return True
+            
+        name = (business.get('name') or '').lower()
+        return any(kw in name for kw in VET_KEYWORDS)
+    
+    def _filter_vet_businesses(self, businesses: Iterable[Dict]) -> Iterator[Dict]:
+        for business in businesses:
+            if self._is_vet_business(business):
+                business['source'] = 'yelp_dataset'
+                yield business
+    
+    def load_vet_store(self, force_refresh: bool = False, trace_memory: bool = False) -> ColumnarVetStore:
+        if (self.vet_store is not None and not force_refresh and
+                stat_matches(self.vet_store.meta.get('source_fingerprint'), self.business_file)):
+            return self.vet_store
+        
+        with self._build_lock:
+            if (self.vet_store is not None and not force_refresh and
+                    stat_matches(self.vet_store.meta.get('source_fingerprint'), self.business_file)):
+                return self.vet_store
+            vet_store = self._open_vet_store(force_refresh=force_refresh, trace_memory=trace_memory)
+            self._build_location_indexes(vet_store)
+            return vet_store
+    
+    def _build_location_indexes(self, vet_store: ColumnarVetStore):
+        self.spatial_index = GridIndex(vet_store.column('latitude'), vet_store.column('longitude'))
+        self.logger.info(f"Built spatial index over {len(self.spatial_index)} vet locations")
+        self.location_index = LocationTextIndex.build(
+            vet_store.column('city'),
+            vet_store.column('state'),
+            vet_store.column('postal_code'),
+            vet_store.column('address')
+        )
+        self.logger.info(f"Built location text index over {len(self.location_index.cities)} cities")
+    
+    def _open_vet_store(self, force_refresh: bool = False, trace_memory: bool = False) -> ColumnarVetStore:
+        if not force_refresh and ColumnarVetStore.exists(self.vet_columns_path):
+            try:
+                vet_store = ColumnarVetStore(self.vet_columns_path).open()
+                status = self._vet_store_status(vet_store)
+                if status == UNCHANGED:
+                    self.vet_store = vet_store
+                    self.logger.info(f"Loaded {len(self.vet_store)} vet businesses from columnar cache")
+                    return self.vet_store
+                if status == APPENDED:
+                    return self._append_vet_businesses(vet_store, trace_memory=trace_memory)
+                self.logger.info(f"Business file {self.business_file} changed, rebuilding vet cache")
+                vet_store.close()
+            except Exception as e:
+                self.logger.error(f"Error loading columnar vet cache: {e}")
+        
+        if not force_refresh and os.path.exists(self.vet_cache_file):
             try:
                 with open(self.vet_cache_file, 'r', encoding='utf-8') as f:
-                    self.vet_businesses = json.load(f)
-                self.logger.info(f"Loaded {len(self.vet_businesses)} vet businesses from cache")
-                return self.vet_businesses
+                    legacy_businesses = json.load(f)
+                self.logger.info(f"Migrating {len(legacy_businesses)} vet businesses from {self.vet_cache_file}")
+                self.vet_store = ColumnarVetStore.write(
+                    self.vet_columns_path, legacy_businesses,
+                    meta={'source_fingerprint': file_fingerprint(self.business_file)})
+                return self.vet_store
             except Exception as e:
-                self.logger.error(f"Error loading cached vet businesses: {e}")
+                self.logger.error(f"Error migrating cached vet businesses: {e}")
         
         self.logger.info(f"Processing business file: {self.business_file}")
-        all_businesses = self._read_json_file(self.business_file)
-        vet_keywords = ['veterinar', 'animal hospital', 'pet clinic', 'animal clinic', 'pet hospital']
-        vet_categories = ['Veterinarians', 'Pet Services', 'Animal Hospitals', 'Pet Health']
-        vet_businesses = []
-        
-        for business in all_businesses:
-            categories = business.get('categories', '')
-            if not categories:
-                continue
-                    
-            if isinstance(categories, str):
-                categories = [cat.strip() for cat in categories.split(',')]
-            
-            is_vet = False
-            if any(vc.lower() in [c.lower() for c in categories] for vc in vet_categories):
-                is_vet = True
-                
-            if not is_vet:
-                name = business.get('name', '').lower()
-                if any(kw in name for kw in vet_keywords):
-                    is_vet = True
-            
-            if is_vet:
-                business['source'] = 'yelp_dataset'
-                vet_businesses.append(business)
+        source_fingerprint = file_fingerprint(self.business_file)
+        report = IngestReport(source=self.business_file)
+        report.start(trace_memory=trace_memory)
+        records = self._iter_json_file(self.business_file, line_filter=_may_be_vet_line, report=report)
+        vet_businesses = list(self._filter_vet_businesses(records))
+        report.records_kept = len(vet_businesses)
+        report.finish()
+        self.last_ingest_report = report
+        self.logger.info(f"Business ingest: {report}")
         
         self.logger.info(f"Found {len(vet_businesses)} veterinary businesses in dataset")
         
+        self.vet_store = ColumnarVetStore.write(self.vet_columns_path, vet_businesses,
+                                                meta={'source_fingerprint': source_fingerprint})
+        self.logger.info(f"Cached vet businesses to {self.vet_columns_path}")
+        
+        self.review_index = None
+        if os.path.exists(self.review_index_file):
+            os.remove(self.review_index_file)
+        return self.vet_store
+    
+    def _vet_store_status(self, vet_store: ColumnarVetStore) -> str:
+        fingerprint = vet_store.meta.get('source_fingerprint')
+        if fingerprint is None:
+            self.logger.info("Vet cache has no source fingerprint, adopting the current business file")
+            vet_store.update_meta({'source_fingerprint': file_fingerprint(self.business_file)})
+            return UNCHANGED
+        
+        status = compare_fingerprint(fingerprint, self.business_file)
+        if status == UNCHANGED and not stat_matches(fingerprint, self.business_file):
+            vet_store.update_meta({'source_fingerprint': file_fingerprint(self.business_file)})
+        return status
+    
+    def _append_vet_businesses(self, vet_store: ColumnarVetStore, trace_memory: bool = False) -> ColumnarVetStore:
+        start = vet_store.meta['source_fingerprint']['size']
+        source_fingerprint = file_fingerprint(self.business_file)
+        self.logger.info(f"Business file grew from {start} to {source_fingerprint['size']} bytes, "
+                         f"processing appended records")
+        
+        report = IngestReport(source=self.business_file)
+        report.start(trace_memory=trace_memory)
+        records = self._iter_json_file(self.business_file, line_filter=_may_be_vet_line, report=report, start=start)
+        new_businesses = list(self._filter_vet_businesses(records))
+        report.records_kept = len(new_businesses)
+        report.finish()
+        self.last_ingest_report = report
+        self.logger.info(f"Incremental business ingest: {report}")
+        
+        if not new_businesses:
+            vet_store.update_meta({'source_fingerprint': source_fingerprint})
+            self.vet_store = vet_store
+            return self.vet_store
+        
+        merged = {business.get('business_id'): business for business in vet_store.records()}
+        merged.update({business.get('business_id'): business for business in new_businesses})
+        new_store = ColumnarVetStore.write(self.vet_columns_path, merged.values(),
+                                           meta={'source_fingerprint': source_fingerprint})
+        self._carry_review_summaries(vet_store, new_store)
+        vet_store.close()
+        self.vet_store = new_store
+        self.logger.info(f"Merged {len(new_businesses)} appended vet businesses, cache now holds {len(self.vet_store)}")
+        self.review_index = None
+        return self.vet_store
+    
+    def _carry_review_summaries(self, old_store: ColumnarVetStore, new_store: ColumnarVetStore):
+        if not old_store.has_column('weighted_rating'):
+            return
+        positions = {business_id: row for row, business_id in enumerate(old_store.column('business_id'))}
+        rows = np.array([positions.get(business_id, -1) for business_id in new_store.column('business_id')],
+                        dtype='int64')
+        known = rows >= 0
+        numeric = {}
+        for name, dtype in SUMMARY_NUMERIC_COLUMNS.items():
+            values = np.zeros(len(rows), dtype=dtype)
+            if old_store.has_column(name):
+                values[known] = np.asarray(old_store.column(name))[rows[known]]
+            numeric[name] = values
+        strings = {}
+        for name in SUMMARY_STRING_COLUMNS:
+            old_values = old_store.column(name) if old_store.has_column(name) else None
+            strings[name] = [old_values[row] if old_values is not None and row >= 0 else '' for row in rows.tolist()]
+        new_store.add_columns(numeric=numeric, strings=strings)
+        self.logger.info(f"Carried review summaries forward for {int(known.sum())} of {len(rows)} vet businesses")
+    
+    def extract_vet_businesses(self, force_refresh: bool = False, trace_memory: bool = False) -> List[Dict]:
+        vet_store = self.load_vet_store(force_refresh=force_refresh, trace_memory=trace_memory)
+        self.vet_businesses = list(vet_store.records())
+        return self.vet_businesses
+    
+    def build_review_index(self, workers: Optional[int] = None,
+                           analyze_text: Optional[bool] = None) -> ReviewIndex:
+        with self._build_lock:
+            vet_store = self.load_vet_store()
+            business_ids = [business_id for business_id in vet_store.column('business_id') if business_id]
+            if analyze_text is None:
+                analyze_text = self.analyze_review_text
+            review_index = ReviewIndex(self.review_index_file)
+            review_index.build(self.review_file, business_ids, workers=workers or self.ingest_workers,
+                               analyze_text=analyze_text)
+            review_index.save()
+            self.review_index = review_index
+            self.review_store.clear()
+            self._store_review_summaries(review_index)
+            return review_index
+    
+    def _store_review_summaries(self, review_index: ReviewIndex):
+        vet_store = self.load_vet_store()
+        columns = ReviewAggregator.to_columns(review_index.aggregates, vet_store.column('business_id'))
+        numeric = {name: columns[name] for name in SUMMARY_NUMERIC_COLUMNS}
+        strings = {name: columns[name] for name in SUMMARY_STRING_COLUMNS}
+        vet_store.add_columns(numeric=numeric, strings=strings)
+        vet_store.update_meta({'review_fingerprint': review_index.source_fingerprint})
+        self.logger.info(f"Stored review summaries for {len(vet_store)} vet businesses")
+    
+    def prepare_review_summaries(self, workers: Optional[int] = None,
+                                 analyze_text: Optional[bool] = None) -> ReviewIndex:
+        with self._build_lock:
+            if analyze_text is None:
+                analyze_text = self.analyze_review_text
+            review_index = self._get_review_index(workers=workers, analyze_text=analyze_text)
+            if analyze_text and not review_index.analyze_text:
+                self.logger.info("Review index was built without text analysis, rebuilding with sentiment")
+                return self.build_review_index(workers=workers, analyze_text=True)
+            vet_store = self.load_vet_store()
+            if (not vet_store.has_column('weighted_rating') or
+                    vet_store.meta.get('review_fingerprint') != review_index.source_fingerprint):
+                self._store_review_summaries(review_index)
+            return review_index
+    
+    def get_review_summary(self, index: int) -> Dict:
+        vet_store = self.load_vet_store()
+        if not vet_store.has_column('weighted_rating'):
+            return {}
+        columns = list(SUMMARY_NUMERIC_COLUMNS) + SUMMARY_STRING_COLUMNS
+        return summary_from_row(vet_store.values(index, columns))
+    
+    def _get_review_index(self, workers: Optional[int] = None, analyze_text: bool = False) -> ReviewIndex:
+        if self.review_index is not None and stat_matches(self.review_index.source_fingerprint, self.review_file):
+            return self.review_index
+        
+        with self._build_lock:
+            if self.review_index is not None and stat_matches(self.review_index.source_fingerprint, self.review_file):
+                return self.review_index
+            
+            review_index = self.review_index
+            if review_index is None:
+                review_index = ReviewIndex(self.review_index_file)
+                if not review_index.load():
+                    review_index = None
+        
+            if review_index is not None:
+                status = review_index.source_status(self.review_file)
+                if status != CHANGED:
+                    self._refresh_review_index(review_index, status)
+                    return review_index
+        
+            self.logger.info("Review index missing or stale, rebuilding")
+            return self.build_review_index(workers=workers, analyze_text=analyze_text)
+    
+    def _current_review_index(self) -> Optional[ReviewIndex]:
         try:
-            with open(self.vet_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(vet_businesses, f)
-            self.logger.info(f"Cached vet businesses to {self.vet_cache_file}")
-        except Exception as e:
-            self.logger.error(f"Error caching vet businesses: {e}")
+            review_stat = os.stat(self.review_file)
+            index_mtime = os.path.getmtime(self.review_index_file) if os.path.exists(self.review_index_file) else None
+        except OSError as e:
+            self.logger.error(f"Error checking review files: {e}")
+            return None
+        key = (review_stat.st_size, review_stat.st_mtime, index_mtime, id(self.review_index))
+        checked = self._review_index_check
+        if checked is not None and checked[0] == key:
+            return checked[1]
         
-        self.vet_businesses = vet_businesses
-        return vet_businesses
+        with self._review_index_lock:
+            checked = self._review_index_check
+            if checked is not None and checked[0] == key:
+                return checked[1]
+            
+            review_index = self.review_index
+            if review_index is None or review_index.source_status(self.review_file) == CHANGED:
+                review_index = ReviewIndex(self.review_index_file)
+                if not review_index.load() or review_index.source_status(self.review_file) == CHANGED:
+                    review_index = None
+            
+            if review_index is None:
+                if not self._missing_review_index_logged:
+                    self.logger.warning("Review index is missing or out of date, serving Yelp vets without reviews. "
+                                        "Run python -m api.yelp_dataset to rebuild it")
+                    self._missing_review_index_logged = True
+            else:
+                self._missing_review_index_logged = False
+                self.review_index = review_index
+            self._review_index_check = (key[:3] + (id(self.review_index),), review_index)
+            return review_index
     
-    def get_reviews_for_business(self, business_id: str, limit: int = 20) -> List[Dict]:
-        business_reviews_file = os.path.join(self.processed_data_path, f"reviews_{business_id}.json")
+    def _refresh_review_index(self, review_index: ReviewIndex, status: str):
+        business_ids = [business_id for business_id in self.load_vet_store().column('business_id') if business_id]
+        updated = set()
+        if status == APPENDED:
+            updated = review_index.update(self.review_file, business_ids)
+        added = review_index.add_businesses(business_ids)
         
-        if os.path.exists(business_reviews_file):
-            try:
-                with open(business_reviews_file, 'r', encoding='utf-8') as f:
-                    reviews = json.load(f)
-                return reviews[:limit]
-            except Exception as e:
-                self.logger.error(f"Error loading cached reviews for {business_id}: {e}")
-
-        grep_found = False
-        reviews = []
+        if status == APPENDED or added:
+            if added:
+                self.logger.info(f"Added {len(added)} new vet businesses to the review index")
+            review_index.save()
+            self.review_store.delete_many(updated)
+            self.review_index = review_index
+            self._store_review_summaries(review_index)
+        elif not stat_matches(review_index.source_fingerprint, self.review_file):
+            review_index.source_fingerprint = file_fingerprint(self.review_file)
+            review_index.save()
+        self.review_index = review_index
+    
+    def get_reviews_for_business(self, business_id: str, limit: int = 20) -> List[Dict]:
+        return self.get_reviews_for_businesses([business_id], limit=limit).get(business_id, [])
+    
+    def get_reviews_for_businesses(self, business_ids: List[str], limit: int = 20) -> Dict[str, List[Dict]]:
+        business_ids = [business_id for business_id in business_ids if business_id]
         try:
-            if os.name != 'nt':  
-                import subprocess
-                grep_cmd = f"grep -F '\"business_id\":\"{business_id}\"' {self.review_file} | head -n {limit*2}"
-                result = subprocess.run(grep_cmd, shell=True, capture_output=True, text=True)
-                if result.returncode == 0 and result.stdout:
-                    lines = result.stdout.strip().split('\n')
-                    for line in lines:
-                        try:
-                            review = json.loads(line.strip())
-                            reviews.append(review)
-                        except json.JSONDecodeError:
-                            continue
-                    
-                    grep_found = True
-                    self.logger.info(f"Found {len(reviews)} reviews for {business_id} using grep")
+            found = self.review_store.get_many(business_ids, limit=limit)
         except Exception as e:
-            self.logger.warning(f"Error using grep to find reviews: {e}")
-            grep_found = False
+            self.logger.error(f"Error reading review store: {e}")
+            found = {}
         
-        if not grep_found:
-            self.logger.info(f"Searching review file for business ID: {business_id}")
-            try:
-                with open(self.review_file, 'r', encoding='utf-8') as f:
-                    count = 0
-                    for line in f:
-                        if line.strip():
-                            try:
-                                review = json.loads(line.strip())
-                                if review.get('business_id') == business_id:
-                                    reviews.append(review)
-                                    count += 1
-                                    if count >= limit * 2:  
-                                        break
-                            except json.JSONDecodeError:
-                                continue
-                self.logger.info(f"Found {len(reviews)} reviews for {business_id} by scanning file")
-            except Exception as e:
-                self.logger.error(f"Error reading reviews for {business_id}: {e}")
-                return []
+        missing = [business_id for business_id in business_ids if business_id not in found]
+        if not missing:
+            return found
         
-        reviews.sort(key=lambda x: x.get('date', ''), reverse=True)
-        reviews = reviews[:limit]
+        loaded = []
+        try:
+            review_index = self._current_review_index()
+            if review_index is None:
+                for business_id in missing:
+                    found[business_id] = []
+                return found
+            for business_id in missing:
+                if business_id not in review_index:
+                    self.logger.warning(f"Business {business_id} is not in the review index")
+                    found[business_id] = []
+                    continue
+                reviews = review_index.read_reviews(self.review_file, business_id, limit)
+                reviews.sort(key=lambda x: x.get('date', ''), reverse=True)
+                found[business_id] = reviews[:limit]
+                loaded.append((business_id, found[business_id]))
+            self.logger.info(f"Loaded reviews for {len(loaded)} businesses using review index")
+        except Exception as e:
+            self.logger.error(f"Error reading reviews from review index: {e}")
+            for business_id in missing:
+                found.setdefault(business_id, [])
         
         try:
-            with open(business_reviews_file, 'w', encoding='utf-8') as f:
-                json.dump(reviews, f)
-            self.logger.info(f"Cached {len(reviews)} reviews for {business_id}")
+            self.review_store.put_many(loaded, limit=limit)
         except Exception as e:
-            self.logger.error(f"Error caching reviews for {business_id}: {e}")
-            
-        return reviews
+            self.logger.error(f"Error caching reviews: {e}")
+        
+        return found
     
-    def get_vets_near_location(self, location: str, radius_miles: float = 10.0) -> List[Dict]:        
-        if not self.vet_businesses:
-            self.extract_vet_businesses()
+    def get_vets_near_location(self, location: str, radius_miles: float = 10.0,
+                               coordinates: Optional[Tuple[float, float]] = None,
+                               limit: Optional[int] = None,
+                               include_reviews: bool = True) -> List[Dict]:        
+        vet_store = self.load_vet_store()
         
-        if not self.vet_businesses:
+        if not len(vet_store):
             self.logger.warning("No veterinary businesses found in Yelp dataset")
             return []
-            
-        location_lower = location.lower()
-        city_match = None
-        state_match = None
-        zip_match = None
-        
-        if any(part.isdigit() and len(part) == 5 for part in location_lower.split()):
-            for part in location_lower.split():
-                if part.isdigit() and len(part) == 5:
-                    zip_match = part
-                    break
         
-        city_parts = location_lower.split(',')
-        if city_parts:
-            city_match = city_parts[0].strip()
-            self.logger.info(f"Extracted city: {city_match}")
+        if coordinates is None:
+            coordinates = geocode_location(location)
+        lat, lng = coordinates if coordinates else (None, None)
+        
+        if lat is not None and lng is not None:
+            matches = self.spatial_index.query_radius(lat, lng, radius_miles)
+            self.logger.info(f"Spatial index found {len(matches)} vets within {radius_miles} miles of {lat}, {lng}")
+        else:
+            self.logger.warning(f"Could not geocode {location}, falling back to text matching")
+            matches = [(index, None) for index in self._match_location_text(location)]
+        
+        if limit is not None:
+            matches = matches[:limit]
+        
+        if not vet_store.has_column('weighted_rating') and not self._missing_summaries_logged:
+            self.logger.warning("No review summaries stored for Yelp vets, run python -m api.yelp_dataset to build them")
+            self._missing_summaries_logged = True
+        
+        businesses = []
+        for index, distance in matches:
+            try:
+                businesses.append((index, vet_store.record(index), distance))
+            except Exception as e:
+                self.logger.error(f"Error processing business: {e}")
+        
+        reviews_by_business = {}
+        if include_reviews:
+            try:
+                reviews_by_business = self.get_reviews_for_businesses(
+                    [business.get('business_id') for _, business, _ in businesses])
+            except Exception as e:
+                self.logger.error(f"Error getting reviews: {e}")
         
         results = []
-        for business in self.vet_businesses:
-            if not business:
-                continue
+        for index, business, distance in businesses:
+            try:
+                business['reviews'] = reviews_by_business.get(business.get('business_id'), [])
+                formatted_business = self._format_business_data(business)
+                formatted_business['yelp_business_id'] = business.get('business_id', '')
+                formatted_business['review_summary'] = self.get_review_summary(index)
+                if distance is not None:
+                    formatted_business['distance'] = round(distance, 1)
+                results.append(formatted_business)
                 
-            matched = False
-            city = business.get('city', '').lower() if business.get('city') else ''
-            state = business.get('state', '').lower() if business.get('state') else ''
-            postal_code = business.get('postal_code', '').lower() if business.get('postal_code') else ''
-            address = business.get('address', '').lower() if business.get('address') else ''
-            
-            if city_match and (city_match in city or city in city_match):
-                self.logger.info(f"City match found: {city_match} in {city}")
-                matched = True
-            
-            if state_match and state_match.lower() == state:
-                self.logger.info(f"State match found: {state_match} == {state}")
-                matched = True
-            
-            if zip_match and zip_match == postal_code:
-                self.logger.info(f"Zip match found: {zip_match} == {postal_code}")
-                matched = True
-            
-            if city_match and city_match in address:
-                self.logger.info(f"Address match found: {city_match} in {address}")
-                matched = True
-            
-            if matched:
-                try:
-                    business_id = business.get('business_id')
-                    reviews = []
-                    if business_id:
-                        try:
-                            reviews = self.get_reviews_for_business(business_id)
-                        except Exception as e:
-                            self.logger.error(f"Error getting reviews for {business_id}: {e}")
-                    
-                    business_with_reviews = business.copy()
-                    business_with_reviews['reviews'] = reviews
-                    formatted_business = self._format_business_data(business_with_reviews)
-                    results.append(formatted_business)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing business: {e}")
+            except Exception as e:
+                self.logger.error(f"Error processing business: {e}")
         
         self.logger.info(f"Found {len(results)} vets near {location}")
         return results
     
+    def _match_location_text(self, location: str) -> List[int]:
+        self.load_vet_store()
+        matches = self.location_index.match(location)
+        self.logger.info(f"Text location match found {len(matches)} vets for {location}")
+        return matches
+    
+    def get_formatted_reviews(self, business_ids: List[str], limit: int = 3) -> Dict[str, List[Dict]]:
+        reviews_by_business = self.get_reviews_for_businesses(business_ids, limit=limit)
+        return {
+            business_id: [self._format_review(review) for review in reviews if review]
+            for business_id, reviews in reviews_by_business.items()
+        }
+    
+    def _format_review(self, review: Dict) -> Dict:
+        return {
+            "id": review.get('review_id', ''),
+            "rating": review.get('stars', 0),
+            "text": review.get('text', ''),
+            "time_created": review.get('date', ''),
+            "user": {
+                "name": review.get('user_id', 'Anonymous')
+            }
+        }
+    
     def _format_business_data(self, business: Dict) -> Dict:        
         if not business:
             self.logger.warning("Attempted to format None business data")
@@ -314,20 +667,7 @@ class YelpDatasetProcessor:
                 cat_list = []    
             categories = [{"title": cat} for cat in cat_list if cat]
         
-        reviews = []
-        for review in business.get('reviews', []):
-            if not review:
-                continue
-                    
-            reviews.append({
-                "id": review.get('review_id', ''),
-                "rating": review.get('stars', 0),
-                "text": review.get('text', ''),
-                "time_created": review.get('date', ''),
-                "user": {
-                    "name": review.get('user_id', 'Anonymous')
-                }
-            })
+        reviews = [self._format_review(review) for review in business.get('reviews', []) if review]
         
         coords = {
             "latitude": business.get('latitude', 0),
@@ -363,4 +703,26 @@ class YelpDatasetProcessor:
             "is_closed": not business.get('is_open', True),
             "source": "yelp_dataset",
             "handles_exotic": any('exotic' in cat['title'].lower() for cat in categories) if categories else False
-        }
\ No newline at end of file
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract Yelp vets and precompute review indexes and summaries")
+    parser.add_argument("--dataset-path", help="Yelp dataset directory (defaults to YELP_DATASET_PATH)")
+    parser.add_argument("--force-refresh", action="store_true", help="Re-extract vets and rebuild the review index")
+    parser.add_argument("--workers", type=int, help="Review ingest worker processes")
+    parser.add_argument("--no-sentiment", action="store_true", help="Skip review text sentiment analysis")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    processor = YelpDatasetProcessor(dataset_path=args.dataset_path)
+    processor.load_vet_store(force_refresh=args.force_refresh)
+    analyze_text = False if args.no_sentiment else None
+    if args.force_refresh:
+        processor.build_review_index(workers=args.workers, analyze_text=analyze_text)
+    else:
+        processor.prepare_review_summaries(workers=args.workers, analyze_text=analyze_text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import re
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+
+US_STATES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca',
+    'colorado': 'co', 'connecticut': 'ct', 'delaware': 'de', 'florida': 'fl', 'georgia': 'ga',
+    'hawaii': 'hi', 'idaho': 'id', 'illinois': 'il', 'indiana': 'in', 'iowa': 'ia',
+    'kansas': 'ks', 'kentucky': 'ky', 'louisiana': 'la', 'maine': 'me', 'maryland': 'md',
+    'massachusetts': 'ma', 'michigan': 'mi', 'minnesota': 'mn', 'mississippi': 'ms', 'missouri': 'mo',
+    'montana': 'mt', 'nebraska': 'ne', 'nevada': 'nv', 'new hampshire': 'nh', 'new jersey': 'nj',
+    'new mexico': 'nm', 'new york': 'ny', 'north carolina': 'nc', 'north dakota': 'nd', 'ohio': 'oh',
+    'oklahoma': 'ok', 'oregon': 'or', 'pennsylvania': 'pa', 'rhode island': 'ri', 'south carolina': 'sc',
+    'south dakota': 'sd', 'tennessee': 'tn', 'texas': 'tx', 'utah': 'ut', 'vermont': 'vt',
+    'virginia': 'va', 'washington': 'wa', 'west virginia': 'wv', 'wisconsin': 'wi', 'wyoming': 'wy',
+    'district of columbia': 'dc'
+}
+US_STATE_CODES = set(US_STATES.values())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+ZIP_PATTERN = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    if not value:
+        return ''
+    return ' '.join(TOKEN_PATTERN.findall(value.lower()))
+
+
+def normalize_state(value: Optional[str]) -> str:
+    text = normalize_text(value)
+    return US_STATES.get(text, text)
+
+
+def normalize_zip(value: Optional[str]) -> str:
+    if not value:
+        return ''
+    match = ZIP_PATTERN.search(value)
+    return match.group(1) if match else normalize_text(value)
+
+
+class LocationTextIndex:
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.cities: Dict[str, Set[int]] = {}
+        self.city_tokens: Dict[str, Set[str]] = {}
+        self.states: Dict[str, Set[int]] = {}
+        self.zips: Dict[str, Set[int]] = {}
+        self.address_tokens: Dict[str, Set[int]] = {}
+
+    @classmethod
+    def build(cls, cities: Iterable[str], states: Iterable[str],
+              postal_codes: Iterable[str], addresses: Iterable[str]) -> 'LocationTextIndex':
+        index = cls()
+        for row, (city, state, postal_code, address) in enumerate(zip(cities, states, postal_codes, addresses)):
+            city_key = normalize_text(city)
+            if city_key and city_key not in index.cities:
+                for token in city_key.split():
+                    index.city_tokens.setdefault(token, set()).add(city_key)
+            if city_key:
+                index.cities.setdefault(city_key, set()).add(row)
+            state_key = normalize_state(state)
+            if state_key:
+                index.states.setdefault(state_key, set()).add(row)
+            zip_key = normalize_zip(postal_code)
+            if zip_key:
+                index.zips.setdefault(zip_key, set()).add(row)
+            for token in set(TOKEN_PATTERN.findall(address.lower())) if address else ():
+                index.address_tokens.setdefault(token, set()).add(row)
+        return index
+
+    def _as_state(self, text: str) -> Optional[str]:
+        state_key = normalize_state(text)
+        if state_key in self.states or text in US_STATES or (len(text) == 2 and state_key in US_STATE_CODES):
+            return state_key
+        return None
+
+    def parse_query(self, location: str) -> Dict[str, Optional[str]]:
+        query = {'city': None, 'state': None, 'zip': None}
+        zip_match = ZIP_PATTERN.search(location)
+        if zip_match:
+            query['zip'] = zip_match.group(1)
+
+        parts = []
+        for part in location.split(','):
+            words = [word for word in normalize_text(part).split() if word != query['zip']]
+            if words:
+                parts.append(words)
+
+        if len(parts) == 1 and len(parts[0]) > 1 and len(parts[0][-1]) == 2 and self._as_state(parts[0][-1]):
+            parts = [parts[0][:-1], parts[0][-1:]]
+
+        remaining = []
+        for position, words in enumerate(parts):
+            text = ' '.join(words)
+            if position > 0 and query['state'] is None:
+                state_key = self._as_state(text)
+                if state_key:
+                    query['state'] = state_key
+                    continue
+            remaining.append(text)
+
+        if remaining:
+            query['city'] = remaining[0]
+
+        if len(parts) == 1 and query['city'] and query['city'] not in self.cities:
+            state_key = self._as_state(query['city'])
+            if state_key:
+                query['state'] = state_key
+                query['city'] = None
+
+        return query
+
+    def _city_rows(self, city: str) -> Set[int]:
+        rows = set(self.cities.get(city, ()))
+        tokens = set(city.split())
+        candidates = set()
+        for token in tokens:
+            candidates |= self.city_tokens.get(token, set())
+        for city_key in candidates:
+            key_tokens = set(city_key.split())
+            if city_key != city and (tokens <= key_tokens or key_tokens <= tokens):
+                rows |= self.cities[city_key]
+        return rows
+
+    def _address_rows(self, city: str) -> Set[int]:
+        tokens = city.split()
+        postings = [self.address_tokens.get(token) for token in tokens]
+        if not tokens or any(p is None for p in postings):
+            return set()
+        postings.sort(key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def match(self, location: str) -> List[int]:
+        query = self.parse_query(location)
+        rows: Set[int] = set()
+
+        if query['city']:
+            rows |= self._city_rows(query['city'])
+            rows |= self._address_rows(query['city'])
+        if query['zip']:
+            rows |= self.zips.get(query['zip'], set())
+
+        if query['state']:
+            state_rows = self.states.get(query['state'], set())
+            rows = rows & state_rows if (query['city'] or query['zip']) else set(state_rows)
+
+        self.logger.debug(f"Text location query {query} matched {len(rows)} vets")
+        return sorted(rows)
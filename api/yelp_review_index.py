@@ -0,0 +1,294 @@
+import os
+import re
+import json
+import bisect
+import logging
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from utils.block_storage import open_line_file
+from utils.fingerprint import UNCHANGED, compare_fingerprint, file_fingerprint, stat_matches
+from .yelp_aggregates import ReviewAggregator
+
+
+BUSINESS_ID_PATTERN = re.compile(rb'"business_id"\s*:\s*"([^"]+)"')
+DATE_PATTERN = re.compile(rb'"date"\s*:\s*"([^"]+)"')
+STARS_PATTERN = re.compile(rb'"stars"\s*:\s*([0-9.]+)')
+
+_worker_business_ids: Optional[Set[str]] = None
+_worker_sentiment_analyzer = None
+
+
+def split_ranges(path: str, chunks: int) -> List[Tuple[int, int]]:
+    line_file = open_line_file(path)
+    size = line_file.size
+    if size == 0 or chunks <= 1:
+        return [(0, size)]
+
+    split_points = line_file.split_points()
+    if split_points is not None:
+        boundaries = [0]
+        for i in range(1, chunks):
+            target = size * i // chunks
+            position = split_points[bisect.bisect_left(split_points, target)] if target <= split_points[-1] else size
+            if boundaries[-1] < position < size:
+                boundaries.append(position)
+        boundaries.append(size)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, chunks):
+            f.seek(max(size * i // chunks, boundaries[-1]))
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _create_sentiment_analyzer():
+    from analysis.sentiment import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+
+def _init_scan_worker(business_ids: Optional[Set[str]], analyze_text: bool = False):
+    global _worker_business_ids, _worker_sentiment_analyzer
+    _worker_business_ids = business_ids
+    _worker_sentiment_analyzer = _create_sentiment_analyzer() if analyze_text else None
+
+
+def _scan_chunk(args: Tuple[str, int, int]) -> Tuple[Dict[str, List[List]], Dict[str, Dict], int]:
+    review_file, start, end = args
+    return ReviewIndex.scan_range(review_file, _worker_business_ids, start, end,
+                                  sentiment_analyzer=_worker_sentiment_analyzer)
+
+
+class ReviewIndex:
+
+    VERSION = 4
+
+    def __init__(self, index_file: str):
+        self.logger = logging.getLogger(__name__)
+        self.index_file = index_file
+        self.review_file = None
+        self.source_fingerprint = None
+        self.analyze_text = False
+        self.businesses: Dict[str, List[List]] = {}
+        self.aggregates: Dict[str, Dict] = {}
+        self.lines_read = 0
+        self._reader = None
+        self._reader_lock = threading.Lock()
+
+    def __contains__(self, business_id: str) -> bool:
+        return business_id in self.businesses
+
+    def __len__(self) -> int:
+        return len(self.businesses)
+
+    @staticmethod
+    def parse_review_key(line: bytes) -> Optional[tuple]:
+        match = BUSINESS_ID_PATTERN.search(line)
+        if not match:
+            return None
+        business_id = match.group(1).decode('utf-8')
+        date_match = DATE_PATTERN.search(line)
+        date = date_match.group(1).decode('utf-8') if date_match else ''
+        stars_match = STARS_PATTERN.search(line)
+        stars = float(stars_match.group(1)) if stars_match else 0.0
+        return business_id, date, stars
+
+    @classmethod
+    def scan_range(cls, review_file: str, business_ids: Optional[Set[str]] = None,
+                   start: int = 0, end: Optional[int] = None,
+                   sentiment_analyzer=None) -> Tuple[Dict[str, List[List]], Dict[str, Dict], int]:
+        entries: Dict[str, List[List]] = {}
+        aggregator = ReviewAggregator(sentiment_analyzer)
+        lines_read = 0
+        for line_offset, line in open_line_file(review_file).iter_lines(start, end):
+            lines_read += 1
+            if not line.strip():
+                continue
+            review = None
+            key = cls.parse_review_key(line)
+            if key is None:
+                try:
+                    review = json.loads(line)
+                    key = (review.get('business_id', ''), review.get('date', ''), review.get('stars') or 0.0)
+                except json.JSONDecodeError:
+                    continue
+            business_id, date, stars = key
+            if business_ids is not None and business_id not in business_ids:
+                continue
+            entries.setdefault(business_id, []).append([line_offset, date])
+
+            text = None
+            if sentiment_analyzer is not None:
+                if review is None:
+                    try:
+                        review = json.loads(line)
+                    except json.JSONDecodeError:
+                        review = {}
+                text = review.get('text')
+            aggregator.add(business_id, stars, date, text)
+        return entries, aggregator.states, lines_read
+
+    @classmethod
+    def scan_parallel(cls, review_file: str, business_ids: Optional[Set[str]] = None,
+                      workers: int = 2, chunks_per_worker: int = 4,
+                      analyze_text: bool = False) -> Tuple[Dict[str, List[List]], Dict[str, Dict], int]:
+        ranges = split_ranges(review_file, workers * chunks_per_worker)
+        entries: Dict[str, List[List]] = {}
+        aggregates: Dict[str, Dict] = {}
+        lines_read = 0
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_scan_worker,
+                                 initargs=(business_ids, analyze_text)) as executor:
+            tasks = [(review_file, start, end) for start, end in ranges]
+            for chunk_entries, chunk_aggregates, chunk_lines in executor.map(_scan_chunk, tasks):
+                for business_id, business_entries in chunk_entries.items():
+                    entries.setdefault(business_id, []).extend(business_entries)
+                ReviewAggregator.merge_states(aggregates, chunk_aggregates)
+                lines_read += chunk_lines
+
+        return entries, aggregates, lines_read
+
+    def build(self, review_file: str, business_ids: Optional[Iterable[str]] = None,
+              workers: int = 1, analyze_text: bool = False) -> 'ReviewIndex':
+        wanted = set(business_ids) if business_ids is not None else None
+        self.logger.info(f"Building review index for {review_file} with {workers} worker(s)")
+        source_fingerprint = file_fingerprint(review_file)
+        if workers > 1:
+            entries, aggregates, lines_read = self.scan_parallel(review_file, wanted, workers=workers,
+                                                                 analyze_text=analyze_text)
+        else:
+            sentiment_analyzer = _create_sentiment_analyzer() if analyze_text else None
+            entries, aggregates, lines_read = self.scan_range(review_file, wanted,
+                                                              sentiment_analyzer=sentiment_analyzer)
+        self.set_entries(entries, wanted)
+        self.aggregates = aggregates
+        self.lines_read = lines_read
+        self.review_file = review_file
+        self.source_fingerprint = source_fingerprint
+        self.analyze_text = analyze_text
+        total = sum(len(offsets) for offsets in self.businesses.values())
+        self.logger.info(f"Indexed {total} reviews for {len(self.businesses)} businesses from {lines_read} lines")
+        return self
+
+    def update(self, review_file: str, business_ids: Optional[Iterable[str]] = None) -> Set[str]:
+        start = self.source_fingerprint['size']
+        source_fingerprint = file_fingerprint(review_file)
+        wanted = set(business_ids) if business_ids is not None else None
+        self.logger.info(f"Updating review index from offset {start} of {review_file}")
+
+        sentiment_analyzer = _create_sentiment_analyzer() if self.analyze_text else None
+        entries, aggregates, lines_read = self.scan_range(review_file, wanted, start, source_fingerprint['size'],
+                                                          sentiment_analyzer=sentiment_analyzer)
+        self.add_businesses(wanted or [])
+        for business_id, business_entries in entries.items():
+            merged = self.businesses.get(business_id, []) + business_entries
+            self.businesses[business_id] = sorted(merged, key=lambda e: e[1], reverse=True)
+        ReviewAggregator.merge_states(self.aggregates, aggregates)
+
+        self.lines_read = lines_read
+        self.review_file = review_file
+        self.source_fingerprint = source_fingerprint
+        total = sum(len(business_entries) for business_entries in entries.values())
+        self.logger.info(f"Added {total} reviews for {len(entries)} businesses from {lines_read} new lines")
+        return set(entries)
+
+    def add_businesses(self, business_ids: Iterable[str]) -> List[str]:
+        added = [business_id for business_id in business_ids if business_id not in self.businesses]
+        for business_id in added:
+            self.businesses[business_id] = []
+        return added
+
+    def set_entries(self, entries: Dict[str, List[List]], business_ids: Optional[Set[str]] = None):
+        self.businesses = {}
+        if business_ids is not None:
+            for business_id in business_ids:
+                self.businesses[business_id] = []
+        for business_id, business_entries in entries.items():
+            self.businesses[business_id] = sorted(business_entries, key=lambda e: e[1], reverse=True)
+
+    def load(self) -> bool:
+        if not os.path.exists(self.index_file):
+            return False
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading review index {self.index_file}: {e}")
+            return False
+
+        if data.get('version') != self.VERSION:
+            self.logger.warning(f"Ignoring review index with unsupported version {data.get('version')}")
+            return False
+
+        self.review_file = data.get('review_file')
+        self.source_fingerprint = data.get('source_fingerprint')
+        self.analyze_text = data.get('analyze_text', False)
+        self.businesses = data.get('businesses', {})
+        self.aggregates = data.get('aggregates', {})
+        self.logger.info(f"Loaded review index for {len(self.businesses)} businesses")
+        return True
+
+    def save(self):
+        data = {
+            'version': self.VERSION,
+            'review_file': self.review_file,
+            'source_fingerprint': self.source_fingerprint,
+            'analyze_text': self.analyze_text,
+            'businesses': self.businesses,
+            'aggregates': self.aggregates
+        }
+        fd, tmp_file = tempfile.mkstemp(prefix=f"{os.path.basename(self.index_file)}.", suffix=".tmp",
+                                        dir=os.path.dirname(os.path.abspath(self.index_file)))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_file, self.index_file)
+            self.logger.info(f"Saved review index to {self.index_file}")
+        except Exception as e:
+            self.logger.error(f"Error saving review index: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def source_status(self, review_file: str) -> str:
+        return compare_fingerprint(self.source_fingerprint, review_file)
+
+    def is_current(self, review_file: str) -> bool:
+        return stat_matches(self.source_fingerprint, review_file) or self.source_status(review_file) == UNCHANGED
+
+    def offsets_for(self, business_id: str, limit: Optional[int] = None) -> List[int]:
+        entries = self.businesses.get(business_id, [])
+        if limit is not None:
+            entries = entries[:limit]
+        return [entry[0] for entry in entries]
+
+    def _line_file(self, review_file: str):
+        with self._reader_lock:
+            if self._reader is None or self._reader.path != review_file:
+                self._reader = open_line_file(review_file)
+            return self._reader
+
+    def read_reviews(self, review_file: str, business_id: str, limit: int = 20) -> List[Dict]:
+        reviews = []
+        offsets = self.offsets_for(business_id, limit)
+        if not offsets:
+            return reviews
+
+        line_file = self._line_file(review_file)
+        for offset in offsets:
+            line = line_file.read_line_at(offset)
+            try:
+                reviews.append(json.loads(line))
+            except json.JSONDecodeError:
+                self.logger.warning(f"Review index points at invalid JSON at offset {offset}")
+        return reviews
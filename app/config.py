@@ -16,7 +16,37 @@ class Config:
     BING_API_KEY = os.getenv('BING_API_KEY')
     
     YELP_DATASET_PATH = os.getenv('YELP_DATASET_PATH')
+    YELP_INGEST_WORKERS = int(os.getenv('YELP_INGEST_WORKERS', '1'))
+    YELP_REVIEW_SENTIMENT = os.getenv('YELP_REVIEW_SENTIMENT', 'True').lower() in ('true', '1', 't')
     ENABLED_DATA_SOURCES = os.getenv('ENABLED_DATA_SOURCES', 'yelp_dataset,foursquare_api,tomtom_api,here_api').split(',')
+    SOURCE_MAX_WORKERS = int(os.getenv('SOURCE_MAX_WORKERS', '8'))
+    SOURCE_TIMEOUT_SECONDS = float(os.getenv('SOURCE_TIMEOUT_SECONDS', '8'))
+    SOURCE_TIMEOUTS = {
+        source: float(timeout)
+        for source, timeout in (item.split(':') for item in os.getenv('SOURCE_TIMEOUTS', '').split(',') if ':' in item)
+    }
+    SEARCH_BUDGET_SECONDS = float(os.getenv('SEARCH_BUDGET_SECONDS', '12'))
+    PROVIDER_CACHE_TTL_SECONDS = float(os.getenv('PROVIDER_CACHE_TTL_SECONDS', '900'))
+    PROVIDER_CACHE_STALE_SECONDS = float(os.getenv('PROVIDER_CACHE_STALE_SECONDS', '3600'))
+    PROVIDER_CACHE_MAX_ENTRIES = int(os.getenv('PROVIDER_CACHE_MAX_ENTRIES', '1024'))
+    PROVIDER_CACHE_GEOHASH_PRECISION = int(os.getenv('PROVIDER_CACHE_GEOHASH_PRECISION', '6'))
+    FOURSQUARE_TIPS_CONCURRENCY = int(os.getenv('FOURSQUARE_TIPS_CONCURRENCY', '4'))
+    FOURSQUARE_RATE_PER_SECOND = float(os.getenv('FOURSQUARE_RATE_PER_SECOND', '10'))
+    PROVIDER_RATE_LIMITS = {
+        source: float(rate)
+        for source, rate in (item.split(':') for item in os.getenv('PROVIDER_RATE_LIMITS', 'tomtom_api:5,here_api:5').split(',') if ':' in item)
+    }
+    RATE_LIMIT_DIR = os.getenv('RATE_LIMIT_DIR')
+    RATE_LIMIT_WAIT_SECONDS = float(os.getenv('RATE_LIMIT_WAIT_SECONDS', '1'))
+    CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', '20'))
+    CIRCUIT_FAILURE_THRESHOLD = float(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '0.5'))
+    CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', '5'))
+    CIRCUIT_COOLDOWN_SECONDS = float(os.getenv('CIRCUIT_COOLDOWN_SECONDS', '30'))
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+    HEDGED_SOURCES = [source for source in os.getenv('HEDGED_SOURCES', '').split(',') if source]
+    HEDGE_BUDGET = float(os.getenv('HEDGE_BUDGET', '0.1'))
+    FOURSQUARE_TIPS_FOR_DISPLAYED_ONLY = os.getenv('FOURSQUARE_TIPS_FOR_DISPLAYED_ONLY', 'False').lower() in ('true', '1', 't')
     
     CACHE_TYPE = 'simple'
     CACHE_DEFAULT_TIMEOUT = 300
@@ -27,6 +57,7 @@ class Config:
     DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
     RAW_DATA_DIR = os.path.join(DATA_DIR, 'raw')
     PROCESSED_DATA_DIR = os.path.join(DATA_DIR, 'processed')
+    VET_IDENTITY_DB = os.getenv('VET_IDENTITY_DB', os.path.join(PROCESSED_DATA_DIR, 'vet_identity.sqlite'))
     
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     MAX_SEARCH_RESULTS = int(os.getenv('MAX_SEARCH_RESULTS', '50'))
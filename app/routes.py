@@ -1,9 +1,11 @@
-from flask import Blueprint, render_template, request, jsonify, current_app
+from flask import Blueprint, Response, render_template, request, jsonify, current_app, stream_with_context
 from datetime import datetime
 import os
+import time
 import logging
 import json
 from api.api_manager import APIManager
+from utils.deadline import Deadline
 from analysis.analyzer import VetAnalyzer
 from analysis.recommender import VetRecommender
 from app.models import SearchResult
@@ -24,7 +26,32 @@ def init_components():
             tomtom_api_key=current_app.config.get('TOMTOM_API_KEY'),
             here_api_key=current_app.config.get('HERE_API_KEY'),
             yelp_dataset_path=current_app.config.get('YELP_DATASET_PATH'),
-            enable_yelp_dataset=current_app.config.get('ENABLE_YELP_DATASET', False)
+            enable_yelp_dataset=current_app.config.get('ENABLE_YELP_DATASET', False),
+            yelp_ingest_workers=current_app.config.get('YELP_INGEST_WORKERS', 1),
+            yelp_review_sentiment=current_app.config.get('YELP_REVIEW_SENTIMENT', True),
+            max_workers=current_app.config.get('SOURCE_MAX_WORKERS', 8),
+            source_timeouts=current_app.config.get('SOURCE_TIMEOUTS'),
+            default_source_timeout=current_app.config.get('SOURCE_TIMEOUT_SECONDS', 8.0),
+            search_budget=current_app.config.get('SEARCH_BUDGET_SECONDS', 12.0),
+            identity_store_path=current_app.config.get('VET_IDENTITY_DB'),
+            provider_cache_ttl=current_app.config.get('PROVIDER_CACHE_TTL_SECONDS', 900.0),
+            provider_cache_stale=current_app.config.get('PROVIDER_CACHE_STALE_SECONDS', 3600.0),
+            provider_cache_max_entries=current_app.config.get('PROVIDER_CACHE_MAX_ENTRIES', 1024),
+            provider_cache_precision=current_app.config.get('PROVIDER_CACHE_GEOHASH_PRECISION', 6),
+            foursquare_tips_concurrency=current_app.config.get('FOURSQUARE_TIPS_CONCURRENCY', 4),
+            foursquare_rate_per_second=current_app.config.get('FOURSQUARE_RATE_PER_SECOND', 10.0),
+            foursquare_tips_for_displayed_only=current_app.config.get('FOURSQUARE_TIPS_FOR_DISPLAYED_ONLY', False),
+            provider_rate_limits=current_app.config.get('PROVIDER_RATE_LIMITS'),
+            rate_limit_dir=current_app.config.get('RATE_LIMIT_DIR'),
+            rate_limit_wait=current_app.config.get('RATE_LIMIT_WAIT_SECONDS', 1.0),
+            circuit_window=current_app.config.get('CIRCUIT_WINDOW', 20),
+            circuit_failure_threshold=current_app.config.get('CIRCUIT_FAILURE_THRESHOLD', 0.5),
+            circuit_slow_call_seconds=current_app.config.get('CIRCUIT_SLOW_CALL_SECONDS', 5.0),
+            circuit_cooldown=current_app.config.get('CIRCUIT_COOLDOWN_SECONDS', 30.0),
+            http_pool_connections=current_app.config.get('HTTP_POOL_CONNECTIONS', 4),
+            http_pool_maxsize=current_app.config.get('HTTP_POOL_MAXSIZE', 10),
+            hedged_sources=current_app.config.get('HEDGED_SOURCES'),
+            hedge_budget=current_app.config.get('HEDGE_BUDGET', 0.1)
         )
         
     if analyzer is None:
@@ -51,13 +78,15 @@ def search_vets():
     user_lat = data.get('latitude')
     user_lng = data.get('longitude')
     user_location = (user_lat, user_lng) if user_lat and user_lng else None
+    deadline = Deadline(current_app.config.get('SEARCH_BUDGET_SECONDS', 12.0))
     
     try:    
-        all_data = api_manager.get_combined_data(
+        all_data, source_status = api_manager.get_combined_data_with_status(
             location=location,
             max_results_per_source=15,
             pet_type=pet_type,
-            specialties=specialties
+            specialties=specialties,
+            deadline=deadline
         )
         
         logger.info(f"Retrieved data from {len(api_manager.enabled_apis)} sources with {len(all_data)} total results")
@@ -71,22 +100,14 @@ def search_vets():
                     'price': price_preference,
                     'specialties': specialties
                 },
-                'data_sources': api_manager.enabled_apis,
+                'data_sources': source_status,
+                'cut_short': source_status.get('cut_short', []),
                 'timestamp': datetime.now().isoformat(),
                 'message': "No veterinarians found matching your criteria. Try a different location or broaden your search."
             })
         
-        processed_df = analyzer.process_raw_data(all_data)
-        recommendations_df = recommender.recommend(
-            df=processed_df,
-            user_location=user_location,
-            pet_type=pet_type,
-            price_preference=price_preference,
-            max_distance=max_distance,
-            specialties=specialties
-        )
-        
-        result_records = recommender.get_recommendation_details(recommendations_df)
+        result_records = _rank_results(all_data, user_location, pet_type, price_preference,
+                                       max_distance, specialties)
         response = {
             'recommendations': result_records if result_records else [],
             'count': len(result_records),
@@ -96,7 +117,8 @@ def search_vets():
                 'price': price_preference,
                 'specialties': specialties
             },
-            'data_sources': api_manager.enabled_apis,
+            'data_sources': source_status,
+            'cut_short': source_status.get('cut_short', []),
             'timestamp': datetime.now().isoformat()
         }
 
@@ -129,6 +151,131 @@ def search_vets():
             'recommendations': []
         }), 500
 
+@main.route('/api/search/stream', methods=['POST'])
+def search_vets_stream():
+    init_components()
+    
+    data = request.json or {}
+    location = data.get('location', '')
+    pet_type = data.get('pet_type')
+    price_preference = data.get('price')
+    max_distance = data.get('max_distance')
+    specialties = data.get('specialties', [])
+    logger.info(f"Streaming search request: location={location}, pet_type={pet_type}, specialties={specialties}")
+    user_lat = data.get('latitude')
+    user_lng = data.get('longitude')
+    user_location = (user_lat, user_lng) if user_lat and user_lng else None
+    deadline = Deadline(current_app.config.get('SEARCH_BUDGET_SECONDS', 12.0))
+    query = {
+        'location': location,
+        'pet_type': pet_type,
+        'price': price_preference,
+        'specialties': specialties
+    }
+    
+    def generate():
+        started_at = time.monotonic()
+        sent = {}
+        hydrated = {}
+        source_status = {}
+        try:
+            for source, all_data, source_status in api_manager.iter_combined_data(
+                    location=location,
+                    max_results_per_source=15,
+                    pet_type=pet_type,
+                    specialties=specialties,
+                    deadline=deadline):
+                result_records = _rank_results(all_data, user_location, pet_type, price_preference,
+                                               max_distance, specialties, hydrate=False)
+                _hydrate_changed(result_records, hydrated)
+                current = {_record_key(record): _encode_record(record) for record in result_records}
+                added = [json.loads(encoded) for vet_id, encoded in current.items() if vet_id not in sent]
+                updated = [json.loads(encoded) for vet_id, encoded in current.items()
+                           if vet_id in sent and sent[vet_id] != encoded]
+                removed = [vet_id for vet_id in sent if vet_id not in current]
+                sent = current
+                
+                elapsed_ms = round((time.monotonic() - started_at) * 1000)
+                logger.info(f"Streaming {source} batch after {elapsed_ms} ms: {len(added)} added, "
+                            f"{len(updated)} updated, {len(removed)} removed")
+                yield _sse_event('results', {
+                    'source': source,
+                    'added': added,
+                    'updated': updated,
+                    'removed': removed,
+                    'order': list(current),
+                    'count': len(current),
+                    'elapsed_ms': elapsed_ms
+                })
+            
+            yield _sse_event('done', {
+                'count': len(sent),
+                'query': query,
+                'data_sources': source_status,
+                'cut_short': deadline.cut_short,
+                'elapsed_ms': round((time.monotonic() - started_at) * 1000),
+                'timestamp': datetime.now().isoformat()
+            })
+        except Exception as e:
+            logger.error(f"Error during streaming search: {str(e)}", exc_info=True)
+            yield _sse_event('error', {
+                'error': 'An error occurred while processing your request',
+                'message': str(e)
+            })
+    
+    response_obj = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response_obj.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    response_obj.headers['X-Accel-Buffering'] = 'no'
+    return response_obj
+
+def _rank_results(all_data, user_location, pet_type, price_preference, max_distance, specialties, hydrate=True):
+    processed_df = analyzer.process_raw_data(all_data)
+    recommendations_df = recommender.recommend(
+        df=processed_df,
+        user_location=user_location,
+        pet_type=pet_type,
+        price_preference=price_preference,
+        max_distance=max_distance,
+        specialties=specialties
+    )
+    
+    result_records = recommender.get_recommendation_details(recommendations_df)
+    if hydrate:
+        _hydrate(result_records)
+    return result_records
+
+def _hydrate(records):
+    api_manager.hydrate_reviews(records, limit=3)
+    api_manager.hydrate_tips(records, limit=3)
+
+def _hydrate_changed(records, hydrated):
+    encoded = {_record_key(record): _encode_record(record) for record in records}
+    changed = [record for record in records
+               if hydrated.get(_record_key(record), (None,))[0] != encoded[_record_key(record)]]
+    if changed:
+        _hydrate(changed)
+    for record in changed:
+        hydrated[_record_key(record)] = (encoded[_record_key(record)], record.get('reviews', []))
+    for record in records:
+        record['reviews'] = hydrated[_record_key(record)][1]
+    return records
+
+def _json_default(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+def _record_key(record):
+    return str(record.get('canonical_id') or record['id'])
+
+def _encode_record(record):
+    return json.dumps(record, default=_json_default, sort_keys=True)
+
+def _sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, default=_json_default)}\n\n"
+
 @main.route('/api/pet-specialties')
 def get_specialties():
     specialties = [
@@ -164,10 +311,17 @@ def get_filter_categories():
 def get_data_sources():
     init_components()
     return jsonify({
-        'enabled_sources': api_manager.enabled_apis
+        'enabled_sources': api_manager.enabled_apis,
+        'health': api_manager.get_source_health(),
+        'cache': api_manager.get_cache_stats(),
+        'http_pools': api_manager.get_pool_stats(),
+        'coalescing': api_manager.get_single_flight_stats(),
+        'hedging': api_manager.get_hedging_stats()
     })
 
 @main.route('/api/clear-cache', methods=['POST'])
 def clear_cache():
     cache.clear()
+    if api_manager is not None:
+        api_manager.clear_provider_cache()
     return jsonify({'status': 'Cache cleared'})
\ No newline at end of file
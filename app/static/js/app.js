@@ -2,6 +2,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     const API_ENDPOINT = 'https://your-backend-service.com';
     const DEMO_MODE = true;
+    const USE_STREAMING = typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
     const searchForm = document.getElementById('search-form');
     const locationInput = document.getElementById('location');
     const petTypeOptions = document.querySelectorAll('.pet-type-option');
@@ -320,15 +321,28 @@ document.addEventListener('DOMContentLoaded', function() {
                     searchData.longitude = coordinates.longitude;
                 }
 
-                return fetch(`${API_ENDPOINT}/api/search`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                        'Cache-Control': 'no-cache'
-                    },
-                    body: JSON.stringify(searchData)
-                });
+                if (USE_STREAMING) {
+                    return streamSearch(searchData);
+                }
+
+                return fetchSearch(searchData);
             })
+            .catch(error => {
+                console.error('Error during search:', error);
+                loadingIndicator.classList.add('d-none');
+                showAlert('Error searching for veterinarians: ' + error.message, 'danger');
+            });
+    }
+
+    function fetchSearch(searchData) {
+        return fetch(`${API_ENDPOINT}/api/search`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Cache-Control': 'no-cache'
+            },
+            body: JSON.stringify(searchData)
+        })
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Search request failed with status: ' + response.status);
@@ -339,14 +353,126 @@ document.addEventListener('DOMContentLoaded', function() {
                 console.log('Search response received:', data);
                 loadingIndicator.classList.add('d-none');
                 displayResults(data);
-            })
-            .catch(error => {
-                console.error('Error during search:', error);
-                loadingIndicator.classList.add('d-none');
-                showAlert('Error searching for veterinarians: ' + error.message, 'danger');
             });
     }
 
+    function streamSearch(searchData) {
+        const cards = new Map();
+        const startedAt = performance.now();
+        let firstResultLogged = false;
+
+        return fetch(`${API_ENDPOINT}/api/search/stream`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
+                'Cache-Control': 'no-cache'
+            },
+            body: JSON.stringify(searchData)
+        })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Search request failed with status: ' + response.status);
+                }
+                if (!response.body) {
+                    return fetchSearch(searchData);
+                }
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+
+                function handleEvent(event, data) {
+                    if (event === 'results') {
+                        if (!firstResultLogged && data.count > 0) {
+                            firstResultLogged = true;
+                            console.log(`First results from ${data.source} after ${Math.round(performance.now() - startedAt)} ms`);
+                        }
+                        loadingIndicator.classList.add('d-none');
+                        applyResultsUpdate(cards, data);
+                    } else if (event === 'done') {
+                        loadingIndicator.classList.add('d-none');
+                        finishStreamedResults(cards, data);
+                    } else if (event === 'error') {
+                        throw new Error(data.message || data.error);
+                    }
+                }
+
+                function read() {
+                    return reader.read().then(({ done, value }) => {
+                        if (value) {
+                            buffer += decoder.decode(value, { stream: true });
+                        }
+                        let boundary = buffer.indexOf('\n\n');
+                        while (boundary !== -1) {
+                            const frame = buffer.slice(0, boundary);
+                            buffer = buffer.slice(boundary + 2);
+                            const parsed = parseServerSentEvent(frame);
+                            if (parsed) {
+                                handleEvent(parsed.event, parsed.data);
+                            }
+                            boundary = buffer.indexOf('\n\n');
+                        }
+                        if (!done) {
+                            return read();
+                        }
+                    });
+                }
+
+                return read();
+            });
+    }
+
+    function parseServerSentEvent(frame) {
+        let event = 'message';
+        const dataLines = [];
+        frame.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        if (dataLines.length === 0) return null;
+        return { event: event, data: JSON.parse(dataLines.join('\n')) };
+    }
+
+    function applyResultsUpdate(cards, data) {
+        if (!resultsList || !noResultsMessage) return;
+
+        (data.removed || []).forEach(id => {
+            const card = cards.get(id);
+            if (card) card.remove();
+            cards.delete(id);
+        });
+
+        (data.added || []).concat(data.updated || []).forEach(vet => {
+            const id = String(vet.canonical_id || vet.id);
+            const card = createVetCard(vet);
+            const existing = cards.get(id);
+            if (existing) existing.replaceWith(card);
+            cards.set(id, card);
+        });
+
+        (data.order || []).forEach(id => {
+            const card = cards.get(id);
+            if (card) resultsList.appendChild(card);
+        });
+
+        if (cards.size > 0) {
+            resultsList.classList.remove('d-none');
+            noResultsMessage.classList.add('d-none');
+        }
+    }
+
+    function finishStreamedResults(cards, data) {
+        if (cards.size > 0) {
+            showAlert(`Found ${cards.size} veterinarians matching your criteria.`, 'success');
+            return;
+        }
+        displayResults({ recommendations: [], count: 0, data_sources: data.data_sources });
+    }
+
     function getUserCoordinates() {
         return new Promise((resolve) => {
             if (navigator.geolocation) {
@@ -392,9 +518,15 @@ document.addEventListener('DOMContentLoaded', function() {
             resultsList.classList.add('d-none');
             noResultsMessage.classList.remove('d-none');
 
-            if (data.data_sources && data.data_sources.length > 0) {
-                const sourceList = data.data_sources.join(', ');
-                showAlert(`No results found. We checked: ${sourceList}`, 'info');
+            const checkedSources = data.data_sources ? (data.data_sources.enabled || []) : [];
+            const timedOutSources = data.data_sources ? (data.data_sources.timed_out || []) : [];
+            if (checkedSources.length > 0) {
+                const sourceList = checkedSources.join(', ');
+                let message = `No results found. We checked: ${sourceList}`;
+                if (timedOutSources.length > 0) {
+                    message += ` (timed out: ${timedOutSources.join(', ')})`;
+                }
+                showAlert(message, 'info');
             } else {
                 showAlert('No veterinarians found matching your criteria. Try adjusting your search.', 'info');
             }
@@ -645,7 +777,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 location: location,
                 pet_type: petType
             },
-            data_sources: ["demo"],
+            data_sources: { enabled: ["demo"], succeeded: ["demo"], timed_out: [] },
             timestamp: new Date().toISOString()
         };
     }
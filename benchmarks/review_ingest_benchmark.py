@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.yelp_review_index import ReviewIndex
+
+
+def generate_review_file(path: str, reviews: int, businesses: int):
+    rng = random.Random(42)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(reviews):
+            review = {
+                "review_id": f"review-{i}",
+                "user_id": f"user-{rng.randrange(reviews)}",
+                "business_id": f"business-{rng.randrange(businesses)}",
+                "stars": rng.randint(1, 5),
+                "useful": 0,
+                "funny": 0,
+                "cool": 0,
+                "text": "The staff were kind to our dog and explained every step of the visit. " * 4,
+                "date": f"20{rng.randint(10, 21)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00"
+            }
+            f.write(json.dumps(review, separators=(',', ':')) + "\n")
+
+
+def run(review_file: str, worker_counts, business_ids):
+    print(f"Review file: {review_file} ({os.path.getsize(review_file) / (1024 * 1024):.1f} MB)")
+    print(f"{'workers':>8} {'seconds':>9} {'lines/s':>12} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        index = ReviewIndex(os.devnull)
+        started = time.perf_counter()
+        index.build(review_file, business_ids, workers=workers)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {index.lines_read / elapsed:>12.0f} {baseline / elapsed:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark review index ingest from 1 to N worker processes")
+    parser.add_argument("--review-file", help="Yelp review JSONL file (a synthetic one is generated if omitted)")
+    parser.add_argument("--synthetic-reviews", type=int, default=500000)
+    parser.add_argument("--synthetic-businesses", type=int, default=20000)
+    parser.add_argument("--index-fraction", type=float, default=0.05,
+                        help="Fraction of synthetic businesses to index, mimicking the vet subset")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    if args.review_file:
+        run(args.review_file, args.workers, None)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        review_file = os.path.join(tmp_dir, "reviews.json")
+        generate_review_file(review_file, args.synthetic_reviews, args.synthetic_businesses)
+        indexed = int(args.synthetic_businesses * args.index_fraction)
+        business_ids = {f"business-{i}" for i in range(indexed)}
+        run(review_file, args.workers, business_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import time
+
+import pytest
+
+from api import here_api, tomtom_api
+from api.api_manager import APIManager
+from api.circuit_breaker import OPEN, CircuitBreaker
+from api.here_api import HereAPI
+from api.search_context import SearchContext
+from api.tomtom_api import TomTomAPI
+from utils.deadline import Deadline
+
+
+CONTEXT = SearchContext(query="Austin, TX", latitude=30.2672, longitude=-97.7431)
+
+
+class FakeProvider:
+
+    def __init__(self, results=None, error=None, delay=0.0, cut=False):
+        self.results = results or []
+        self.error = error
+        self.delay = delay
+        self.cut = cut
+        self.calls = 0
+
+    def get_all_vets_with_details(self, query, max_results=10, context=None, deadline=None):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        if self.cut:
+            deadline.mark_cut("fake_details", "details skipped")
+        return [dict(item) for item in self.results]
+
+
+def vet(name, lat=30.27, lng=-97.74):
+    return {"name": name, "coordinates": {"latitude": lat, "longitude": lng}, "distance": 1.0,
+            "recommendation_reasons": ["Good rating of 4.0/5 stars", "1.0 miles from search location"]}
+
+
+@pytest.fixture
+def make_manager():
+    managers = []
+
+    def make(providers, source_timeouts=None, **kwargs):
+        manager = APIManager(foursquare_rate_per_second=0, source_timeouts=source_timeouts, **kwargs)
+        manager.enabled_apis = list(providers)
+        for source, provider in providers.items():
+            setattr(manager, source, provider)
+        manager.circuit_breakers = {source: CircuitBreaker(source, min_calls=2, cooldown_seconds=60)
+                                    for source in providers}
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.executor.shutdown(wait=False)
+
+
+def fetch(manager, deadline=None, context=CONTEXT):
+    deadline = deadline or Deadline(manager.search_budget)
+    status = manager._new_source_status()
+    fetchers = manager._source_fetchers(context, 5, deadline)
+    results = dict(manager._iter_source_results(fetchers, deadline, status))
+    return results, status
+
+
+def open_circuit(manager, source):
+    breaker = manager.circuit_breakers[source]
+    for _ in range(breaker.min_calls):
+        breaker.record_failure(0.1, "boom")
+    assert breaker.state == OPEN
+
+
+def test_fresh_cache_hit_is_served_while_the_circuit_is_open(make_manager):
+    provider = FakeProvider([vet("Cached Vet")])
+    manager = make_manager({"tomtom_api": provider})
+    fetch(manager)
+    open_circuit(manager, "tomtom_api")
+
+    results, status = fetch(manager)
+
+    assert [item["name"] for item in results["tomtom_api"]] == ["Cached Vet"]
+    assert status["circuit_open"] == []
+    assert provider.calls == 1
+
+
+def test_cache_hits_are_not_recorded_by_the_breaker(make_manager):
+    manager = make_manager({"tomtom_api": FakeProvider([vet("Cached Vet")])})
+    fetch(manager)
+    fetch(manager)
+    fetch(manager)
+    assert manager.circuit_breakers["tomtom_api"].status()["calls"] == 1
+
+
+def test_cache_miss_with_an_open_circuit_is_skipped(make_manager):
+    provider = FakeProvider([vet("Vet")])
+    manager = make_manager({"tomtom_api": provider})
+    open_circuit(manager, "tomtom_api")
+
+    results, status = fetch(manager)
+
+    assert results == {}
+    assert status["circuit_open"] == ["tomtom_api"]
+    assert provider.calls == 0
+
+
+def test_background_refresh_failures_reach_the_breaker(make_manager):
+    provider = FakeProvider([vet("Vet")])
+    manager = make_manager({"tomtom_api": provider}, provider_cache_ttl=0.01)
+    fetch(manager)
+    provider.error = RuntimeError("refresh failed")
+    time.sleep(0.05)
+
+    results, _ = fetch(manager)
+    manager.executor.shutdown(wait=True)
+
+    assert [item["name"] for item in results["tomtom_api"]] == ["Vet"]
+    status = manager.circuit_breakers["tomtom_api"].status()
+    assert status["calls"] == 2
+    assert status["last_error"] == "refresh failed"
+
+
+def test_results_cut_short_are_not_cached(make_manager):
+    provider = FakeProvider([vet("Vet")], cut=True)
+    manager = make_manager({"tomtom_api": provider})
+    deadline = Deadline(manager.search_budget)
+
+    results, _ = fetch(manager, deadline=deadline)
+    fetch(manager)
+
+    assert [item["name"] for item in results["tomtom_api"]] == ["Vet"]
+    assert deadline.cut_short[0]["stage"] == "fake_details"
+    assert provider.calls == 2
+    assert manager.get_cache_stats()["tomtom_api"]["partial"] == 2
+    assert len(manager.provider_cache) == 0
+
+
+def test_cache_hit_recomputes_distance_for_the_caller(make_manager):
+    manager = make_manager({"tomtom_api": FakeProvider([vet("Vet", lat=30.2900, lng=-97.7431)])})
+    fetch(manager)
+    nearby = SearchContext(query="Austin, TX", latitude=30.2660, longitude=-97.7431)
+    assert manager.provider_cache.tile_for(nearby) == manager.provider_cache.tile_for(CONTEXT)
+
+    results, _ = fetch(manager, context=nearby)
+
+    item = results["tomtom_api"][0]
+    assert item["distance"] == 1.7
+    assert item["recommendation_reasons"] == ["Good rating of 4.0/5 stars", "1.7 miles from search location"]
+
+
+def test_providers_skip_geocoding_when_the_context_failed(monkeypatch):
+    geocoded = []
+    monkeypatch.setattr(tomtom_api, "geocode_location", lambda *args, **kwargs: geocoded.append(args) or (None, None))
+    monkeypatch.setattr(here_api, "geocode", lambda *args, **kwargs: geocoded.append(args) or (None, None))
+    context = SearchContext(query="Nowhere Special", geocode_failed=True)
+
+    assert TomTomAPI(api_key="key").get_all_vets_with_details(context.query, context=context) == []
+    assert HereAPI(api_key="key").get_all_vets_with_details(context.query, context=context) == []
+    assert geocoded == []
+
+
+def test_stream_keeps_the_first_emitted_canonical_id(make_manager):
+    tomtom = FakeProvider([dict(vet("Riverside Animal Clinic"), id="z1", phone="5125550100")])
+    here = FakeProvider([dict(vet("Riverside Animal Clinic"), id="a1", phone="5125550100")], delay=0.2)
+    manager = make_manager({"tomtom_api": tomtom, "here_api": here}, provider_cache_ttl=0)
+
+    batches = [(source, [record["canonical_id"] for record in records])
+               for source, records, _ in manager.iter_combined_data("30.2672,-97.7431")]
+
+    assert [source for source, _ in batches] == ["tomtom_api", "here_api"]
+    assert batches[0][1] == batches[1][1]
+    assert len(batches[1][1]) == 1
+
+
+def test_fan_out_returns_partial_results_when_one_source_is_slow_and_one_fails(make_manager):
+    manager = make_manager({
+        "tomtom_api": FakeProvider([vet("Fast Vet")]),
+        "here_api": FakeProvider([vet("Slow Vet", lat=30.30)], delay=1.0),
+        "foursquare_api": FakeProvider(error=RuntimeError("502 from provider")),
+    }, source_timeouts={"here_api": 0.2}, provider_cache_ttl=0)
+
+    started = time.monotonic()
+    data, status = manager.get_combined_data_with_status("30.2672,-97.7431", max_results_per_source=5)
+
+    assert time.monotonic() - started < 0.8
+    assert [item["name"] for item in data] == ["Fast Vet"]
+    assert status["succeeded"] == ["tomtom_api"]
+    assert status["failed"] == ["foursquare_api"]
+    assert status["timed_out"] == ["here_api"]
+    assert [cut["stage"] for cut in status["cut_short"]] == ["here_api"]
+    assert status["coalesced"] is False
+
+
+def test_fan_out_falls_back_to_mock_data_when_every_source_misses(make_manager):
+    manager = make_manager({
+        "here_api": FakeProvider([vet("Slow Vet")], delay=1.0),
+        "foursquare_api": FakeProvider(error=RuntimeError("502 from provider")),
+    }, source_timeouts={"here_api": 0.2}, provider_cache_ttl=0)
+
+    data, status = manager.get_combined_data_with_status("30.2672,-97.7431", max_results_per_source=3)
+
+    assert data and all(item["source"] == "mock_data" for item in data)
+    assert status["succeeded"] == []
+    assert status["failed"] == ["foursquare_api"]
+    assert status["timed_out"] == ["here_api"]
+
+
+def test_streamed_batches_arrive_before_the_slow_source_times_out(make_manager):
+    manager = make_manager({
+        "tomtom_api": FakeProvider([vet("Fast Vet")]),
+        "here_api": FakeProvider([vet("Slow Vet", lat=30.30)], delay=1.0),
+        "foursquare_api": FakeProvider(error=RuntimeError("502 from provider")),
+    }, source_timeouts={"here_api": 0.2}, provider_cache_ttl=0)
+
+    started = time.monotonic()
+    batches = []
+    for source, records, status in manager.iter_combined_data("30.2672,-97.7431", max_results_per_source=5):
+        batches.append((source, [record["name"] for record in records], time.monotonic() - started))
+
+    assert [(source, names) for source, names, _ in batches] == [("tomtom_api", ["Fast Vet"])]
+    assert batches[0][2] < 0.2
+    assert status["timed_out"] == ["here_api"] and status["failed"] == ["foursquare_api"]
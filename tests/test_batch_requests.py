@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from utils import api_utils
+from utils.api_utils import batch_api_requests
+from utils.deadline import Deadline
+
+
+@pytest.fixture
+def fake_requests(monkeypatch):
+    delays = {}
+    failures = set()
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def make_api_request(url, **kwargs):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        try:
+            time.sleep(delays.get(url, 0.01))
+            if url in failures:
+                raise RuntimeError("connection reset")
+            return {"url": url, "params": kwargs.get("params")}
+        finally:
+            with lock:
+                active["now"] -= 1
+
+    monkeypatch.setattr(api_utils, "make_api_request", make_api_request)
+    return delays, failures, active
+
+
+def test_results_keep_input_order(fake_requests):
+    delays, _, active = fake_requests
+    urls = [f"https://example.test/{i}" for i in range(6)]
+    delays.update({urls[0]: 0.15, urls[1]: 0.1, urls[2]: 0.05})
+
+    results = batch_api_requests(urls, params_list=[{"i": i} for i in range(6)], max_concurrent=3)
+
+    assert [result["url"] for result in results] == urls
+    assert [result["params"] for result in results] == [{"i": i} for i in range(6)]
+    assert active["peak"] <= 3
+
+
+def test_one_failure_does_not_affect_the_others(fake_requests):
+    _, failures, _ = fake_requests
+    urls = [f"https://example.test/{i}" for i in range(3)]
+    failures.add(urls[1])
+
+    results = batch_api_requests(urls)
+
+    assert results[0]["url"] == urls[0] and results[2]["url"] == urls[2]
+    assert "connection reset" in results[1]["error"]
+
+
+def test_requests_past_the_deadline_are_reported(fake_requests):
+    delays, _, _ = fake_requests
+    urls = [f"https://example.test/{i}" for i in range(3)]
+    delays[urls[2]] = 1.0
+
+    started = time.monotonic()
+    results = batch_api_requests(urls, deadline=Deadline(0.2))
+
+    assert time.monotonic() - started < 0.6
+    assert [result["url"] for result in results[:2]] == urls[:2]
+    assert results[2]["deadline_exceeded"] is True
+
+
+def test_mismatched_params_list_is_rejected(fake_requests):
+    results = batch_api_requests(["https://example.test/a", "https://example.test/b"], params_list=[{}])
+    assert len(results) == 2
+    assert all("same length" in result["error"] for result in results)
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from utils.block_storage import (BlockCompressedFile, PlainLineFile, READ_CHUNK_SIZE, compress_file,
+                                 open_block_compressed, open_line_file)
+
+
+def write_lines(path, lines):
+    data = b''.join(lines)
+    path.write_bytes(data)
+    return data
+
+
+def line_offsets(lines):
+    offsets, offset = [], 0
+    for line in lines:
+        offsets.append(offset)
+        offset += len(line)
+    return offsets
+
+
+@pytest.fixture
+def lines():
+    return [f'{{"review_id": "r{i}", "text": "{"x" * (i % 37)}"}}\n'.encode() for i in range(2000)]
+
+
+def test_plain_line_file_reads_lines_at_offsets(tmp_path, lines):
+    path = tmp_path / "reviews.json"
+    write_lines(path, lines)
+    line_file = PlainLineFile(str(path))
+    try:
+        assert list(line_file.iter_lines()) == list(zip(line_offsets(lines), lines))
+        for offset, line in list(zip(line_offsets(lines), lines))[::97]:
+            assert line_file.read_line_at(offset) == line
+    finally:
+        line_file.close()
+
+
+def test_plain_line_file_reads_lines_longer_than_a_chunk(tmp_path):
+    long_line = b'{"text": "' + b'y' * (READ_CHUNK_SIZE * 2 + 17) + b'"}\n'
+    lines = [b'{"a": 1}\n', long_line, b'{"b": 2}']
+    path = tmp_path / "long.json"
+    write_lines(path, lines)
+    line_file = PlainLineFile(str(path))
+    try:
+        offsets = line_offsets(lines)
+        assert line_file.read_line_at(offsets[1]) == long_line
+        assert line_file.read_line_at(offsets[2]) == b'{"b": 2}'
+    finally:
+        line_file.close()
+
+
+def test_plain_line_file_concurrent_reads(tmp_path, lines):
+    path = tmp_path / "reviews.json"
+    write_lines(path, lines)
+    line_file = PlainLineFile(str(path))
+    pairs = list(zip(line_offsets(lines), lines))
+    mismatches = []
+
+    def read_all(shift):
+        for offset, line in pairs[shift:] + pairs[:shift]:
+            if line_file.read_line_at(offset) != line:
+                mismatches.append(offset)
+
+    threads = [threading.Thread(target=read_all, args=(shift * 250,)) for shift in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    line_file.close()
+    assert mismatches == []
+
+
+def test_block_compressed_round_trip(tmp_path, lines):
+    source = tmp_path / "reviews.json"
+    data = write_lines(source, lines)
+    target = compress_file(str(source), block_size=4096)
+
+    compressed = open_line_file(target)
+    try:
+        assert isinstance(compressed, BlockCompressedFile)
+        assert compressed.size == len(data)
+        assert len(compressed.split_points()) > 2
+        assert list(compressed.iter_lines()) == list(zip(line_offsets(lines), lines))
+        for offset, line in zip(line_offsets(lines), lines):
+            assert compressed.read_line_at(offset) == line
+        assert compressed.read_line_at(len(data)) == b''
+    finally:
+        compressed.close()
+
+    with open_block_compressed(target, 'r') as text_lines:
+        assert ''.join(text_lines) == data.decode()
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.endswith('.tmp')) == []
+
+
+def test_block_compressed_iter_lines_range(tmp_path, lines):
+    source = tmp_path / "reviews.json"
+    write_lines(source, lines)
+    compressed = BlockCompressedFile(compress_file(str(source), block_size=4096))
+    plain = PlainLineFile(str(source))
+    try:
+        offsets = line_offsets(lines)
+        start, end = offsets[300], offsets[1200]
+        assert list(compressed.iter_lines(start, end)) == list(plain.iter_lines(start, end))
+    finally:
+        compressed.close()
+        plain.close()
@@ -0,0 +1,94 @@
+import time
+
+from api.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def open_breaker(cooldown_seconds=0.05):
+    breaker = CircuitBreaker("tomtom_api", window_size=10, min_calls=4, failure_threshold=0.5,
+                             cooldown_seconds=cooldown_seconds)
+    for _ in range(4):
+        breaker.record_failure(0.1, "HTTP 500")
+    return breaker
+
+
+def test_stays_closed_below_min_calls_and_threshold():
+    breaker = CircuitBreaker("here_api", window_size=10, min_calls=4, failure_threshold=0.5)
+    for _ in range(3):
+        breaker.record_failure(0.1, "timeout")
+    assert breaker.state == CLOSED
+
+    breaker = CircuitBreaker("here_api", window_size=10, min_calls=4, failure_threshold=0.5)
+    for _ in range(4):
+        breaker.record_success(0.1)
+    for _ in range(3):
+        breaker.record_failure(0.1, "timeout")
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_opens_on_error_rate_and_skips_requests():
+    breaker = open_breaker(cooldown_seconds=30)
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    status = breaker.status()
+    assert status["times_opened"] == 1
+    assert status["skipped"] == 1
+    assert status["last_error"] == "HTTP 500"
+    assert 0 < status["retry_in_seconds"] <= 30
+
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker("foursquare_api", window_size=10, min_calls=4, slow_call_seconds=1.0,
+                             slow_call_threshold=0.75)
+    for _ in range(4):
+        breaker.record_success(2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes_the_circuit():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_or_slow_probe_reopens():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure(0.1, "HTTP 503")
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success(breaker.slow_call_seconds + 1)
+    assert breaker.state == OPEN
+
+
+def test_released_probe_allows_another():
+    breaker = open_breaker(cooldown_seconds=0.05)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_abandoned_probe_expires_after_cooldown():
+    breaker = open_breaker(cooldown_seconds=0.05)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    time.sleep(0.06)
+    assert breaker.allow_request()
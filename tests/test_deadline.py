@@ -0,0 +1,54 @@
+import math
+import time
+
+from utils.deadline import Deadline
+
+
+def test_unbounded_deadline():
+    deadline = Deadline()
+    assert deadline.remaining() == math.inf
+    assert deadline.seconds() is None
+    assert not deadline.expired()
+    assert deadline.timeout(8.0) == 8.0
+
+
+def test_remaining_and_timeout():
+    deadline = Deadline(1.0)
+    assert 0.9 < deadline.remaining() <= 1.0
+    assert deadline.timeout(8.0) <= 1.0
+    assert deadline.timeout(0.2) == 0.2
+    assert deadline.can_fit(0.5)
+    assert not deadline.can_fit(2.0)
+
+
+def test_expired_deadline():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+    assert deadline.seconds() == 0.0
+
+
+def test_child_is_capped_by_parent():
+    parent = Deadline(0.5)
+    assert parent.child(10.0).at == parent.at
+    assert parent.child(0.1).remaining() <= 0.1
+    assert Deadline().child(0.1).remaining() <= 0.1
+    assert Deadline().child().seconds() is None
+
+
+def test_child_shares_cut_short_log():
+    parent = Deadline(1.0)
+    child = parent.child(0.1)
+    child.mark_cut("foursquare_api", "provider fetch abandoned at its deadline")
+    parent.mark_cut("geocoding", "Nominatim lookup skipped")
+
+    assert [entry["stage"] for entry in parent.cut_short] == ["foursquare_api", "geocoding"]
+    assert child.cut_short == parent.cut_short
+    assert all(entry["at_ms"] >= 0 for entry in parent.cut_short)
+
+
+def test_cut_short_returns_a_copy():
+    deadline = Deadline(1.0)
+    deadline.cut_short.append({"stage": "x"})
+    assert deadline.cut_short == []
@@ -0,0 +1,74 @@
+from api.entity_resolution import EntityResolver, core_name_tokens, name_similarity, normalize_phone
+
+
+def vet(name, lat, lng, phone=""):
+    return {"name": name, "phone": phone, "coordinates": {"latitude": lat, "longitude": lng}}
+
+
+def clusters_of(resolver, records):
+    return sorted(sorted(cluster) for cluster in resolver.resolve(records))
+
+
+def test_helpers():
+    assert normalize_phone("+1 (217) 555-0100") == "2175550100"
+    assert normalize_phone("555") == ""
+    assert core_name_tokens("The Springfield Animal Hospital, DVM") == {"springfield"}
+    assert name_similarity({"a", "b"}, {"a", "c"}) == 1 / 3
+
+
+def test_name_match_requires_proximity():
+    records = [
+        vet("Springfield Animal Hospital", 39.7800, -89.6500),
+        vet("Springfield Animal Hosp.", 39.7801, -89.6501),
+        vet("Springfield Animal Hospital", 39.9000, -89.6500),
+    ]
+    resolver = EntityResolver()
+    assert clusters_of(resolver, records) == [[0, 1], [2]]
+    assert resolver.last_stats.name_matches == 1
+
+
+def test_phone_match_within_phone_distance():
+    records = [
+        vet("Lincoln Park Vet", 39.7800, -89.6500, "(217) 555-0100"),
+        vet("LP Veterinary Clinic", 39.7850, -89.6550, "+1 217 555 0100"),
+        vet("Capitol Pet Care", 39.8000, -89.7000, "217-555-0100"),
+    ]
+    resolver = EntityResolver()
+    assert clusters_of(resolver, records) == [[0, 1], [2]]
+    assert resolver.last_stats.phone_matches == 1
+
+
+def test_matches_are_transitive():
+    records = [
+        vet("Oak Ridge Animal Clinic", 39.7800, -89.6500, "2175550111"),
+        vet("Oak Ridge Vet", 39.7801, -89.6500),
+        vet("Oak Ridge Veterinary Hospital", 39.7802, -89.6500, "2175550111"),
+    ]
+    assert clusters_of(EntityResolver(), records) == [[0, 1, 2]]
+
+
+def test_different_names_nearby_stay_apart():
+    records = [
+        vet("Banfield Pet Hospital", 39.7800, -89.6500),
+        vet("VCA Animal Hospital", 39.7800, -89.6500),
+    ]
+    assert clusters_of(EntityResolver(), records) == [[0], [1]]
+
+
+def test_unscorable_records_are_kept_as_singletons():
+    records = [
+        vet("Springfield Animal Hospital", 39.7800, -89.6500),
+        {"name": "No Coordinates Vet", "coordinates": {}},
+        vet("", 39.7800, -89.6500),
+    ]
+    resolver = EntityResolver()
+    assert clusters_of(resolver, records) == [[0], [1], [2]]
+    assert resolver.last_stats.skipped == 2
+    assert resolver.last_stats.clusters == 3
+
+
+def test_oversized_blocks_are_skipped():
+    records = [vet("Springfield Animal Hospital", 39.78, -89.65) for _ in range(5)]
+    resolver = EntityResolver(max_block_size=3)
+    assert clusters_of(resolver, records) == [[0], [1], [2], [3], [4]]
+    assert resolver.last_stats.oversized_blocks >= 1
@@ -0,0 +1,54 @@
+import os
+
+from utils import fingerprint
+from utils.fingerprint import CHANGED, UNCHANGED, compare_fingerprint, file_fingerprint
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def write_large_file(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'{"review_id": "r"}\n' * (size // 19))
+    return str(path)
+
+
+def test_fingerprint_reads_a_bounded_sample_of_large_files(tmp_path, monkeypatch):
+    path = write_large_file(tmp_path / "reviews.json", 32 * 1024 * 1024)
+    hashed = []
+    original = fingerprint._hash_range
+    monkeypatch.setattr(fingerprint, "_hash_range",
+                        lambda p, start, end: hashed.append(end - start) or original(p, start, end))
+
+    result = file_fingerprint(path)
+
+    assert "sha1" not in result
+    assert sum(hashed) <= 2 * fingerprint.SAMPLE_BYTES
+
+
+def test_touched_file_is_unchanged(tmp_path):
+    path = write_large_file(tmp_path / "reviews.json", 4 * 1024 * 1024)
+    saved = file_fingerprint(path)
+    bump_mtime(path)
+    assert compare_fingerprint(saved, path) == UNCHANGED
+
+
+def test_in_place_edit_in_a_spot_checked_block_is_changed(tmp_path):
+    path = write_large_file(tmp_path / "reviews.json", 4 * 1024 * 1024)
+    saved = file_fingerprint(path)
+    offsets = fingerprint._spot_check_offsets(os.path.getsize(path))
+    with open(path, 'r+b') as f:
+        f.seek(offsets[len(offsets) // 2] + 10)
+        f.write(b'X')
+    bump_mtime(path)
+    assert compare_fingerprint(saved, path) == CHANGED
+
+
+def test_legacy_fingerprint_without_spot_check_is_changed(tmp_path):
+    path = write_large_file(tmp_path / "reviews.json", 1024 * 1024)
+    saved = file_fingerprint(path)
+    del saved["spot_sha1"]
+    bump_mtime(path)
+    assert compare_fingerprint(saved, path) == CHANGED
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from utils import api_utils
+from utils.api_utils import _hedged_get
+from utils.hedging import HedgingPolicy
+
+
+class FakeResponse:
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+
+    def __init__(self, behaviours):
+        self.behaviours = list(behaviours)
+        self.responses = []
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        with self._lock:
+            delay, error = self.behaviours.pop(0)
+            name = f"call{len(self.responses)}"
+            response = FakeResponse(name)
+            self.responses.append(response)
+            self.threads.append(threading.current_thread().name)
+        time.sleep(delay)
+        if error:
+            raise error
+        return response
+
+
+def warmed_policy(latency=0.02, **kwargs):
+    policy = HedgingPolicy("test", budget_ratio=1.0, min_samples=5, **kwargs)
+    for _ in range(5):
+        policy.record_request(latency)
+    return policy
+
+
+def hedged_get(session, policy):
+    return _hedged_get(session, "https://example.test/search", None, None, 5, policy, None,
+                       logging.getLogger(__name__))
+
+
+def test_no_delay_until_enough_samples():
+    policy = HedgingPolicy("test", min_samples=3)
+    policy.record_request(0.1)
+    policy.record_request(0.2)
+    assert policy.hedge_delay() is None
+    policy.record_request(0.3)
+    assert policy.hedge_delay() == 0.3
+
+
+def test_delay_uses_the_configured_percentile():
+    policy = HedgingPolicy("test", percentile=0.9, min_samples=20)
+    for i in range(1, 21):
+        policy.record_request(i / 100)
+    assert policy.hedge_delay() == pytest.approx(0.19)
+    policy.percentile = 0.5
+    assert policy.hedge_delay() == pytest.approx(0.11)
+
+
+def test_delay_is_clamped():
+    assert warmed_policy(latency=0.001, min_delay=0.05).hedge_delay() == 0.05
+    assert warmed_policy(latency=2.0, max_delay=0.5).hedge_delay() == 0.5
+
+
+def test_hedges_respect_the_budget():
+    policy = HedgingPolicy("test", budget_ratio=0.1)
+    for _ in range(10):
+        policy.record_request(0.01)
+    assert policy.try_hedge()
+    assert not policy.try_hedge()
+    assert policy.stats()["budget_denied"] == 1
+
+
+def test_without_a_delay_the_primary_runs_on_the_calling_thread(monkeypatch):
+    monkeypatch.setattr(api_utils, "_hedge_executor", None)
+    session = FakeSession([(0, None)])
+
+    response = hedged_get(session, HedgingPolicy("test"))
+
+    assert response.name == "call0"
+    assert session.threads == [threading.current_thread().name]
+
+
+def test_fast_primary_never_sends_the_hedge():
+    session = FakeSession([(0, None)])
+    policy = warmed_policy(latency=0.05)
+
+    response = hedged_get(session, policy)
+    time.sleep(0.1)
+
+    assert response.name == "call0"
+    assert session.threads == [threading.current_thread().name]
+    assert policy.stats()["hedged"] == 0
+
+
+def test_losing_hedge_response_is_closed():
+    session = FakeSession([(0.2, None), (0.3, None)])
+    policy = warmed_policy(latency=0.02)
+
+    response = hedged_get(session, policy)
+    deadline = time.monotonic() + 2
+    while len(session.responses) < 2 or not session.responses[1].closed:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert response.name == "call0" and not response.closed
+    assert session.threads[0] == threading.current_thread().name
+    assert session.threads[1].startswith("api-hedge")
+    assert policy.stats()["primary_wins"] == 1
+
+
+def test_hedge_takes_over_when_the_primary_fails():
+    session = FakeSession([(0.1, ConnectionError("reset")), (0, None)])
+    policy = warmed_policy(latency=0.02)
+
+    response = hedged_get(session, policy)
+
+    assert response.name == "call1"
+    assert policy.stats()["hedge_wins"] == 1
+
+
+def test_primary_error_is_raised_when_no_hedge_was_sent():
+    session = FakeSession([(0, ConnectionError("reset"))])
+    with pytest.raises(ConnectionError):
+        hedged_get(session, warmed_policy(latency=0.5))
@@ -0,0 +1,56 @@
+from analysis.data_connector import VetDataConnector
+from api.api_manager import APIManager
+
+
+def normalize(records):
+    manager = APIManager()
+    try:
+        return manager._normalize_data_fields(records)
+    finally:
+        manager.executor.shutdown(wait=False)
+
+
+def test_provider_payload_shapes():
+    records = [
+        {"id": "g1", "name": "Geometry Vet", "source": "mock", "rating": 9,
+         "geometry": {"location": {"lat": 39.78, "lng": -89.65}}, "formatted_address": "1 Main St",
+         "website": "https://example.com", "categories": "Veterinarian, Avian", "distance": 3218.68},
+        {"id": "p1", "name": "Position Vet", "source": "tomtom_api", "position": {"lat": 39.79, "lng": -89.66},
+         "location": {"display_address": ["2 Elm St", "Springfield, IL"]},
+         "categories": [{"title": "Dentistry"}, "Surgery"], "reviews": "not a list", "review_summary": {}},
+        {},
+    ]
+    first, second = normalize(records)
+
+    assert first["coordinates"] == {"latitude": 39.78, "longitude": -89.65}
+    assert first["address"] == "1 Main St"
+    assert first["rating"] == 4.5
+    assert first["url"] == "https://example.com"
+    assert first["categories"] == ["Veterinarian", "Avian"]
+    assert first["handles_exotic"] is True
+    assert first["distance"] == 2.0
+
+    assert second["coordinates"] == {"latitude": 39.79, "longitude": -89.66}
+    assert second["address"] == "2 Elm St, Springfield, IL"
+    assert second["categories"] == ["Dentistry", "Surgery"]
+    assert second["reviews"] == []
+    assert second["price"] == "$$"
+    assert "review_summary" not in second and "distance" not in second
+
+
+def test_convert_to_dataframe_skips_bad_rows():
+    connector = VetDataConnector()
+    records = normalize([
+        {"id": "a", "name": "A", "source": "here_api", "rating": 4, "coordinates": {"latitude": 1, "longitude": 2},
+         "review_summary": {"weighted_rating": 4.2, "sentiment_mean": 0.3}},
+        {"id": "b", "name": "B", "source": "here_api", "coordinates": {"latitude": 3, "longitude": 4}},
+    ])
+    records.append({"id": "bad", "rating": "not a number"})
+
+    df = connector.convert_to_dataframe(records)
+
+    assert df["id"].tolist() == ["a", "b"]
+    assert df["weighted_rating"].tolist() == [4.2, 0.0]
+    assert df["sources"].tolist() == [["here_api"], ["here_api"]]
+    assert df["latitude"].tolist() == [1, 3]
+    assert connector.convert_to_dataframe([]).empty
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from utils.rate_limit import SharedTokenBucket, TokenBucket, create_rate_limiter, fcntl
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_token_bucket_spends_capacity_then_reports_wait():
+    bucket = TokenBucket(rate=10, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait_seconds = bucket.try_acquire()
+    assert 0 < wait_seconds <= 0.1
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(rate=50, capacity=1)
+    assert bucket.try_acquire() == 0.0
+    time.sleep(0.05)
+    assert bucket.try_acquire() == 0.0
+
+
+def test_token_bucket_acquire_times_out():
+    bucket = TokenBucket(rate=1, capacity=1)
+    bucket.drain()
+    started = time.monotonic()
+    assert not bucket.acquire(timeout=0.1)
+    assert time.monotonic() - started < 0.5
+    assert TokenBucket(rate=20, capacity=1).acquire(timeout=0.1)
+
+
+@pytest.mark.skipif(fcntl is None, reason="shared buckets need fcntl")
+def test_shared_buckets_share_state(tmp_path):
+    first = SharedTokenBucket("foursquare api", rate=1, capacity=2, state_dir=str(tmp_path))
+    second = SharedTokenBucket("foursquare api", rate=1, capacity=2, state_dir=str(tmp_path))
+    try:
+        assert first.path == second.path
+        assert first.try_acquire() == 0.0
+        assert second.try_acquire() == 0.0
+        assert first.try_acquire() > 0
+        assert second.try_acquire() > 0
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.mark.skipif(fcntl is None, reason="shared buckets need fcntl")
+def test_shared_bucket_drain(tmp_path):
+    bucket = SharedTokenBucket("here", rate=1, capacity=5, state_dir=str(tmp_path))
+    other = SharedTokenBucket("here", rate=1, capacity=5, state_dir=str(tmp_path))
+    try:
+        bucket.drain()
+        assert other.try_acquire() > 0
+    finally:
+        bucket.close()
+        other.close()
+
+
+def test_create_rate_limiter(tmp_path):
+    limiter = create_rate_limiter("tomtom", 5, state_dir=str(tmp_path))
+    assert isinstance(limiter, SharedTokenBucket if fcntl is not None else TokenBucket)
+    assert type(create_rate_limiter("tomtom", 5, shared=False)) is TokenBucket
+    if isinstance(limiter, SharedTokenBucket):
+        limiter.close()
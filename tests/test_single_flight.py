@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import SingleFlight, SingleFlightTimeout
+
+
+def start_leader(flight, key, release, result="value"):
+    started = threading.Event()
+    outcome = {}
+
+    def fn():
+        started.set()
+        release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def run():
+        try:
+            outcome['value'] = flight.do(key, fn)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait(5)
+    return thread, outcome
+
+
+def test_single_call_runs_once():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 42) == (42, False)
+    assert flight.stats() == {"executed": 1, "coalesced": 0, "timed_out": 0, "in_flight": 0}
+
+
+def test_concurrent_callers_share_the_leader_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, outcome = start_leader(flight, "austin", release)
+    results = []
+    followers = [threading.Thread(target=lambda: results.append(flight.do("austin", lambda: "other")))
+                 for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while flight.stats()["coalesced"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert outcome['value'] == ("value", False)
+    assert results == [("value", True)] * 3
+    assert flight.in_flight() == 0
+
+
+def test_follower_receives_leader_error():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, outcome = start_leader(flight, "key", release, result=RuntimeError("boom"))
+    errors = []
+
+    def follow():
+        try:
+            flight.do("key", lambda: None)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    while flight.stats()["coalesced"] < 1:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+    assert isinstance(outcome['error'], RuntimeError)
+    assert errors == ["boom"]
+
+
+def test_follower_times_out_without_blocking_the_leader():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader, outcome = start_leader(flight, "key", release)
+
+    started = time.monotonic()
+    with pytest.raises(SingleFlightTimeout):
+        flight.do("key", lambda: None, timeout=0.05)
+    assert time.monotonic() - started < 1.0
+
+    release.set()
+    leader.join()
+    assert outcome['value'] == ("value", False)
+    assert flight.stats()["timed_out"] == 1
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()["coalesced"] == 0
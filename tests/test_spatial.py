@@ -0,0 +1,58 @@
+import math
+import numpy as np
+import pytest
+
+from utils.spatial import GridIndex, bounding_box, haversine_miles, haversine_miles_array
+
+
+def test_haversine_known_distance():
+    assert haversine_miles(40.7128, -74.0060, 34.0522, -118.2437) == pytest.approx(2445.6, abs=2.0)
+    assert haversine_miles(39.78, -89.65, 39.78, -89.65) == 0.0
+
+
+def test_haversine_array_matches_scalar():
+    latitudes = np.array([39.7, 39.9, 40.5, -33.9])
+    longitudes = np.array([-89.6, -89.4, -88.0, 151.2])
+    distances = haversine_miles_array(39.78, -89.65, latitudes, longitudes)
+    expected = [haversine_miles(39.78, -89.65, lat, lng) for lat, lng in zip(latitudes, longitudes)]
+    assert distances.tolist() == pytest.approx(expected)
+
+
+def test_bounding_box_contains_radius():
+    min_lat, min_lng, max_lat, max_lng = bounding_box(39.78, -89.65, 10)
+    assert haversine_miles(39.78, -89.65, max_lat, -89.65) == pytest.approx(10, rel=0.01)
+    assert haversine_miles(39.78, -89.65, 39.78, max_lng) >= 10
+    assert min_lat < 39.78 < max_lat and min_lng < -89.65 < max_lng
+
+
+def test_query_radius_matches_brute_force():
+    rng = np.random.default_rng(7)
+    latitudes = 39.78 + rng.uniform(-1, 1, 500)
+    longitudes = -89.65 + rng.uniform(-1, 1, 500)
+    index = GridIndex(latitudes, longitudes, cell_size=0.1)
+
+    results = index.query_radius(39.78, -89.65, 15)
+
+    expected = sorted((haversine_miles(39.78, -89.65, lat, lng), row)
+                      for row, (lat, lng) in enumerate(zip(latitudes, longitudes))
+                      if haversine_miles(39.78, -89.65, lat, lng) <= 15)
+    assert [row for row, _ in results] == [row for _, row in expected]
+    assert [distance for _, distance in results] == pytest.approx([distance for distance, _ in expected])
+
+
+def test_grid_skips_missing_coordinates():
+    index = GridIndex([39.78, math.nan, 39.79], [-89.65, -89.65, math.nan])
+    assert len(index) == 1
+    assert index.query_radius(39.78, -89.65, 1) == [(0, 0.0)]
+
+
+def test_query_radius_with_no_candidates():
+    index = GridIndex([39.78], [-89.65])
+    assert index.query_radius(10.0, 10.0, 5) == []
+    assert len(GridIndex([], []).candidates(39.78, -89.65, 5)) == 0
+
+
+def test_large_radius_scans_cells():
+    index = GridIndex([39.78, 41.88, 30.27], [-89.65, -87.63, -97.74], cell_size=0.01)
+    rows = [row for row, _ in index.query_radius(39.78, -89.65, 200)]
+    assert rows == [0, 1]
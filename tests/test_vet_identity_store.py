@@ -0,0 +1,142 @@
+import copy
+
+import pytest
+
+from api.api_manager import APIManager
+from api.vet_identity_store import VetIdentityStore, canonical_id_for
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VetIdentityStore(str(tmp_path / "vet_identity.sqlite"))
+    yield store
+    store.close()
+
+
+def test_canonical_id_is_stable():
+    assert canonical_id_for(("yelp_dataset", "abc")) == canonical_id_for(("yelp_dataset", "abc"))
+    assert canonical_id_for(("yelp_dataset", "abc")) != canonical_id_for(("here_api", "abc"))
+    assert canonical_id_for(("yelp_dataset", "abc")).startswith("vet_")
+
+
+def test_save_and_lookup(store):
+    store.save({("yelp_dataset", "y1"): "vet_a", ("here_api", "h1"): "vet_a"},
+               {"vet_a": {"name": "Springfield Animal Hospital"}})
+    assert store.lookup_many([("yelp_dataset", "y1"), ("here_api", "h1"), ("tomtom_api", "t1")]) == {
+        ("yelp_dataset", "y1"): "vet_a", ("here_api", "h1"): "vet_a"}
+    assert store.get_records(["vet_a", "vet_missing"]) == {"vet_a": {"name": "Springfield Animal Hospital"}}
+    assert len(store) == 1
+
+
+def test_merge_moves_identities_and_drops_old_record(store):
+    store.save({("yelp_dataset", "y1"): "vet_a", ("here_api", "h1"): "vet_b"},
+               {"vet_a": {"name": "A"}, "vet_b": {"name": "B"}})
+    store.save({("tomtom_api", "t1"): "vet_a"}, {"vet_a": {"name": "A merged"}}, merged_ids={"vet_b": "vet_a"})
+
+    found = store.lookup_many([("yelp_dataset", "y1"), ("here_api", "h1"), ("tomtom_api", "t1")])
+    assert set(found.values()) == {"vet_a"}
+    assert store.get_records(["vet_a", "vet_b"]) == {"vet_a": {"name": "A merged"}}
+    assert len(store) == 1
+
+
+def test_lookup_many_chunks_large_requests(store):
+    keys = [("here_api", f"h{i}") for i in range(VetIdentityStore.SQLITE_MAX_VARIABLES + 10)]
+    store.save({key: f"vet_{key[1]}" for key in keys}, {})
+    assert len(store.lookup_many(keys)) == len(keys)
+
+
+def test_lookup_many_stays_under_the_sqlite_variable_limit(store):
+    keys = [("here_api", f"h{i}") for i in range(1200)]
+    store.save({key: f"vet_{key[1]}" for key in keys}, {})
+    statements = []
+    store._connection().set_trace_callback(statements.append)
+
+    assert len(store.lookup_many(keys)) == len(keys)
+
+    selects = [statement for statement in statements if statement.startswith("SELECT")]
+    assert len(selects) == 3
+    assert max(statement.count("?") for statement in selects) <= 999
+
+
+def test_clear(store):
+    store.save({("here_api", "h1"): "vet_a"}, {"vet_a": {"name": "A"}})
+    store.clear()
+    assert store.lookup_many([("here_api", "h1")]) == {}
+    assert len(store) == 0
+
+
+def provider_vet(source, source_id, name, lat, lng, phone="", distance=1.0):
+    return {"id": source_id, "source": source, "name": name, "phone": phone, "distance": distance,
+            "coordinates": {"latitude": lat, "longitude": lng}}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = APIManager(identity_store_path=str(tmp_path / "vet_identity.sqlite"))
+    saves = []
+    save = manager.identity_store.save
+
+    def recording_save(assignments, records, merged_ids=None):
+        saves.append((dict(assignments), dict(records), dict(merged_ids or {})))
+        return save(assignments, records, merged_ids)
+
+    manager.identity_store.save = recording_save
+    manager.saves = saves
+    yield manager
+    manager.identity_store.close()
+    manager.executor.shutdown(wait=False)
+
+
+def test_cross_source_duplicates_share_a_canonical_id(manager):
+    vets = [
+        provider_vet("tomtom_api", "t1", "Springfield Animal Hospital", 39.7800, -89.6500, "2175550100"),
+        provider_vet("here_api", "h1", "Springfield Animal Hospital", 39.7801, -89.6501, "2175550100"),
+        provider_vet("here_api", "h2", "Capitol Pet Care", 39.8000, -89.7000),
+    ]
+    first = manager._deduplicate_vet_data(copy.deepcopy(vets))
+    assert len(first) == 2
+
+    second = manager._deduplicate_vet_data([copy.deepcopy(vets[1])])
+    assert second[0]["canonical_id"] == first[0]["canonical_id"]
+
+
+def test_repeat_searches_only_write_changes(manager):
+    vets = [
+        provider_vet("tomtom_api", "t1", "Springfield Animal Hospital", 39.7800, -89.6500),
+        provider_vet("here_api", "h2", "Capitol Pet Care", 39.8000, -89.7000),
+    ]
+    manager._deduplicate_vet_data(copy.deepcopy(vets))
+    assert len(manager.saves) == 1
+    assert len(manager.saves[0][0]) == 2 and len(manager.saves[0][1]) == 2
+
+    moved = copy.deepcopy(vets)
+    for vet in moved:
+        vet["distance"] += 3
+    manager._deduplicate_vet_data(moved)
+    assert len(manager.saves) == 1
+
+    changed = copy.deepcopy(vets)
+    changed[1]["phone"] = "2175550199"
+    manager._deduplicate_vet_data(changed)
+    assert len(manager.saves) == 2
+    assert manager.saves[1][0] == {}
+    assert list(manager.saves[1][1]) == [canonical_id_for(("here_api", "h2"))]
+
+
+def test_new_record_bridging_known_vets_merges_them(manager):
+    first = provider_vet("tomtom_api", "t1", "Oak Ridge Animal Clinic", 39.7800, -89.6500)
+    second = provider_vet("here_api", "h1", "Oak Ridge Animal Clinic", 39.7801, -89.6500)
+    manager._deduplicate_vet_data([copy.deepcopy(first)])
+    manager._deduplicate_vet_data([copy.deepcopy(second)])
+    first_id, second_id = sorted([canonical_id_for(("tomtom_api", "t1")), canonical_id_for(("here_api", "h1"))])
+
+    newcomer = provider_vet("tomtom_api", "t2", "Oak Ridge Animal Clinic", 39.7800, -89.6501)
+    merged = manager._deduplicate_vet_data([copy.deepcopy(first), copy.deepcopy(second), newcomer])
+
+    assert len(merged) == 1
+    assert merged[0]["canonical_id"] == first_id
+    assert manager.saves[-1][2] == {second_id: first_id}
+    assert first_id in manager.saves[-1][1]
+    known = manager.identity_store.lookup_many([("tomtom_api", "t1"), ("here_api", "h1"), ("tomtom_api", "t2")])
+    assert set(known.values()) == {first_id}
+    assert list(manager.identity_store.get_records([first_id, second_id])) == [first_id]
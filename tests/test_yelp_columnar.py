@@ -0,0 +1,77 @@
+import threading
+
+import numpy as np
+
+from api.yelp_columnar import ColumnarVetStore
+
+
+def businesses(count, prefix="b"):
+    return [{
+        "business_id": f"{prefix}{i}",
+        "name": f"Animal Hospital {i}",
+        "latitude": 39.7 + i / 1000,
+        "longitude": -89.6,
+        "stars": 4.5,
+        "review_count": i,
+        "city": "Springfield",
+        "state": "IL",
+        "categories": ["Veterinarians", "Pets"],
+        "attributes": {"RestaurantsPriceRange2": "2", "ByAppointmentOnly": str(i % 2 == 0)},
+        "hours": {"Monday": f"{i % 12}:0-17:0"},
+    } for i in range(count)]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "vet_columns")
+    source = businesses(20) + [{"business_id": "empty", "name": "No Coordinates"}]
+    store = ColumnarVetStore.write(path, source, meta={"note": "x"})
+
+    assert len(store) == 21
+    assert store.meta["note"] == "x"
+    record = store.record(3)
+    assert record["business_id"] == "b3"
+    assert record["categories"] == "Veterinarians, Pets"
+    assert record["hours"] == {"Monday": "3:0-17:0"}
+    assert record["source"] == "yelp_dataset"
+    empty = store.record(20)
+    assert empty["latitude"] is None and store.extras(20) == {}
+    assert np.isnan(store.column("latitude")[20])
+
+
+def test_concurrent_extras_reads(tmp_path):
+    store = ColumnarVetStore.write(str(tmp_path / "vet_columns"), businesses(500))
+    mismatches = []
+
+    def read_all(shift):
+        for index in list(range(shift, 500)) + list(range(shift)):
+            if store.extras(index)["hours"]["Monday"] != f"{index % 12}:0-17:0":
+                mismatches.append(index)
+
+    threads = [threading.Thread(target=read_all, args=(shift * 60,)) for shift in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatches == []
+
+
+def test_old_store_stays_readable_after_rewrite(tmp_path):
+    path = str(tmp_path / "vet_columns")
+    old = ColumnarVetStore.write(path, businesses(10))
+    old.column("name")
+
+    new = ColumnarVetStore.write(path, businesses(5, prefix="n"))
+
+    assert old.record(7)["name"] == "Animal Hospital 7"
+    assert old.extras(7)["hours"] == {"Monday": "7:0-17:0"}
+    assert new.record(0)["business_id"] == "n0"
+    assert ColumnarVetStore(path).open().record(4)["business_id"] == "n4"
+
+
+def test_add_columns(tmp_path):
+    store = ColumnarVetStore.write(str(tmp_path / "vet_columns"), businesses(3))
+    store.add_columns(numeric={"weighted_rating": np.array([1.0, 2.0, 3.0])},
+                      strings={"last_review_date": ["2022-01-01", "", None]})
+    reopened = ColumnarVetStore(store.path).open()
+    assert reopened.values(1, ["weighted_rating", "last_review_date", "missing"]) == {
+        "weighted_rating": 2.0, "last_review_date": ""}
@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from api.yelp_dataset import YelpDatasetProcessor
+
+
+def business(i):
+    return {"business_id": f"b{i}", "name": f"Pet Clinic {i}", "address": f"{i} Main St", "city": "Springfield",
+            "state": "IL", "postal_code": "62701", "latitude": 39.78 + i / 1000, "longitude": -89.65,
+            "stars": 4.0, "review_count": 2, "is_open": 1, "categories": "Veterinarians, Pets",
+            "attributes": None, "hours": None}
+
+
+def review(i, business_id, stars):
+    return {"review_id": f"r{i}", "user_id": "u", "business_id": business_id, "stars": stars,
+            "text": "Great with my dog", "date": f"2020-01-{i % 28 + 1:02d} 10:00:00"}
+
+
+def append_lines(path, records):
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    dataset_path = tmp_path / "yelp"
+    dataset_path.mkdir()
+    append_lines(dataset_path / "yelp_academic_dataset_business.json",
+                 [business(i) for i in range(5)] + [dict(business(9), categories="Restaurants", name="Diner")])
+    append_lines(dataset_path / "yelp_academic_dataset_review.json",
+                 [review(i, f"b{i % 5}", 1 + i % 5) for i in range(20)])
+    return str(dataset_path)
+
+
+def test_review_summaries_survive_business_append(dataset):
+    processor = YelpDatasetProcessor(dataset, ingest_workers=1, analyze_review_text=False)
+    processor.prepare_review_summaries()
+    store = processor.load_vet_store()
+    assert len(store) == 5
+    before = {store.column('business_id')[row]: processor.get_review_summary(row) for row in range(len(store))}
+    assert before["b1"]["indexed_review_count"] == 4
+
+    append_lines(processor.business_file, [business(5)])
+    store = processor.load_vet_store()
+
+    assert len(store) == 6
+    after = {store.column('business_id')[row]: processor.get_review_summary(row) for row in range(len(store))}
+    assert {business_id: after[business_id] for business_id in before} == before
+    assert after["b5"]["indexed_review_count"] == 0
+    assert "review_fingerprint" not in store.meta
+
+    processor.prepare_review_summaries()
+    store = processor.load_vet_store()
+    assert store.meta["review_fingerprint"] == processor.review_index.source_fingerprint
+
+
+def test_request_path_never_builds_the_review_index(dataset, monkeypatch):
+    processor = YelpDatasetProcessor(dataset, ingest_workers=1, analyze_review_text=False)
+    processor.load_vet_store()
+    monkeypatch.setattr(processor, "build_review_index",
+                        lambda *args, **kwargs: pytest.fail("review index built on the request path"))
+
+    assert processor.get_reviews_for_businesses(["b1", "b2"]) == {"b1": [], "b2": []}
+    assert not os.path.exists(processor.review_index_file)
+
+
+def test_request_path_reads_index_built_by_ingest(dataset):
+    YelpDatasetProcessor(dataset, ingest_workers=1, analyze_review_text=False).prepare_review_summaries()
+
+    processor = YelpDatasetProcessor(dataset, ingest_workers=1, analyze_review_text=False)
+    reviews = processor.get_reviews_for_businesses(["b1"], limit=2)["b1"]
+    assert [review["business_id"] for review in reviews] == ["b1", "b1"]
+
+    append_lines(processor.review_file, [review(99, "b1", 5)])
+    processor.review_store.clear()
+    assert len(processor.get_reviews_for_businesses(["b1"], limit=10)["b1"]) == 4
+
+    with open(processor.review_file, 'r+b') as f:
+        f.write(b'{"review_id": "rX"')
+    stat = os.stat(processor.review_file)
+    os.utime(processor.review_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+    processor.review_store.clear()
+    assert processor.get_reviews_for_businesses(["b1"]) == {"b1": []}
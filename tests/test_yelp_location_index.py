@@ -0,0 +1,52 @@
+from api.yelp_location_index import LocationTextIndex, normalize_state, normalize_text, normalize_zip
+
+
+CITIES = ['Las Vegas', 'North Las Vegas', 'Santa Barbara', 'San Diego', 'Henderson', 'Springfield', 'Springfield']
+STATES = ['NV', 'NV', 'CA', 'CA', 'NV', 'IL', 'MO']
+ZIPS = ['89101', '89030-1234', '93101', '92101', '89002', '62701', '65801']
+ADDRESSES = ['1 Main St', '2 Vegas Dr', '3 State St', '4 Harbor Dr', '5 Green Valley Pkwy', '6 Capitol Ave', '7 Elm St']
+
+
+def build_index():
+    return LocationTextIndex.build(CITIES, STATES, ZIPS, ADDRESSES)
+
+
+def test_normalizers():
+    assert normalize_text('  St. Louis,  MO ') == 'st louis mo'
+    assert normalize_state('Illinois') == 'il'
+    assert normalize_state('IL') == 'il'
+    assert normalize_zip('89030-1234') == '89030'
+    assert normalize_text(None) == ''
+
+
+def test_parse_query_splits_city_state_zip():
+    index = build_index()
+    assert index.parse_query('Las Vegas, NV 89101') == {'city': 'las vegas', 'state': 'nv', 'zip': '89101'}
+    assert index.parse_query('Springfield IL') == {'city': 'springfield', 'state': 'il', 'zip': None}
+    assert index.parse_query('Nevada') == {'city': None, 'state': 'nv', 'zip': None}
+
+
+def test_exact_city_and_state_filter():
+    index = build_index()
+    assert index.match('Springfield, IL') == [5]
+    assert index.match('Springfield, Missouri') == [6]
+    assert index.match('Springfield') == [5, 6]
+
+
+def test_partial_city_uses_token_index():
+    index = build_index()
+    assert index.match('vegas') == [0, 1]
+    assert index.match('North Las Vegas') == [0, 1]
+    assert index.match('San') == [3]
+
+
+def test_zip_and_state_only_queries():
+    index = build_index()
+    assert index.match('89030') == [1]
+    assert index.match('NV') == [0, 1, 4]
+
+
+def test_address_tokens_match():
+    index = build_index()
+    assert index.match('Green Valley') == [4]
+    assert index.match('Unknown Place') == []
@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from api.yelp_review_index import ReviewIndex
+from utils.fingerprint import APPENDED, CHANGED, UNCHANGED
+
+
+def review(review_id, business_id, stars, date):
+    return {"review_id": review_id, "business_id": business_id, "stars": stars,
+            "date": date, "text": f"Review {review_id}"}
+
+
+def write_reviews(path, reviews, mode='w'):
+    with open(path, mode, encoding='utf-8') as f:
+        for item in reviews:
+            f.write(json.dumps(item) + "\n")
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def review_file(tmp_path):
+    path = tmp_path / "yelp_academic_dataset_review.json"
+    write_reviews(path, [
+        review("r1", "b1", 5, "2022-01-01 10:00:00"),
+        review("r2", "b2", 3, "2022-02-01 10:00:00"),
+        review("r3", "b3", 1, "2022-03-01 10:00:00"),
+        review("r4", "b1", 4, "2022-04-01 10:00:00"),
+    ])
+    return str(path)
+
+
+def test_build_indexes_wanted_businesses_newest_first(tmp_path, review_file):
+    index = ReviewIndex(str(tmp_path / "index.json")).build(review_file, ["b1", "b2", "b4"])
+    assert set(index.businesses) == {"b1", "b2", "b4"}
+    assert [r["review_id"] for r in index.read_reviews(review_file, "b1")] == ["r4", "r1"]
+    assert index.read_reviews(review_file, "b4") == []
+    assert index.aggregates["b1"]["review_count"] == 2
+    assert index.source_status(review_file) == UNCHANGED
+
+
+def test_update_reads_only_appended_reviews(tmp_path, review_file):
+    index = ReviewIndex(str(tmp_path / "index.json")).build(review_file, ["b1", "b2"])
+    lines_before = index.lines_read
+    write_reviews(review_file, [
+        review("r5", "b1", 2, "2023-01-01 10:00:00"),
+        review("r6", "b3", 5, "2023-01-02 10:00:00"),
+        review("r7", "b2", 4, "2021-01-01 10:00:00"),
+    ], mode='a')
+    bump_mtime(review_file)
+
+    assert index.source_status(review_file) == APPENDED
+    updated = index.update(review_file, ["b1", "b2"])
+
+    assert updated == {"b1", "b2"}
+    assert index.lines_read == 3 and lines_before == 4
+    assert [r["review_id"] for r in index.read_reviews(review_file, "b1")] == ["r5", "r4", "r1"]
+    assert [r["review_id"] for r in index.read_reviews(review_file, "b2")] == ["r2", "r7"]
+    assert "b3" not in index
+    assert index.is_current(review_file)
+
+    rebuilt = ReviewIndex(str(tmp_path / "rebuilt.json")).build(review_file, ["b1", "b2"])
+    assert index.businesses == rebuilt.businesses
+    assert index.aggregates["b1"]["star_counts"] == rebuilt.aggregates["b1"]["star_counts"]
+    assert index.aggregates["b1"]["review_count"] == 3
+
+
+def test_in_place_edit_is_detected(tmp_path, review_file):
+    index = ReviewIndex(str(tmp_path / "index.json")).build(review_file, ["b1"])
+    with open(review_file, 'r+b') as f:
+        data = f.read()
+        f.seek(data.index(b'"stars": 3'))
+        f.write(b'"stars": 2')
+    bump_mtime(review_file)
+    assert index.source_status(review_file) == CHANGED
+    assert not index.is_current(review_file)
+
+
+def test_save_and_load_round_trip(tmp_path, review_file):
+    index_file = str(tmp_path / "index.json")
+    index = ReviewIndex(index_file).build(review_file, ["b1", "b2"])
+    index.save()
+
+    loaded = ReviewIndex(index_file)
+    assert loaded.load()
+    assert loaded.businesses == index.businesses
+    assert loaded.aggregates == index.aggregates
+    assert loaded.is_current(review_file)
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
@@ -2,12 +2,186 @@ import requests
 import logging
 import time
 import json
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
 import random
+from requests.adapters import HTTPAdapter
+from .deadline import Deadline
+from .hedging import HedgingPolicy
+from .rate_limit import RateLimiter
+
+
+class SessionRegistry:
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 10):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None):
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+            sessions = list(self._sessions.values())
+            self._sessions = {}
+        for session in sessions:
+            session.close()
+
+    def get(self, url: str) -> requests.Session:
+        parsed = urlparse(url)
+        host = f"{parsed.scheme}://{parsed.netloc}"
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            sessions = dict(self._sessions)
+        stats = {}
+        for host, session in sessions.items():
+            adapter = session.get_adapter(host)
+            opened = 0
+            requests_made = 0
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is None:
+                    continue
+                opened += pool.num_connections
+                requests_made += pool.num_requests
+            stats[host] = {
+                "requests": requests_made,
+                "connections_opened": opened,
+                "connections_reused": max(0, requests_made - opened),
+                "pool_maxsize": self.pool_maxsize
+            }
+        return stats
+
+    def close(self):
+        self.configure()
+
+
+session_registry = SessionRegistry()
+
+
+def get_session(url: str) -> requests.Session:
+    return session_registry.get(url)
+
+
+def get_pool_stats() -> Dict[str, Dict]:
+    return session_registry.stats()
+
+class APIRequestError(Exception):
+
+    def __init__(self, message: str, budget_exhausted: bool = False):
+        super().__init__(message)
+        self.budget_exhausted = budget_exhausted
+
+
+MIN_ATTEMPT_SECONDS = 0.5
+
+
+def _can_retry_after(deadline: Optional[Deadline], backoff: float) -> bool:
+    return deadline is None or deadline.can_fit(backoff + MIN_ATTEMPT_SECONDS)
+
+
+def _deadline_exceeded(deadline: Deadline, url: str, reason: str, logger: logging.Logger) -> Dict[str, Any]:
+    deadline.mark_cut(urlparse(url).netloc, reason)
+    error_msg = f"Deadline reached for {url}: {reason}"
+    logger.warning(error_msg)
+    return {"error": error_msg, "deadline_exceeded": True}
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="api-hedge")
+
+
+def _close_response(future: Future):
+    try:
+        response = future.result()
+    except Exception:
+        return
+    if response is not None:
+        response.close()
+
+
+def _send_hedge(send: Callable[[], requests.Response], send_at: float, primary_done: threading.Event, race_lock: threading.Lock,
+                hedge_sent: threading.Event, hedging: HedgingPolicy, rate_limiter: Optional[RateLimiter],
+                url: str, logger: logging.Logger) -> Optional[requests.Response]:
+    if primary_done.wait(max(0.0, send_at - time.monotonic())):
+        return None
+    with race_lock:
+        if primary_done.is_set() or not hedging.try_hedge():
+            return None
+        if rate_limiter is not None and rate_limiter.try_acquire() > 0:
+            hedging.cancel_hedge()
+            return None
+        hedge_sent.set()
+    logger.debug(f"No response from {url} within the hedge delay, sending a hedged request")
+    return send()
+
+
+def _hedged_get(session: requests.Session, url: str, params: Optional[Dict], headers: Optional[Dict],
+                timeout: int, hedging: HedgingPolicy, rate_limiter: Optional[RateLimiter],
+                logger: logging.Logger) -> requests.Response:
+    started_at = time.monotonic()
+    send = lambda: session.get(url, params=params, headers=headers, timeout=timeout)
+    delay = hedging.hedge_delay()
+    if delay is None:
+        response = send()
+        hedging.record_request(time.monotonic() - started_at)
+        return response
+    
+    primary_done = threading.Event()
+    hedge_sent = threading.Event()
+    race_lock = threading.Lock()
+    hedge = _hedge_executor.submit(_send_hedge, send, started_at + delay, primary_done, race_lock,
+                                   hedge_sent, hedging, rate_limiter, url, logger)
+    try:
+        response = send()
+    except Exception as primary_error:
+        with race_lock:
+            primary_done.set()
+        hedge.cancel()
+        if not hedge_sent.is_set():
+            raise
+        try:
+            response = hedge.result()
+        except Exception:
+            raise primary_error
+        hedging.record_winner(True)
+        hedging.record_request(time.monotonic() - started_at)
+        return response
+    
+    with race_lock:
+        primary_done.set()
+    hedge.cancel()
+    hedge.add_done_callback(_close_response)
+    if hedge_sent.is_set():
+        hedging.record_winner(False)
+    hedging.record_request(time.monotonic() - started_at)
+    return response
+
 
 def make_api_request(url: str, method: str = "get", params: Optional[Dict] = None, 
                    data: Optional[Dict] = None, headers: Optional[Dict] = None, 
-                   timeout: int = 10, max_retries: int = 3, logger: Optional[logging.Logger] = None) -> Dict[str, Any]:
+                   timeout: int = 10, max_retries: int = 3, logger: Optional[logging.Logger] = None,
+                   rate_limiter: Optional[RateLimiter] = None, rate_limit_wait: float = 1.0,
+                   hedging: Optional[HedgingPolicy] = None,
+                   deadline: Optional[Deadline] = None) -> Dict[str, Any]:
 
     if logger is None:
         logger = logging.getLogger()
@@ -22,17 +196,31 @@ def make_api_request(url: str, method: str = "get", params: Optional[Dict] = Non
     retries = 0
     
     while retries <= max_retries:
+        if deadline is not None and deadline.expired():
+            return _deadline_exceeded(deadline, url, "request not sent, deadline already passed", logger)
+        request_timeout = timeout if deadline is None else deadline.timeout(timeout)
+        if deadline is not None:
+            rate_limit_wait = deadline.timeout(rate_limit_wait)
+        
+        if rate_limiter is not None and not rate_limiter.acquire(timeout=rate_limit_wait):
+            error_msg = f"Rate limit budget exhausted for {url}"
+            logger.warning(error_msg)
+            return {"error": error_msg, "budget_exhausted": True}
+        
         try:
             logger.debug(f"Making {method} request to {url}")
             
-            if method == "get":
-                response = requests.get(url, params=params, headers=headers, timeout=timeout)
+            session = get_session(url)
+            if method == "get" and hedging is not None:
+                response = _hedged_get(session, url, params, headers, request_timeout, hedging, rate_limiter, logger)
+            elif method == "get":
+                response = session.get(url, params=params, headers=headers, timeout=request_timeout)
             elif method == "post":
-                response = requests.post(url, params=params, json=data, headers=headers, timeout=timeout)
+                response = session.post(url, params=params, json=data, headers=headers, timeout=request_timeout)
             elif method == "put":
-                response = requests.put(url, params=params, json=data, headers=headers, timeout=timeout)
+                response = session.put(url, params=params, json=data, headers=headers, timeout=request_timeout)
             elif method == "delete":
-                response = requests.delete(url, params=params, headers=headers, timeout=timeout)
+                response = session.delete(url, params=params, headers=headers, timeout=request_timeout)
             else:
                 return {"error": f"Unsupported HTTP method: {method}"}
             
@@ -43,9 +231,13 @@ def make_api_request(url: str, method: str = "get", params: Optional[Dict] = Non
                     return {"text": response.text}
                     
             elif response.status_code == 429:
+                if rate_limiter is not None:
+                    rate_limiter.drain()
                 retries += 1
                 if retries <= max_retries:
                     backoff = (2 ** retries) + random.uniform(0, 1)
+                    if not _can_retry_after(deadline, backoff):
+                        return _deadline_exceeded(deadline, url, f"retry after 429 skipped, backoff {backoff:.1f}s", logger)
                     logger.warning(f"Rate limited. Retrying in {backoff:.1f} seconds. Attempt {retries}/{max_retries}")
                     time.sleep(backoff)
                     continue
@@ -66,6 +258,8 @@ def make_api_request(url: str, method: str = "get", params: Optional[Dict] = Non
         except requests.exceptions.Timeout:
             retries += 1
             if retries <= max_retries:
+                if not _can_retry_after(deadline, retries):
+                    return _deadline_exceeded(deadline, url, "retry after timeout skipped", logger)
                 logger.warning(f"Request timeout. Retrying in {retries} seconds. Attempt {retries}/{max_retries}")
                 time.sleep(retries)  
                 continue
@@ -77,6 +271,8 @@ def make_api_request(url: str, method: str = "get", params: Optional[Dict] = Non
         except requests.exceptions.ConnectionError:
             retries += 1
             if retries <= max_retries:
+                if not _can_retry_after(deadline, retries * 2):
+                    return _deadline_exceeded(deadline, url, "retry after connection error skipped", logger)
                 logger.warning(f"Connection error. Retrying in {retries*2} seconds. Attempt {retries}/{max_retries}")
                 time.sleep(retries * 2)  
                 continue
@@ -94,7 +290,9 @@ def make_api_request(url: str, method: str = "get", params: Optional[Dict] = Non
 
 def batch_api_requests(urls: list, method: str = "get", params_list: Optional[list] = None,
                      headers: Optional[Dict] = None, max_concurrent: int = 3,
-                     logger: Optional[logging.Logger] = None) -> list:
+                     logger: Optional[logging.Logger] = None, timeout: int = 10, max_retries: int = 3,
+                     deadline: Optional[Deadline] = None, rate_limiter: Optional[RateLimiter] = None,
+                     rate_limit_wait: float = 1.0) -> list:
     if logger is None:
         logger = logging.getLogger()
     
@@ -106,21 +304,36 @@ def batch_api_requests(urls: list, method: str = "get", params_list: Optional[li
         logger.error(error_msg)
         return [{"error": error_msg}] * len(urls)
     
-    results = []
-    for i in range(0, len(urls), max_concurrent):
-        batch_urls = urls[i:i+max_concurrent]
-        batch_params = params_list[i:i+max_concurrent]
-        batch_results = []
-        for j, (url, params) in enumerate(zip(batch_urls, batch_params)):
-            result = make_api_request(url, method=method, params=params, headers=headers, logger=logger)
-            batch_results.append(result)
-            if j < len(batch_urls) - 1:
-                time.sleep(0.2)
-        
-        results.extend(batch_results)
-        
-        if i + max_concurrent < len(urls):
-            logger.debug(f"Completed batch {i//max_concurrent + 1}. Waiting before next batch...")
-            time.sleep(1)
+    if not urls:
+        return []
+    
+    started_at = time.monotonic()
+    results = [None] * len(urls)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_concurrent, len(urls))),
+                                  thread_name_prefix="api-batch")
+    futures = {
+        executor.submit(make_api_request, url, method=method, params=params, headers=headers,
+                        timeout=timeout, max_retries=max_retries, logger=logger,
+                        rate_limiter=rate_limiter, rate_limit_wait=rate_limit_wait, deadline=deadline): index
+        for index, (url, params) in enumerate(zip(urls, params_list))
+    }
+    try:
+        for future in as_completed(futures, timeout=deadline.seconds() if deadline is not None else None):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = {"error": f"Unexpected error making request to {urls[index]}: {str(e)}"}
+    except FuturesTimeoutError:
+        missed = sum(1 for result in results if result is None)
+        logger.warning(f"{missed} of {len(urls)} batched requests missed the deadline after "
+                       f"{(time.monotonic() - started_at) * 1000:.0f} ms")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = {"error": f"Request to {urls[index]} exceeded its deadline", "deadline_exceeded": True}
     
-    return results
\ No newline at end of file
+    logger.debug(f"Completed {len(urls)} batched requests in {(time.monotonic() - started_at) * 1000:.0f} ms")
+    return results
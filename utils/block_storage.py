@@ -0,0 +1,219 @@
+import os
+import sys
+import zlib
+import tempfile
+import contextlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+
+BLOCK_SUFFIX = ".blkz"
+READ_CHUNK_SIZE = 64 * 1024
+INDEX_SUFFIX = ".idx.npy"
+DEFAULT_BLOCK_SIZE = 256 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def is_block_compressed(path: str) -> bool:
+    return path.endswith(BLOCK_SUFFIX)
+
+
+def compress_file(source_path: str, target_path: Optional[str] = None,
+                  block_size: int = DEFAULT_BLOCK_SIZE, level: int = 6) -> str:
+    target_path = target_path or source_path + BLOCK_SUFFIX
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(target_path)}.", suffix=".tmp",
+                                    dir=os.path.dirname(os.path.abspath(target_path)))
+    os.close(fd)
+    entries = []
+    uncompressed_offset = 0
+    compressed_offset = 0
+
+    with open(source_path, 'rb') as source, open(tmp_path, 'wb') as target:
+        pending: List[bytes] = []
+        pending_size = 0
+        for line in source:
+            pending.append(line)
+            pending_size += len(line)
+            if pending_size >= block_size:
+                compressed = zlib.compress(b''.join(pending), level)
+                entries.append((uncompressed_offset, compressed_offset))
+                target.write(compressed)
+                uncompressed_offset += pending_size
+                compressed_offset += len(compressed)
+                pending, pending_size = [], 0
+        if pending:
+            compressed = zlib.compress(b''.join(pending), level)
+            entries.append((uncompressed_offset, compressed_offset))
+            target.write(compressed)
+            uncompressed_offset += pending_size
+            compressed_offset += len(compressed)
+
+    entries.append((uncompressed_offset, compressed_offset))
+    np.save(tmp_path + INDEX_SUFFIX, np.array(entries, dtype='int64'))
+    os.replace(tmp_path + INDEX_SUFFIX, target_path + INDEX_SUFFIX)
+    os.replace(tmp_path, target_path)
+    logger.info(f"Compressed {source_path} ({uncompressed_offset} bytes) into {len(entries) - 1} blocks "
+                f"({compressed_offset} bytes)")
+    return target_path
+
+
+class PlainLineFile:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    def split_points(self) -> Optional[List[int]]:
+        return None
+
+    def iter_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if end is not None and offset >= end:
+                    break
+                yield offset, line
+                offset += len(line)
+
+    def _fileno(self) -> int:
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            return self._file.fileno()
+
+    def read_line_at(self, offset: int) -> bytes:
+        fd = self._fileno()
+        chunks = []
+        while True:
+            chunk = os.pread(fd, READ_CHUNK_SIZE, offset)
+            if not chunk:
+                break
+            newline = chunk.find(b'\n')
+            if newline != -1:
+                chunks.append(chunk[:newline + 1])
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class BlockCompressedFile:
+
+    def __init__(self, path: str, cache_blocks: int = 8):
+        self.path = path
+        self.blocks = np.load(path + INDEX_SUFFIX)
+        self.uncompressed_starts = self.blocks[:, 0]
+        self.cache_blocks = cache_blocks
+        self._cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+
+    @property
+    def size(self) -> int:
+        return int(self.blocks[-1, 0])
+
+    def split_points(self) -> List[int]:
+        return [int(start) for start in self.uncompressed_starts]
+
+    def _block_number(self, offset: int) -> int:
+        return int(np.searchsorted(self.uncompressed_starts, offset, side='right')) - 1
+
+    def _read_block(self, number: int, f=None) -> bytes:
+        start = int(self.blocks[number, 1])
+        end = int(self.blocks[number + 1, 1])
+        if f is None:
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            f = self._file
+        f.seek(start)
+        return zlib.decompress(f.read(end - start))
+
+    def _cached_block(self, number: int) -> bytes:
+        with self._lock:
+            block = self._cache.get(number)
+            if block is not None:
+                self._cache.move_to_end(number)
+                return block
+            block = self._read_block(number)
+            self._cache[number] = block
+            if len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+            return block
+
+    def read_line_at(self, offset: int) -> bytes:
+        number = self._block_number(offset)
+        if number < 0 or number >= len(self.blocks) - 1:
+            return b''
+        block = self._cached_block(number)
+        position = offset - int(self.blocks[number, 0])
+        end = block.find(b'\n', position)
+        return block[position:] if end == -1 else block[position:end + 1]
+
+    def iter_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        end = self.size if end is None else min(end, self.size)
+        number = max(0, self._block_number(start))
+        with open(self.path, 'rb') as f:
+            while number < len(self.blocks) - 1:
+                block_start = int(self.blocks[number, 0])
+                if block_start >= end:
+                    break
+                block = self._read_block(number, f)
+                position = 0
+                while position < len(block):
+                    newline = block.find(b'\n', position)
+                    line_end = len(block) if newline == -1 else newline + 1
+                    offset = block_start + position
+                    if offset >= end:
+                        return
+                    if offset >= start:
+                        yield offset, block[position:line_end]
+                    position = line_end
+                number += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+@contextlib.contextmanager
+def open_block_compressed(path: str, mode: str = 'rb', encoding: str = 'utf-8'):
+    line_file = BlockCompressedFile(path)
+    try:
+        if 'b' in mode:
+            yield (line for _, line in line_file.iter_lines())
+        else:
+            yield (line.decode(encoding) for _, line in line_file.iter_lines())
+    finally:
+        line_file.close()
+
+
+def open_line_file(path: str):
+    if is_block_compressed(path):
+        return BlockCompressedFile(path)
+    return PlainLineFile(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: python -m utils.block_storage <jsonl file> [output{BLOCK_SUFFIX}]")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    compress_file(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,64 @@
+import math
+import time
+import threading
+from typing import Dict, List, Optional
+
+
+class Deadline:
+
+    def __init__(self, seconds: Optional[float] = None, at: Optional[float] = None,
+                 _cut_short: Optional[List[Dict]] = None, _lock: Optional[threading.Lock] = None,
+                 _started_at: Optional[float] = None, _scope_cuts: Optional[List[Dict]] = None):
+        if at is None and seconds is not None:
+            at = time.monotonic() + seconds
+        self.at = at
+        self.started_at = _started_at if _started_at is not None else time.monotonic()
+        self._cut_short = _cut_short if _cut_short is not None else []
+        self._lock = _lock or threading.Lock()
+        self._scope_cuts = _scope_cuts
+
+    def child(self, seconds: Optional[float] = None, scoped: bool = False) -> 'Deadline':
+        at = self.at
+        if seconds is not None:
+            child_at = time.monotonic() + seconds
+            at = child_at if at is None else min(at, child_at)
+        return Deadline(at=at, _cut_short=self._cut_short, _lock=self._lock, _started_at=self.started_at,
+                        _scope_cuts=[] if scoped else self._scope_cuts)
+
+    def remaining(self) -> float:
+        if self.at is None:
+            return math.inf
+        return max(0.0, self.at - time.monotonic())
+
+    def seconds(self) -> Optional[float]:
+        return None if self.at is None else self.remaining()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def can_fit(self, seconds: float) -> bool:
+        return self.remaining() >= seconds
+
+    def timeout(self, default: float) -> float:
+        return min(default, self.remaining())
+
+    def mark_cut(self, stage: str, reason: str):
+        cut = {
+            "stage": stage,
+            "reason": reason,
+            "at_ms": round((time.monotonic() - self.started_at) * 1000)
+        }
+        with self._lock:
+            self._cut_short.append(cut)
+            if self._scope_cuts is not None:
+                self._scope_cuts.append(cut)
+
+    @property
+    def cut_short(self) -> List[Dict]:
+        with self._lock:
+            return list(self._cut_short)
+
+    @property
+    def scope_cut_short(self) -> List[Dict]:
+        with self._lock:
+            return list(self._scope_cuts or [])
@@ -0,0 +1,106 @@
+import os
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+
+SAMPLE_BYTES = 1024 * 1024
+SPOT_CHECK_BLOCKS = 64
+SPOT_CHECK_BYTES = 64 * 1024
+UNCHANGED = 'unchanged'
+APPENDED = 'appended'
+CHANGED = 'changed'
+
+APPENDABLE_SUFFIXES = ('.json', '.jsonl')
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_range(path: str, start: int, end: int) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _ends_with_newline(path: str, size: int) -> bool:
+    if size == 0:
+        return True
+    with open(path, 'rb') as f:
+        f.seek(size - 1)
+        return f.read(1) == b'\n'
+
+
+def _spot_check_offsets(size: int, blocks: int = SPOT_CHECK_BLOCKS) -> List[int]:
+    if size <= SPOT_CHECK_BYTES:
+        return [0]
+    last = size - SPOT_CHECK_BYTES
+    return sorted({last * i // (blocks - 1) for i in range(blocks)})
+
+
+def _spot_check_sha1(path: str, offsets: List[int]) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            digest.update(f.read(SPOT_CHECK_BYTES))
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str, sample_bytes: int = SAMPLE_BYTES) -> Dict:
+    stat = os.stat(path)
+    size = stat.st_size
+    return {
+        'path': os.path.abspath(path),
+        'size': size,
+        'mtime': stat.st_mtime,
+        'head_sha1': _hash_range(path, 0, min(size, sample_bytes)),
+        'tail_sha1': _hash_range(path, max(0, size - sample_bytes), size),
+        'spot_sha1': _spot_check_sha1(path, _spot_check_offsets(size)),
+        'sample_bytes': sample_bytes,
+        'ends_with_newline': _ends_with_newline(path, size)
+    }
+
+
+def stat_matches(fingerprint: Optional[Dict], path: str) -> bool:
+    if not fingerprint or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    return (fingerprint.get('path') == os.path.abspath(path) and
+            fingerprint.get('size') == stat.st_size and
+            fingerprint.get('mtime') == stat.st_mtime)
+
+
+def compare_fingerprint(fingerprint: Optional[Dict], path: str) -> str:
+    if not fingerprint or not os.path.exists(path) or fingerprint.get('path') != os.path.abspath(path):
+        return CHANGED
+    if stat_matches(fingerprint, path):
+        return UNCHANGED
+
+    old_size = fingerprint['size']
+    sample_bytes = fingerprint.get('sample_bytes', SAMPLE_BYTES)
+    size = os.path.getsize(path)
+    if size < old_size:
+        return CHANGED
+
+    head_sha1 = _hash_range(path, 0, min(old_size, sample_bytes))
+    tail_sha1 = _hash_range(path, max(0, old_size - sample_bytes), old_size)
+    if head_sha1 != fingerprint['head_sha1'] or tail_sha1 != fingerprint['tail_sha1']:
+        return CHANGED
+    if size == old_size:
+        if fingerprint.get('spot_sha1') is None:
+            logger.info(f"{path} was modified in place and has no spot-check hash, treating it as changed")
+            return CHANGED
+        spot_sha1 = _spot_check_sha1(path, _spot_check_offsets(size))
+        return UNCHANGED if spot_sha1 == fingerprint['spot_sha1'] else CHANGED
+    if not path.endswith(APPENDABLE_SUFFIXES) or not fingerprint.get('ends_with_newline'):
+        logger.info(f"{path} grew but cannot be read from an offset, treating it as changed")
+        return CHANGED
+    return APPENDED
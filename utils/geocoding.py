@@ -1,7 +1,8 @@
 import logging
 import os
 from typing import Tuple, Dict, Optional
-import requests
+from .api_utils import get_session
+from .deadline import Deadline
 
 
 logger = logging.getLogger(__name__)
@@ -43,7 +44,7 @@ COMMON_CITIES = {
     'milwaukee': (43.0389, -87.9065)
 }
 
-def geocode_location(location: str) -> Tuple[Optional[float], Optional[float]]:
+def geocode_location(location: str, deadline: Optional[Deadline] = None) -> Tuple[Optional[float], Optional[float]]:
     if not location:
         return None, None
         
@@ -63,34 +64,40 @@ def geocode_location(location: str) -> Tuple[Optional[float], Optional[float]]:
         except ValueError:
             pass  
     
-    try:
-        logger.info(f"Geocoding location with Nominatim: {location}")
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            "q": location,
-            "format": "json",
-            "limit": 1,
-            "addressdetails": 1
-        }
-        headers = {
-            "User-Agent": "PetCare-Vet-Finder/1.0"  
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                lat = float(data[0]["lat"])
-                lng = float(data[0]["lon"])
-                _geocode_cache[location_key] = (lat, lng)
-                logger.info(f"Successfully geocoded {location} to {lat}, {lng}")
-                return lat, lng
-    except Exception as e:
-        logger.warning(f"Error using Nominatim for {location}: {e}")
+    skipped_lookup = deadline is not None and deadline.expired()
+    if skipped_lookup:
+        deadline.mark_cut("geocoding", "Nominatim lookup skipped, using built-in city coordinates")
+    else:
+        try:
+            logger.info(f"Geocoding location with Nominatim: {location}")
+            url = "https://nominatim.openstreetmap.org/search"
+            params = {
+                "q": location,
+                "format": "json",
+                "limit": 1,
+                "addressdetails": 1
+            }
+            headers = {
+                "User-Agent": "PetCare-Vet-Finder/1.0"  
+            }
+            
+            timeout = 5 if deadline is None else deadline.timeout(5)
+            response = get_session(url).get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code == 200:
+                data = response.json()
+                if data:
+                    lat = float(data[0]["lat"])
+                    lng = float(data[0]["lon"])
+                    _geocode_cache[location_key] = (lat, lng)
+                    logger.info(f"Successfully geocoded {location} to {lat}, {lng}")
+                    return lat, lng
+        except Exception as e:
+            logger.warning(f"Error using Nominatim for {location}: {e}")
     
     coords = get_default_coordinates(location)
     if coords[0] is not None:
-        _geocode_cache[location_key] = coords
+        if not skipped_lookup:
+            _geocode_cache[location_key] = coords
         return coords
     
     logger.error(f"All geocoding methods failed for {location}")
@@ -135,7 +142,7 @@ def get_formatted_address(lat: float, lng: float) -> str:
             "User-Agent": "PetCare-Vet-Finder/1.0"
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=5)
+        response = get_session(url).get(url, params=params, headers=headers, timeout=5)
         if response.status_code == 200:
             data = response.json()
             if "display_name" in data:
@@ -0,0 +1,74 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+class HedgingPolicy:
+
+    def __init__(self, name: str, budget_ratio: float = 0.1, percentile: float = 0.9,
+                 window_size: int = 100, min_samples: int = 20, min_delay: float = 0.05,
+                 max_delay: Optional[float] = None):
+        self.name = name
+        self.budget_ratio = budget_ratio
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._latencies = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.budget_denied = 0
+        self.rate_limited = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        delay = latencies[min(len(latencies) - 1, int(self.percentile * len(latencies)))]
+        delay = max(self.min_delay, delay)
+        if self.max_delay is not None:
+            delay = min(self.max_delay, delay)
+        return delay
+
+    def record_request(self, elapsed_seconds: float):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(elapsed_seconds)
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.budget_ratio * max(1, self.requests):
+                self.budget_denied += 1
+                return False
+            self.hedged += 1
+            return True
+
+    def cancel_hedge(self):
+        with self._lock:
+            self.hedged -= 1
+            self.rate_limited += 1
+
+    def record_winner(self, hedge_won: bool):
+        with self._lock:
+            if hedge_won:
+                self.hedge_wins += 1
+            else:
+                self.primary_wins += 1
+
+    def stats(self) -> Dict:
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "primary_wins": self.primary_wins,
+                "budget_denied": self.budget_denied,
+                "rate_limited": self.rate_limited,
+                "hedge_delay_ms": round(delay * 1000) if delay is not None else None
+            }
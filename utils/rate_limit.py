@@ -0,0 +1,124 @@
+import os
+import re
+import time
+import struct
+import logging
+import tempfile
+import threading
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = os.path.join(tempfile.gettempdir(), 'pcvf-rate-limits')
+STATE_FORMAT = 'dd'
+STATE_SIZE = struct.calcsize(STATE_FORMAT)
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def drain(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = 0.0
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_seconds = self.try_acquire(tokens)
+            if wait_seconds == 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining < wait_seconds:
+                    return False
+            time.sleep(wait_seconds)
+
+
+class SharedTokenBucket(TokenBucket):
+
+    def __init__(self, name: str, rate: float, capacity: Optional[float] = None,
+                 state_dir: Optional[str] = None):
+        super().__init__(rate, capacity)
+        self.name = name
+        state_dir = state_dir or DEFAULT_STATE_DIR
+        os.makedirs(state_dir, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+        self.path = os.path.join(state_dir, f"{safe_name}.bucket")
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def _update(self, tokens: float, drain: bool = False) -> float:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                raw = os.pread(self._fd, STATE_SIZE, 0)
+                if len(raw) == STATE_SIZE:
+                    stored_tokens, updated_at = struct.unpack(STATE_FORMAT, raw)
+                    available = min(self.capacity, stored_tokens + max(0.0, now - updated_at) * self.rate)
+                else:
+                    available = self.capacity
+
+                wait_seconds = 0.0
+                if drain:
+                    available = 0.0
+                elif available >= tokens:
+                    available -= tokens
+                else:
+                    wait_seconds = (tokens - available) / self.rate
+                os.pwrite(self._fd, struct.pack(STATE_FORMAT, available, now), 0)
+                return wait_seconds
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        return self._update(tokens)
+
+    def drain(self):
+        self._update(0.0, drain=True)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+RateLimiter = Union[TokenBucket, SharedTokenBucket]
+
+
+def create_rate_limiter(name: str, rate: float, capacity: Optional[float] = None,
+                        state_dir: Optional[str] = None, shared: bool = True) -> RateLimiter:
+    if shared and fcntl is not None:
+        try:
+            return SharedTokenBucket(name, rate, capacity, state_dir=state_dir)
+        except OSError as e:
+            logger.warning(f"Could not create shared rate limiter for {name}, using a per-process bucket: {e}")
+    return TokenBucket(rate, capacity)
+
@@ -0,0 +1,116 @@
+import math
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_miles_array(lat: float, lng: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    lat_rad = np.radians(lat)
+    lats_rad = np.radians(latitudes)
+    dlat = lats_rad - lat_rad
+    dlng = np.radians(longitudes - lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_miles: float) -> Tuple[float, float, float, float]:
+    lat_delta = radius_miles / MILES_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    lng_delta = min(180.0, radius_miles / (MILES_PER_DEGREE_LAT * cos_lat))
+    return (max(-90.0, lat - lat_delta), lng - lng_delta,
+            min(90.0, lat + lat_delta), lng + lng_delta)
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 6) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, value_range = (lng, lng_range) if even else (lat, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+class GridIndex:
+
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float], cell_size: float = 0.1):
+        self.cell_size = cell_size
+        self.latitudes = np.asarray(latitudes, dtype='float64')
+        self.longitudes = np.asarray(longitudes, dtype='float64')
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {}
+
+        valid = ~(np.isnan(self.latitudes) | np.isnan(self.longitudes))
+        indices = np.nonzero(valid)[0]
+        lat_cells = np.floor(self.latitudes[indices] / cell_size).astype('int64')
+        lng_cells = np.floor(self.longitudes[indices] / cell_size).astype('int64')
+
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        for index, lat_cell, lng_cell in zip(indices.tolist(), lat_cells.tolist(), lng_cells.tolist()):
+            buckets.setdefault((lat_cell, lng_cell), []).append(index)
+        self.cells = {key: np.array(value, dtype='int64') for key, value in buckets.items()}
+
+    def __len__(self) -> int:
+        return sum(len(members) for members in self.cells.values())
+
+    def cell_of(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lng / self.cell_size))
+
+    def candidates(self, lat: float, lng: float, radius_miles: float) -> np.ndarray:
+        min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, radius_miles)
+        min_lat_cell, min_lng_cell = self.cell_of(min_lat, min_lng)
+        max_lat_cell, max_lng_cell = self.cell_of(max_lat, max_lng)
+
+        found = []
+        if (max_lat_cell - min_lat_cell + 1) * (max_lng_cell - min_lng_cell + 1) > len(self.cells):
+            for (lat_cell, lng_cell), members in self.cells.items():
+                if min_lat_cell <= lat_cell <= max_lat_cell and min_lng_cell <= lng_cell <= max_lng_cell:
+                    found.append(members)
+        else:
+            for lat_cell in range(min_lat_cell, max_lat_cell + 1):
+                for lng_cell in range(min_lng_cell, max_lng_cell + 1):
+                    members = self.cells.get((lat_cell, lng_cell))
+                    if members is not None:
+                        found.append(members)
+
+        if not found:
+            return np.empty(0, dtype='int64')
+        return np.concatenate(found)
+
+    def query_radius(self, lat: float, lng: float, radius_miles: float) -> List[Tuple[int, float]]:
+        candidates = self.candidates(lat, lng, radius_miles)
+        if not len(candidates):
+            return []
+
+        distances = haversine_miles_array(lat, lng, self.latitudes[candidates], self.longitudes[candidates])
+        within = distances <= radius_miles
+        candidates = candidates[within]
+        distances = distances[within]
+        order = np.argsort(distances, kind='stable')
+        return [(int(candidates[i]), float(distances[i])) for i in order]